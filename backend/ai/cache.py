@@ -0,0 +1,190 @@
+"""
+LLM 响应缓存
+以 (模型 ID, 系统提示词, 用户消息, temperature) 的 sha256 为键：
+- 内存 LRU 在前，命中时不访问数据库
+- 数据库表 llm_cache 持久化，进程重启、流水线重跑都能命中
+- 每个调用点（classify / brief / ask_titan ...）各自的 TTL，可用 LLM_CACHE_TTL_<CALL_SITE> 覆盖（秒）
+- 超过 LLM_CACHE_MAX_ENTRIES 条时按最近命中时间淘汰
+- LLM_CACHE_ENABLED=0 全局关闭；单次调用传 use_cache=False 跳过
+缓存层自身出错只记日志，不影响模型调用。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from database import SessionLocal
+from models import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED  = os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False")
+MAX_ENTRIES    = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+
+# 各调用点默认 TTL（秒）
+DEFAULT_TTLS: dict[str, int] = {
+    "classify":  7 * 24 * 3600,   # 同一批标题的分类结果稳定
+    "brief":     24 * 3600,       # 同日重跑复用
+    "ask_titan": 6 * 3600,
+    "insight":   7 * 24 * 3600,   # 结果已按 (新闻, 大佬) 落库，这里只兜住同一批的重跑
+    "default":   24 * 3600,
+}
+
+
+def ttl_for(call_site: str) -> int:
+    env = os.getenv(f"LLM_CACHE_TTL_{call_site.upper()}")
+    if env:
+        return int(env)
+    return DEFAULT_TTLS.get(call_site, DEFAULT_TTLS["default"])
+
+
+def cache_key(model: str, system_prompt: str, user_message: str, temperature: float) -> str:
+    payload = json.dumps([model, system_prompt, user_message, round(float(temperature), 3)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """内存 LRU + 数据库持久化的两级缓存"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, memory_entries: int = MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, tuple[str, datetime]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    # ─────────────────────────────────────
+    # 内存层
+    # ─────────────────────────────────────
+    def _memory_get(self, key: str, now: datetime) -> str | None:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is None:
+                return None
+            if hit[1] <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return hit[0]
+
+    def _memory_put(self, key: str, response: str, expires_at: datetime):
+        with self._lock:
+            self._memory[key] = (response, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    # ─────────────────────────────────────
+    # 读写
+    # ─────────────────────────────────────
+    def get(self, key: str) -> str | None:
+        now = datetime.now()
+        cached = self._memory_get(key, now)
+        if cached is not None:
+            return cached
+
+        db = SessionLocal()
+        try:
+            row = db.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == key).first()
+            if row is None or row.expires_at is None or row.expires_at <= now:
+                return None
+            row.hits = (row.hits or 0) + 1
+            row.last_hit_at = now
+            db.commit()
+            response, expires_at = row.response, row.expires_at
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[LLMCache] 读取缓存失败: {e}")
+            return None
+        finally:
+            db.close()
+
+        self._memory_put(key, response, expires_at)
+        return response
+
+    def put(self, key: str, response: str, model: str, call_site: str, ttl: int):
+        if not response or ttl <= 0:
+            return
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=ttl)
+        self._memory_put(key, response, expires_at)
+
+        db = SessionLocal()
+        try:
+            row = db.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == key).first()
+            if row is None:
+                row = LLMCacheEntry(cache_key=key, hits=0)
+                db.add(row)
+            row.model = model
+            row.call_site = call_site
+            row.response = response
+            row.created_at = now
+            row.expires_at = expires_at
+            row.last_hit_at = now
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[LLMCache] 写入缓存失败: {e}")
+            return
+        finally:
+            db.close()
+
+        # 每写入一批检查一次容量，避免每次都 COUNT
+        with self._lock:
+            self._writes += 1
+            due = self._writes % 50 == 1
+        if due:
+            self.evict()
+
+    def evict(self, now: datetime | None = None) -> int:
+        """删除过期条目；仍超出容量时按最近命中时间淘汰最旧的。返回删除条数"""
+        now = now or datetime.now()
+        db = SessionLocal()
+        try:
+            removed = db.query(LLMCacheEntry).filter(LLMCacheEntry.expires_at <= now).delete(synchronize_session=False)
+            overflow = db.query(LLMCacheEntry).count() - self.max_entries
+            if overflow > 0:
+                stale = [
+                    row_id for (row_id,) in db.query(LLMCacheEntry.id)
+                    .order_by(LLMCacheEntry.last_hit_at.asc())
+                    .limit(overflow)
+                ]
+                removed += db.query(LLMCacheEntry).filter(LLMCacheEntry.id.in_(stale)).delete(synchronize_session=False)
+            db.commit()
+            if removed:
+                logger.info(f"[LLMCache] 淘汰 {removed} 条缓存")
+            return removed
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[LLMCache] 淘汰缓存失败: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def clear(self, call_site: str | None = None) -> int:
+        """清空缓存（可只清某个调用点），返回删除条数"""
+        with self._lock:
+            self._memory.clear()
+        db = SessionLocal()
+        try:
+            q = db.query(LLMCacheEntry)
+            if call_site:
+                q = q.filter(LLMCacheEntry.call_site == call_site)
+            removed = q.delete(synchronize_session=False)
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+
+_cache = LLMCache()
+
+
+def get_cache() -> LLMCache:
+    return _cache
@@ -0,0 +1,180 @@
+"""
+流水线检查点
+每个阶段（select / classify / rank / brief / persist / insights）的产物按 (简报日期, 阶段) 存入 pipeline_artifacts，
+并记下该阶段的 input_hash（上游产物摘要 + 本阶段配置的 sha256）：
+- 重跑时 input_hash 相同、且上次产物完整的阶段直接复用产物，不再执行
+- 上游产物变了，下游的 input_hash 跟着变，从第一个失效的阶段开始重跑
+- AI 不可用走了兜底的产物标记为不完整（complete=0），下次运行会重试该阶段
+每次运行写一行 pipeline_runs，记录各阶段是执行还是跳过、从哪个阶段恢复。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from datetime import date, datetime
+from typing import Callable
+
+from database import SessionLocal
+from models import PipelineArtifact, PipelineRun
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("select", "classify", "rank", "brief", "persist", "insights")
+
+
+def digest(*parts) -> str:
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Checkpoints:
+    """一次流水线运行的检查点读写；force=True 时忽略已有产物（仍会写入新产物）"""
+
+    def __init__(self, db, run_date: date, force: bool = False):
+        self.db = db
+        self.run_date = run_date
+        self.force = force
+        self.run = PipelineRun(
+            run_date=run_date,
+            status="running",
+            force=int(force),
+            stages={},
+            started_at=datetime.now(),
+        )
+        db.add(self.run)
+        db.commit()
+        self._started = time.perf_counter()
+
+    def _artifact(self, stage: str) -> PipelineArtifact | None:
+        return (
+            self.db.query(PipelineArtifact)
+            .filter(PipelineArtifact.run_date == self.run_date, PipelineArtifact.stage == stage)
+            .first()
+        )
+
+    def _mark(self, stage: str, state: str):
+        # JSON 列需要整体赋值才会被识别为修改
+        self.run.stages = {**(self.run.stages or {}), stage: state}
+        if state == "run" and self.run.resumed_from is None and stage != "select":
+            self.run.resumed_from = stage
+        self.db.commit()
+
+    def stage(
+        self,
+        name: str,
+        input_hash: str,
+        fn: Callable[[], dict],
+        complete: Callable[[dict], bool] = lambda output: True,
+        always: bool = False,
+    ) -> tuple[dict, bool]:
+        """
+        执行或复用一个阶段，返回 (产物, 是否复用了检查点)。
+        always=True 的阶段每次都执行（如 select 负责探测输入是否变化）。
+        """
+        artifact = self._artifact(name)
+        if (not self.force and not always and artifact is not None and artifact.complete
+                and artifact.input_hash == input_hash):
+            logger.info(f"[Checkpoint] {name} 输入未变，复用 {artifact.created_at:%Y-%m-%d %H:%M:%S} 的产物")
+            self._mark(name, "skipped")
+            return artifact.output, True
+
+        started = time.perf_counter()
+        try:
+            output = fn()
+        except Exception:
+            self.db.rollback()
+            self._mark(name, "failed")
+            raise
+        ok = bool(complete(output))
+        if artifact is None:
+            artifact = PipelineArtifact(run_date=self.run_date, stage=name)
+            self.db.add(artifact)
+        artifact.input_hash = input_hash
+        artifact.output = output
+        artifact.complete = int(ok)
+        artifact.run_id = self.run.id
+        artifact.elapsed_ms = (time.perf_counter() - started) * 1000
+        artifact.created_at = datetime.now()
+        self.db.commit()
+        if not ok:
+            logger.info(f"[Checkpoint] {name} 产物不完整，下次运行会重试")
+        self._mark(name, "run")
+        return output, False
+
+    def finish(self, error: BaseException | None = None):
+        try:
+            self.db.rollback()
+            self.run.status = "failed" if error is not None else "done"
+            self.run.error = str(error)[:500] if error is not None else None
+            self.run.finished_at = datetime.now()
+            self.run.elapsed_ms = (time.perf_counter() - self._started) * 1000
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"[Checkpoint] 更新运行记录失败: {e}")
+
+
+def _fmt(d: datetime | None) -> str | None:
+    return d.strftime("%Y-%m-%d %H:%M:%S") if d else None
+
+
+def run_to_dict(row: PipelineRun) -> dict:
+    return {
+        "id":           row.id,
+        "run_date":     str(row.run_date),
+        "status":       row.status,
+        "force":        bool(row.force),
+        "resumed_from": row.resumed_from,
+        "stages":       row.stages or {},
+        "error":        row.error,
+        "started_at":   _fmt(row.started_at),
+        "finished_at":  _fmt(row.finished_at),
+        "elapsed_ms":   round(row.elapsed_ms, 1) if row.elapsed_ms is not None else None,
+    }
+
+
+def list_runs(limit: int = 20, run_date: date | None = None) -> list[dict]:
+    db = SessionLocal()
+    try:
+        q = db.query(PipelineRun)
+        if run_date is not None:
+            q = q.filter(PipelineRun.run_date == run_date)
+        return [run_to_dict(r) for r in q.order_by(PipelineRun.id.desc()).limit(limit)]
+    finally:
+        db.close()
+
+
+def list_artifacts(run_date: date) -> list[dict]:
+    """某天各阶段的检查点（不含产物正文）"""
+    db = SessionLocal()
+    try:
+        rows = db.query(PipelineArtifact).filter(PipelineArtifact.run_date == run_date).all()
+        order = {s: i for i, s in enumerate(STAGES)}
+        rows.sort(key=lambda r: order.get(r.stage, len(STAGES)))
+        return [
+            {
+                "stage":      r.stage,
+                "input_hash": r.input_hash,
+                "digest":     (r.output or {}).get("digest"),
+                "complete":   bool(r.complete),
+                "run_id":     r.run_id,
+                "elapsed_ms": round(r.elapsed_ms, 1) if r.elapsed_ms is not None else None,
+                "created_at": _fmt(r.created_at),
+            }
+            for r in rows
+        ]
+    finally:
+        db.close()
+
+
+def clear(run_date: date) -> int:
+    """删除某天的全部检查点，下次运行从头执行"""
+    db = SessionLocal()
+    try:
+        n = db.query(PipelineArtifact).filter(PipelineArtifact.run_date == run_date).delete(synchronize_session=False)
+        db.commit()
+        return n
+    finally:
+        db.close()
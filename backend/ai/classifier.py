@@ -0,0 +1,356 @@
+"""
+本地分类模型（维度分类的第一道关）
+用历史上由 AI 分类（section_source='llm'）的 RawNews 标题训练：
+- 特征：标题的 1~3 字符 n-gram，crc32 哈希到固定维度（不需要词表、分词器）
+- 模型：多项式朴素贝叶斯（NumPy 实现），再用留出集拟合一个温度系数校准置信度
+- 阈值：在留出集上选出能达到 LOCAL_CLASSIFIER_TARGET_ACC 准确率的最低置信度
+流水线里置信度达到阈值的条目直接采用本地结果，其余才送 AI，见 ai/pipeline.py。
+
+重新训练 / 查看留出集准确率（在 backend/ 下）：
+    python -m ai.classifier train [--days 90] [--holdout 0.2]
+    python -m ai.classifier report
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from models import RawNews
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH   = os.getenv("LOCAL_CLASSIFIER_PATH",
+                         os.path.join(os.path.dirname(os.path.abspath(__file__)), "section_model.npz"))
+ENABLED      = os.getenv("LOCAL_CLASSIFIER_ENABLED", "1") not in ("0", "false", "False")
+TARGET_ACC   = float(os.getenv("LOCAL_CLASSIFIER_TARGET_ACC", "0.9"))
+MIN_SAMPLES  = int(os.getenv("LOCAL_CLASSIFIER_MIN_SAMPLES", "200"))
+HASH_BITS    = 18
+NGRAM_RANGE  = (1, 3)
+ALPHA        = 0.1   # 加性平滑
+
+_TEMPERATURES = (1.0, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 50.0)
+
+
+def _normalize(title: str) -> str:
+    return " ".join((title or "").lower().split())
+
+
+def featurize(title: str, bits: int = HASH_BITS) -> np.ndarray:
+    """标题 → 去重后的哈希特征下标"""
+    text = f"\x02{_normalize(title)}\x03"
+    mask = (1 << bits) - 1
+    feats = {
+        zlib.crc32(text[i:i + n].encode("utf-8")) & mask
+        for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1)
+        for i in range(len(text) - n + 1)
+    }
+    return np.fromiter(feats, dtype=np.int64, count=len(feats))
+
+
+def _featurize_all(titles: list[str], bits: int) -> tuple[np.ndarray, np.ndarray]:
+    """批量特征：返回 (拼接后的下标, 每条的起始偏移)"""
+    parts = [featurize(t, bits) for t in titles]
+    lengths = np.fromiter((len(p) for p in parts), dtype=np.int64, count=len(parts))
+    offsets = np.zeros(len(parts), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    flat = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+    return flat, offsets
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+@dataclass
+class SectionModel:
+    labels: list[str]
+    log_prior: np.ndarray            # (C,)
+    log_prob: np.ndarray             # (C, 2**bits) float32
+    bits: int = HASH_BITS
+    temperature: float = 1.0
+    threshold: float = 1.01          # 未校准时不放行任何条目
+    meta: dict = field(default_factory=dict)
+
+    # ─────────────────────────────────────
+    # 训练 / 预测
+    # ─────────────────────────────────────
+    @classmethod
+    def fit(cls, titles: list[str], labels: list[str], bits: int = HASH_BITS) -> "SectionModel":
+        names = sorted(set(labels))
+        index = {name: i for i, name in enumerate(names)}
+        y = np.array([index[l] for l in labels], dtype=np.int64)
+        flat, offsets = _featurize_all(titles, bits)
+        rows = np.repeat(y, np.diff(np.append(offsets, len(flat))))
+
+        counts = np.zeros((len(names), 1 << bits), dtype=np.float64)
+        np.add.at(counts, (rows, flat), 1.0)
+        totals = counts.sum(axis=1, keepdims=True)
+        log_prob = (np.log(counts + ALPHA) - np.log(totals + ALPHA * (1 << bits))).astype(np.float32)
+        log_prior = np.log(np.bincount(y, minlength=len(names)) / len(y))
+        return cls(labels=names, log_prior=log_prior, log_prob=log_prob, bits=bits)
+
+    def _scores(self, titles: list[str]) -> np.ndarray:
+        flat, offsets = _featurize_all(titles, self.bits)
+        if len(flat) == 0:
+            return np.tile(self.log_prior, (len(titles), 1))
+        gathered = self.log_prob[:, flat].astype(np.float64)                     # (C, 特征总数)
+        sums = np.add.reduceat(gathered, np.minimum(offsets, len(flat) - 1), axis=1).T
+        # 没有任何特征的空标题：reduceat 会取到下一条的值，置零
+        empty = np.diff(np.append(offsets, len(flat))) == 0
+        sums[empty] = 0.0
+        return sums + self.log_prior
+
+    def predict_proba(self, titles: list[str]) -> np.ndarray:
+        """(N, C) 校准后的类别概率"""
+        if not titles:
+            return np.zeros((0, len(self.labels)))
+        return _softmax(self._scores(titles) / self.temperature)
+
+    def predict(self, titles: list[str]) -> list[tuple[str, float]]:
+        probs = self.predict_proba(titles)
+        best = probs.argmax(axis=1)
+        return [(self.labels[b], float(probs[i, b])) for i, b in enumerate(best)]
+
+    # ─────────────────────────────────────
+    # 校准
+    # ─────────────────────────────────────
+    def calibrate(self, titles: list[str], labels: list[str], target_acc: float = TARGET_ACC) -> dict:
+        """在留出集上选温度（最小化负对数似然）与放行阈值，返回评估指标"""
+        index = {name: i for i, name in enumerate(self.labels)}
+        keep = [i for i, l in enumerate(labels) if l in index]
+        titles = [titles[i] for i in keep]
+        y = np.array([index[labels[i]] for i in keep], dtype=np.int64)
+        if len(y) == 0:
+            return {"holdout": 0}
+
+        scores = self._scores(titles)
+        best_t, best_nll = 1.0, float("inf")
+        for t in _TEMPERATURES:
+            probs = _softmax(scores / t)
+            nll = -np.log(probs[np.arange(len(y)), y] + 1e-12).mean()
+            if nll < best_nll:
+                best_t, best_nll = t, nll
+        self.temperature = best_t
+
+        probs = _softmax(scores / best_t)
+        pred = probs.argmax(axis=1)
+        conf = probs[np.arange(len(y)), pred]
+        correct = pred == y
+
+        # 置信度从高到低累计，找到累计准确率仍不低于目标的最深位置
+        order = np.argsort(-conf)
+        cum_acc = np.cumsum(correct[order]) / np.arange(1, len(y) + 1)
+        ok = np.nonzero(cum_acc >= target_acc)[0]
+        if len(ok):
+            cut = ok[-1]
+            self.threshold = float(conf[order[cut]])
+            covered = int(cut) + 1
+            covered_acc = float(cum_acc[cut])
+        else:
+            self.threshold, covered, covered_acc = 1.01, 0, 0.0
+
+        per_section = {}
+        for i, name in enumerate(self.labels):
+            mask = y == i
+            if mask.any():
+                per_section[name] = {"n": int(mask.sum()), "accuracy": round(float(correct[mask].mean()), 4)}
+        return {
+            "holdout": int(len(y)),
+            "accuracy": round(float(correct.mean()), 4),
+            "temperature": best_t,
+            "threshold": round(self.threshold, 4),
+            "target_accuracy": target_acc,
+            "coverage": round(covered / len(y), 4),
+            "covered_accuracy": round(covered_acc, 4),
+            "per_section": per_section,
+        }
+
+    # ─────────────────────────────────────
+    # 持久化
+    # ─────────────────────────────────────
+    def save(self, path: str = MODEL_PATH):
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp,
+            labels=np.array(self.labels),
+            log_prior=self.log_prior,
+            log_prob=self.log_prob,
+            params=np.array([self.bits, self.temperature, self.threshold], dtype=np.float64),
+            meta=np.array(json.dumps(self.meta, ensure_ascii=False)),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "SectionModel":
+        with np.load(path, allow_pickle=False) as data:
+            bits, temperature, threshold = data["params"].tolist()
+            return cls(
+                labels=[str(l) for l in data["labels"]],
+                log_prior=data["log_prior"],
+                log_prob=data["log_prob"],
+                bits=int(bits),
+                temperature=float(temperature),
+                threshold=float(threshold),
+                meta=json.loads(str(data["meta"])),
+            )
+
+
+# ─────────────────────────────────────────
+# 进程内单例
+# ─────────────────────────────────────────
+_model: SectionModel | None = None
+_model_mtime: float | None = None
+_lock = threading.Lock()
+
+
+def get_model() -> SectionModel | None:
+    """加载（或在模型文件更新后重新加载）本地模型；未启用或未训练时返回 None"""
+    global _model, _model_mtime
+    if not ENABLED:
+        return None
+    try:
+        mtime = os.path.getmtime(MODEL_PATH)
+    except OSError:
+        return None
+    with _lock:
+        if _model is None or _model_mtime != mtime:
+            try:
+                _model = SectionModel.load(MODEL_PATH)
+                _model_mtime = mtime
+            except Exception as e:
+                logger.warning(f"[Classifier] 加载本地模型失败: {e}")
+                _model = None
+        return _model
+
+
+def classify(items: list[tuple[int, str]]) -> tuple[dict[int, tuple[str, float]], list[tuple[int, str]]]:
+    """
+    本地模型先分一遍：返回 ({news_id: (section, confidence)} 达到阈值的条目, 需要送 AI 的条目)。
+    模型不可用时全部送 AI。
+    """
+    model = get_model()
+    if model is None or not items:
+        return {}, list(items)
+    predictions = model.predict([title for _, title in items])
+    accepted: dict[int, tuple[str, float]] = {}
+    escalate: list[tuple[int, str]] = []
+    for (nid, title), (section, conf) in zip(items, predictions):
+        if conf >= model.threshold:
+            accepted[nid] = (section, conf)
+        else:
+            escalate.append((nid, title))
+    return accepted, escalate
+
+
+# ─────────────────────────────────────────
+# 训练
+# ─────────────────────────────────────────
+def _load_labelled(db, days: int) -> list[tuple[str, str]]:
+    """按时间顺序取 AI 标注的 (标题, 维度)，同标题只保留最新一条"""
+    since = datetime.now() - timedelta(days=days)
+    rows = (
+        db.query(RawNews.title, RawNews.section)
+        .filter(RawNews.section_source == "llm", RawNews.section.isnot(None), RawNews.crawl_time >= since)
+        .order_by(RawNews.crawl_time.asc(), RawNews.id.asc())
+        .all()
+    )
+    latest: dict[str, str] = {}
+    for title, section in rows:
+        key = _normalize(title)
+        if key:
+            latest.pop(key, None)
+            latest[key] = section
+    return [(title, section) for title, section in latest.items()]
+
+
+def train(days: int = 90, holdout: float = 0.2, target_acc: float = TARGET_ACC,
+          path: str = MODEL_PATH) -> dict:
+    """
+    最近 days 天的 AI 标注数据：按时间取最新的 holdout 比例做留出集评估并校准温度与阈值，
+    再用全部数据重训（沿用校准结果）后保存。返回评估报告。
+    """
+    db = SessionLocal()
+    try:
+        samples = _load_labelled(db, days)
+    finally:
+        db.close()
+
+    if len(samples) < MIN_SAMPLES:
+        raise ValueError(f"AI 标注样本只有 {len(samples)} 条，少于 {MIN_SAMPLES} 条，暂不训练")
+
+    split = int(len(samples) * (1 - holdout))
+    train_set, test_set = samples[:split], samples[split:]
+    probe = SectionModel.fit([t for t, _ in train_set], [s for _, s in train_set])
+    report = probe.calibrate([t for t, _ in test_set], [s for _, s in test_set], target_acc)
+
+    model = SectionModel.fit([t for t, _ in samples], [s for _, s in samples])
+    model.temperature = probe.temperature
+    model.threshold = probe.threshold
+    report.update({"train": len(train_set), "samples": len(samples), "days": days,
+                   "trained_at": datetime.now().isoformat(timespec="seconds")})
+    model.meta = report
+    model.save(path)
+    logger.info(
+        f"[Classifier] 训练完成：样本 {len(samples)} 条，留出集准确率 {report.get('accuracy')}，"
+        f"阈值 {report.get('threshold')} 覆盖 {report.get('coverage')}"
+    )
+    return report
+
+
+def _print_report(report: dict):
+    print(f"样本 {report.get('samples', '-')} 条（训练 {report.get('train', '-')} / 留出 {report['holdout']}）")
+    print(f"留出集准确率      {report.get('accuracy', 0):.2%}")
+    print(f"温度 / 阈值       {report.get('temperature')} / {report.get('threshold')}")
+    print(f"阈值以上覆盖率    {report.get('coverage', 0):.2%}（准确率 {report.get('covered_accuracy', 0):.2%}，"
+          f"目标 {report.get('target_accuracy', 0):.0%}）")
+    print(f"{'section':<12}{'n':>6}{'accuracy':>10}")
+    for name, row in sorted(report.get("per_section", {}).items()):
+        print(f"{name:<12}{row['n']:>6}{row['accuracy']:>10.2%}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="本地维度分类模型")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_train = sub.add_parser("train", help="用 AI 标注数据重新训练并评估")
+    p_train.add_argument("--days", type=int, default=90)
+    p_train.add_argument("--holdout", type=float, default=0.2)
+    p_train.add_argument("--target-acc", type=float, default=TARGET_ACC)
+    sub.add_parser("report", help="查看当前模型的留出集评估")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        try:
+            report = train(args.days, args.holdout, args.target_acc)
+        except ValueError as e:
+            print(e)
+            return 1
+        _print_report(report)
+        return 0
+
+    model = get_model()
+    if model is None:
+        print(f"未找到本地模型：{MODEL_PATH}，先运行 python -m ai.classifier train")
+        return 1
+    print(f"模型训练于 {model.meta.get('trained_at', '-')}")
+    _print_report(model.meta)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+LLM 网关：所有模型调用（流水线、手动触发、ask-titan 并发用户）共用的限流与重试
+- 并发上限        LLM_MAX_CONCURRENCY 个请求同时在途
+- 令牌桶          LLM_RPM（请求/分钟）、LLM_TPM（token/分钟，按提示词估算 + 预留输出），0 表示不限
+- 退避重试        429 / 5xx / 连接错误按指数退避重试 LLM_MAX_RETRIES 次，优先采用 Retry-After；
+                  收到 429 时全局暂停，避免其他请求接着撞限流
+- 单飞合并        相同 (模型, 提示词, temperature) 的请求在途时，后来者直接等待同一个结果
+同步（线程）与异步（协程）调用共用同一套计数：获取配额是非阻塞的，拿不到时各自 sleep / await asyncio.sleep。
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Iterator, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+RPM             = int(os.getenv("LLM_RPM", "300"))
+TPM             = int(os.getenv("LLM_TPM", "200000"))
+MAX_RETRIES     = int(os.getenv("LLM_MAX_RETRIES", "4"))
+BACKOFF_BASE    = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))   # 秒
+BACKOFF_MAX     = float(os.getenv("LLM_BACKOFF_MAX", "30.0"))
+OUTPUT_RESERVE  = int(os.getenv("LLM_OUTPUT_TOKENS_RESERVE", "800"))  # TPM 中为回复预留的 token
+
+T = TypeVar("T")
+
+
+class LLMUnavailable(Exception):
+    """重试用尽后仍失败（限流 / 服务端错误 / 网络），或合并等待的上游请求被取消"""
+
+
+class _Bucket:
+    """按分钟速率连续补充的令牌桶，容量为一分钟的额度；rate<=0 表示不限"""
+
+    def __init__(self, per_minute: int):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        # 单个请求超过整桶容量时按满桶放行，避免永远等不到
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        if self.rate > 0:
+            self.tokens -= min(amount, self.capacity)
+
+
+def _retry_delay(error: Exception, attempt: int) -> float | None:
+    """可重试的错误返回等待秒数，不可重试返回 None"""
+    status = getattr(error, "status_code", None)
+    if isinstance(error, openai.APIStatusError):
+        if status != 429 and (status is None or status < 500):
+            return None
+    elif not isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return None
+
+    retry_after = None
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+    backoff = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))
+    delay = retry_after if retry_after is not None else backoff * (0.5 + random.random() / 2)
+    return min(delay, BACKOFF_MAX)
+
+
+class LLMGateway:
+    """并发 / 速率限制 + 退避重试 + 单飞合并；进程内共享的实例见 get_gateway()"""
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, rpm: int = RPM, tpm: int = TPM,
+                 max_retries: int = MAX_RETRIES):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._rpm = _Bucket(rpm)
+        self._tpm = _Bucket(tpm)
+        self._in_use = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._inflight: dict[str, concurrent.futures.Future] = {}
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "throttled": 0, "rate_limited": 0, "failed": 0}
+
+    # ─────────────────────────────────────
+    # 配额
+    # ─────────────────────────────────────
+    def _try_acquire(self, tokens: int) -> float:
+        """拿到一个并发位与 RPM/TPM 配额返回 0，否则返回建议等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._in_use >= self.max_concurrency:
+                return 0.05
+            wait = max(self._rpm.wait_time(1, now), self._tpm.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self._rpm.take(1)
+            self._tpm.take(tokens)
+            self._in_use += 1
+            return 0.0
+
+    def _release(self):
+        with self._lock:
+            self._in_use -= 1
+
+    def _acquire(self, tokens: int):
+        throttled = False
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            throttled = True
+            time.sleep(min(wait, 1.0))
+        if throttled:
+            self._count("throttled")
+
+    async def _aacquire(self, tokens: int):
+        throttled = False
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            throttled = True
+            await asyncio.sleep(min(wait, 1.0))
+        if throttled:
+            self._count("throttled")
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _on_error(self, error: Exception, attempt: int) -> float:
+        """记录一次失败并返回重试前的等待时间；不可重试或次数用尽时抛出"""
+        delay = _retry_delay(error, attempt)
+        if delay is None:
+            self._count("failed")
+            raise error
+        if getattr(error, "status_code", None) == 429:
+            with self._lock:
+                self.stats["rate_limited"] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        if attempt >= self.max_retries:
+            self._count("failed")
+            raise LLMUnavailable(f"重试 {self.max_retries} 次后仍失败: {error}") from error
+        self._count("retries")
+        logger.warning(f"[LLMGateway] 第 {attempt + 1} 次调用失败，{delay:.1f}s 后重试: {error}")
+        return delay
+
+    # ─────────────────────────────────────
+    # 单飞合并
+    # ─────────────────────────────────────
+    def _join(self, key: str | None) -> tuple[concurrent.futures.Future, bool]:
+        """返回 (结果 future, 是否由本调用负责请求上游)"""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        if key is None:
+            return future, True
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                self.stats["coalesced"] += 1
+                return existing, False
+            self._inflight[key] = future
+            return future, True
+
+    def _finish(self, key: str | None, future: concurrent.futures.Future,
+                result=None, error: BaseException | None = None):
+        if key is not None:
+            with self._lock:
+                self._inflight.pop(key, None)
+        # future 只由发起者完成；即便被意外取消，发起者自己的结果也不受影响
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    # ─────────────────────────────────────
+    # 调用入口
+    # ─────────────────────────────────────
+    def call(self, fn: Callable[[], T], tokens: int, key: str | None = None,
+             meta: dict | None = None) -> tuple[T, bool]:
+        """
+        同步调用 fn()（一次上游请求），tokens 为估算的提示词 token 数。
+        返回 (结果, 是否合并到了别人的在途请求)；meta 不为 None 时同样写入 meta["coalesced"]，
+        调用失败时调用方据此区分是自己请求上游失败还是等待的在途请求失败。
+        """
+        future, leader = self._join(key)
+        if meta is not None:
+            meta["coalesced"] = not leader
+        if not leader:
+            return future.result(), True
+        try:
+            result = self._call(fn, tokens)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result, False
+
+    def _call(self, fn: Callable[[], T], tokens: int) -> T:
+        for attempt in range(self.max_retries + 1):
+            self._acquire(tokens + OUTPUT_RESERVE)
+            try:
+                self._count("calls")
+                return fn()
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+            finally:
+                self._release()
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], tokens: int, key: str | None = None,
+                    meta: dict | None = None) -> tuple[T, bool]:
+        """异步版本：fn 返回协程"""
+        future, leader = self._join(key)
+        if meta is not None:
+            meta["coalesced"] = not leader
+        if not leader:
+            # shield：跟随者被取消（如 ask-titan 超时）时不能把取消传给共享的 future
+            shared = asyncio.wrap_future(future)
+            try:
+                return await asyncio.shield(shared), True
+            except asyncio.CancelledError:
+                shared.add_done_callback(lambda f: f.cancelled() or f.exception())  # 取走结果，避免未读异常告警
+                raise
+        try:
+            result = await self._acall(fn, tokens)
+        except asyncio.CancelledError:
+            # 发起者被取消（如 ask-titan 超时），等待同一结果的其他调用不能跟着收到取消
+            self._finish(key, future, error=LLMUnavailable("合并等待的上游请求已取消"))
+            raise
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result, False
+
+    async def _acall(self, fn: Callable[[], Awaitable[T]], tokens: int) -> T:
+        for attempt in range(self.max_retries + 1):
+            await self._aacquire(tokens + OUTPUT_RESERVE)
+            try:
+                self._count("calls")
+                return await fn()
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def stream(self, fn: Callable[[], Iterator[str]], tokens: int) -> Iterator[str]:
+        """流式调用：只在收到第一段内容之前重试，之后的错误直接抛给调用方；并发位在流结束后释放"""
+        for attempt in range(self.max_retries + 1):
+            self._acquire(tokens + OUTPUT_RESERVE)
+            started = False
+            try:
+                self._count("calls")
+                for delta in fn():
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                if started:
+                    self._count("failed")
+                    raise
+                delay = self._on_error(e, attempt)
+            finally:
+                self._release()
+            time.sleep(delay)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "in_use": self._in_use,
+                "inflight_keys": len(self._inflight),
+                "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 2)),
+            }
+
+
+_gateway = LLMGateway()
+
+
+def get_gateway() -> LLMGateway:
+    return _gateway
@@ -0,0 +1,309 @@
+"""
+大佬视角洞察（titan_insights）
+对简报排名靠前的新闻，按 (新闻, 大佬) 生成一句话观点、情绪分与相关度：
+- 批量生成    每次调用装入 INSIGHT_ITEMS_PER_CALL 条新闻 × INSIGHT_PERSONAS_PER_CALL 位大佬，回复 JSON，
+              逐对校验，缺失 / 不合格的对下一轮重试（重试跳过 LLM 缓存）
+- 按对缓存    titan_insights 上 (news_id, persona) 唯一，已有的对不再生成；fresh=True 时删掉重建
+- 批量入库    一批结果一次 INSERT，入库前再过滤一遍已存在的对（并发运行时不撞唯一索引）
+大佬设定取自 ai/personas.py 的思维模型要点，而不是整段系统提示词，控制每批提示词长度。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.personas import PERSONAS
+from ai.prompting import clean_title
+from database import SessionLocal
+from models import RawNews, TitanInsight
+
+logger = logging.getLogger(__name__)
+
+INSIGHT_ENABLED           = os.getenv("INSIGHT_ENABLED", "1") not in ("0", "false", "False")  # 流水线是否跑洞察这一步
+INSIGHT_PER_SECTION       = int(os.getenv("INSIGHT_PER_SECTION", "3"))        # 每个维度取排名前几的新闻
+INSIGHT_ITEMS_PER_CALL    = int(os.getenv("INSIGHT_ITEMS_PER_CALL", "6"))
+INSIGHT_PERSONAS_PER_CALL = int(os.getenv("INSIGHT_PERSONAS_PER_CALL", "4"))
+INSIGHT_WORKERS           = int(os.getenv("INSIGHT_WORKERS", "4"))
+INSIGHT_MAX_RETRIES       = int(os.getenv("INSIGHT_MAX_RETRIES", "1"))
+
+_INSIGHT_SYSTEM = "你是多位商业巨头的思维模拟器，能准确把握每个人的投资框架与表达风格，用JSON格式回复。"
+
+
+class InsightError(Exception):
+    """某一批的回复无法解析，可重试"""
+
+
+def persona_card(pid: str) -> str:
+    """大佬的一行简介：名字、标签与思维模型前两条要点（核心原则 / 关注维度）"""
+    p = PERSONAS[pid]
+    points = [
+        line.strip()[2:].split("：", 1)[-1]
+        for line in p["system_prompt"].splitlines()
+        if line.strip().startswith("- ")
+    ]
+    return f"{pid}（{p['name']}，{p['title']}）：{'；'.join(points[:2])}"
+
+
+def select_items(section_news: dict[str, list[dict]], per_section: int = INSIGHT_PER_SECTION) -> list[dict]:
+    """从排好序的各维度新闻中取前 per_section 条（见 ai/ranking.py）"""
+    items: list[dict] = []
+    seen: set[int] = set()
+    for sec, news in section_news.items():
+        for it in news[:per_section]:
+            if it["id"] not in seen:
+                seen.add(it["id"])
+                items.append({**it, "section": sec})
+    return items
+
+
+def _existing_pairs(db, news_ids: list[int]) -> set[tuple[int, str]]:
+    if not news_ids:
+        return set()
+    rows = (
+        db.query(TitanInsight.news_id, TitanInsight.persona)
+        .filter(TitanInsight.news_id.in_(news_ids))
+        .all()
+    )
+    return {(nid, pid) for nid, pid in rows}
+
+
+def plan_batches(
+    items: list[dict],
+    missing: dict[int, list[str]],
+    items_per_call: int = INSIGHT_ITEMS_PER_CALL,
+    personas_per_call: int = INSIGHT_PERSONAS_PER_CALL,
+) -> list[tuple[list[dict], list[str]]]:
+    """
+    把待生成的 (新闻, 大佬) 对切成批：缺的大佬相同的新闻归为一组，
+    组内按 personas_per_call 切大佬、按 items_per_call 切新闻，每批是一个完整的 新闻 × 大佬 矩阵。
+    """
+    groups: dict[tuple[str, ...], list[dict]] = {}
+    for it in items:
+        pids = tuple(missing.get(it["id"], ()))
+        if pids:
+            groups.setdefault(pids, []).append(it)
+
+    batches: list[tuple[list[dict], list[str]]] = []
+    for pids, group in groups.items():
+        for p in range(0, len(pids), personas_per_call):
+            for i in range(0, len(group), items_per_call):
+                batches.append((group[i:i + items_per_call], list(pids[p:p + personas_per_call])))
+    return batches
+
+
+def _build_prompt(items: list[dict], personas: list[str]) -> str:
+    persona_text = "\n".join(f"- {persona_card(pid)}" for pid in personas)
+    news_text = "\n".join(f"{it['id']} | {clean_title(it['title'])}" for it in items)
+    example = json.dumps(
+        {str(items[0]["id"]): {personas[0]: {"t": "观点", "s": 0.3, "r": 0.8}}},
+        ensure_ascii=False,
+    )
+    return f"""
+请分别以下面每位大佬的视角，对每条新闻给出观点。
+
+大佬（ID：设定）：
+{persona_text}
+
+新闻列表（格式：ID | 标题）：
+{news_text}
+
+对每条新闻、每位大佬给出：
+- t：第一人称一句话观点，60字以内，符合其思维模型与语气
+- s：情绪分，-1（明显利空）到 1（明显利好）
+- r：该新闻与这位大佬关注领域的相关度，0 到 1
+
+返回 JSON，键为新闻 ID，值为 {{大佬 ID: {{"t", "s", "r"}}}}，例如 {example}
+必须覆盖全部 {len(items)} 条新闻 × {len(personas)} 位大佬，只返回 JSON，不要有其他文字。
+"""
+
+
+def _clamp(value, low: float, high: float) -> float | None:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return min(high, max(low, value))
+
+
+def _validate(result: str, ids: set[int], personas: list[str]) -> dict[tuple[int, str], dict]:
+    """逐对校验回复；不在本批的新闻 / 大佬、观点为空的对丢弃，由调用方下一轮重试"""
+    start = result.find("{")
+    end   = result.rfind("}") + 1
+    if start == -1 or end == 0:
+        raise InsightError("回复中没有 JSON")
+    try:
+        data = json.loads(result[start:end])
+    except json.JSONDecodeError as e:
+        raise InsightError(f"JSON 解析失败: {e}") from e
+    if not isinstance(data, dict):
+        raise InsightError("JSON 顶层不是对象")
+
+    pairs: dict[tuple[int, str], dict] = {}
+    for nid, by_persona in data.items():
+        try:
+            nid = int(nid)
+        except (TypeError, ValueError):
+            continue
+        if nid not in ids or not isinstance(by_persona, dict):
+            continue
+        for pid, v in by_persona.items():
+            if pid not in personas or not isinstance(v, dict):
+                continue
+            text = str(v.get("t") or "").strip()
+            if not text:
+                continue
+            pairs[(nid, pid)] = {
+                "insight_text": text,
+                "sentiment_score": _clamp(v.get("s"), -1.0, 1.0),
+                "relevance_score": _clamp(v.get("r"), 0.0, 1.0),
+            }
+    if not pairs:
+        raise InsightError("回复未覆盖本批任何一对")
+    return pairs
+
+
+def _generate_batch(items: list[dict], personas: list[str], retry: bool = False) -> dict[tuple[int, str], dict]:
+    from ai.volcengine import chat
+
+    result = chat(
+        _INSIGHT_SYSTEM,
+        _build_prompt(items, personas),
+        temperature=0.5,
+        call_site="insight",
+        use_cache=not retry,
+    )
+    return _validate(result, {it["id"] for it in items}, personas)
+
+
+def store_insights(db, pairs: dict[tuple[int, str], dict]) -> int:
+    """批量写入，已存在的对跳过；返回新写入的条数"""
+    if not pairs:
+        return 0
+    for _ in range(2):
+        existing = _existing_pairs(db, sorted({nid for nid, _ in pairs}))
+        now = datetime.now()
+        rows = [
+            {"news_id": nid, "persona": pid, "created_at": now, **v}
+            for (nid, pid), v in pairs.items()
+            if (nid, pid) not in existing
+        ]
+        if not rows:
+            return 0
+        try:
+            db.execute(insert(TitanInsight), rows)
+            db.commit()
+            return len(rows)
+        except IntegrityError:
+            # 另一个运行刚写入了同样的对，重新过滤一次
+            db.rollback()
+    logger.warning("[Insight] 写入时反复撞唯一索引，放弃本批")
+    return 0
+
+
+def generate_insights(db, items: list[dict], personas: list[str] | None = None, fresh: bool = False) -> dict:
+    """
+    为 items（含 id / title）× personas 生成洞察并入库。
+    返回统计：pairs（应有的对数）/ cached（已存在跳过）/ generated / failed / calls
+    """
+    personas = [pid for pid in (personas or list(PERSONAS)) if pid in PERSONAS]
+    stats = {"items": len(items), "pairs": len(items) * len(personas), "cached": 0, "generated": 0,
+             "failed": 0, "calls": 0}
+    if not items or not personas:
+        return stats
+    from ai.volcengine import LLMNotConfigured
+
+    news_ids = [it["id"] for it in items]
+    if fresh:
+        db.query(TitanInsight).filter(
+            TitanInsight.news_id.in_(news_ids), TitanInsight.persona.in_(personas)
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    existing = _existing_pairs(db, news_ids)
+    missing = {it["id"]: [pid for pid in personas if (it["id"], pid) not in existing] for it in items}
+    stats["cached"] = stats["pairs"] - sum(len(v) for v in missing.values())
+
+    for attempt in range(INSIGHT_MAX_RETRIES + 1):
+        batches = plan_batches(items, missing)
+        if not batches:
+            break
+        logger.info(
+            f"[Insight] 第 {attempt + 1} 轮：{sum(len(v) for v in missing.values())} 对，切为 {len(batches)} 批"
+        )
+        stats["calls"] += len(batches)
+        with ThreadPoolExecutor(max_workers=min(INSIGHT_WORKERS, len(batches)), thread_name_prefix="insight") as pool:
+            futures = {pool.submit(_generate_batch, b_items, b_personas, attempt > 0): i
+                       for i, (b_items, b_personas) in enumerate(batches)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    pairs = future.result()
+                except LLMNotConfigured as e:
+                    logger.warning(f"[Insight] 洞察生成失败（可能 API 未配置）: {e}")
+                    stats["failed"] = sum(len(v) for v in missing.values())
+                    return stats
+                except Exception as e:
+                    logger.warning(f"[Insight] 第 {i + 1} 批生成失败（第 {attempt + 1} 轮）: {e}")
+                    continue
+                # 入库在主线程，一个 session 不跨线程
+                stats["generated"] += store_insights(db, pairs)
+                for nid, pid in pairs:
+                    if pid in missing.get(nid, ()):
+                        missing[nid].remove(pid)
+
+    stats["failed"] = sum(len(v) for v in missing.values())
+    if stats["failed"]:
+        logger.warning(f"[Insight] {stats['failed']} 对重试后仍未生成")
+    return stats
+
+
+def run_insights(target_date: date | None = None, personas: list[str] | None = None, fresh: bool = False) -> dict:
+    """单独运行：按当天排名选出新闻并生成洞察（流水线之外的手动 / 补跑入口）"""
+    from ai.ranking import WINDOW_HOURS, rank_section_news
+
+    if target_date is None:
+        target_date = date.today()
+    since = datetime.combine(target_date, datetime.min.time()) - timedelta(hours=6)
+    db = SessionLocal()
+    try:
+        section_news = rank_section_news(db, since, now=min(datetime.now(), since + timedelta(hours=WINDOW_HOURS)))
+        return generate_insights(db, select_items(section_news), personas=personas, fresh=fresh)
+    finally:
+        db.close()
+
+
+def insight_to_dict(row: TitanInsight, news: RawNews | None = None) -> dict:
+    persona = PERSONAS.get(row.persona, {})
+    d = {
+        "id":              row.id,
+        "news_id":         row.news_id,
+        "persona":         row.persona,
+        "persona_name":    persona.get("name"),
+        "insight":         row.insight_text,
+        "sentiment_score": row.sentiment_score,
+        "relevance_score": row.relevance_score,
+        "created_at":      row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else None,
+    }
+    if news is not None:
+        d.update({
+            "title":    news.title,
+            "url":      news.url,
+            "platform": news.source_platform,
+            "section":  news.section,
+        })
+    return d
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    d = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today()
+    print(run_insights(d))
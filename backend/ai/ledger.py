@@ -0,0 +1,222 @@
+"""
+LLM 调用台账
+每次 chat / achat / chat_stream 写一行 llm_calls：调用点、模型、来源（api / cache / coalesced）、
+prompt / completion token、耗时（流式另记首段耗时）与错误。
+查询侧按天、按调用点汇总 token 与费用，按调用点给出耗时分位数，用来衡量提示词瘦身、缓存等优化的效果。
+台账写入失败只记日志，不影响模型调用。
+"""
+from __future__ import annotations
+
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from crawlers.telemetry import percentile
+from database import SessionLocal
+from models import LLMCall
+
+logger = logging.getLogger(__name__)
+
+# 单价（元 / 千 tokens），默认豆包 pro 32k 公开价，按实际接入的模型在 .env 覆盖
+PRICE_INPUT_PER_1K  = float(os.getenv("LLM_PRICE_INPUT_PER_1K", "0.0008"))
+PRICE_OUTPUT_PER_1K = float(os.getenv("LLM_PRICE_OUTPUT_PER_1K", "0.002"))
+
+
+def cost_of(prompt_tokens: int, completion_tokens: int) -> float:
+    return prompt_tokens / 1000 * PRICE_INPUT_PER_1K + completion_tokens / 1000 * PRICE_OUTPUT_PER_1K
+
+
+def record_call(
+    call_site: str,
+    model: str,
+    source: str,
+    latency_ms: float,
+    prompt_tokens: int | None = None,
+    completion_tokens: int | None = None,
+    estimated: bool = False,
+    stream: bool = False,
+    first_token_ms: float | None = None,
+    error: BaseException | None = None,
+):
+    db = SessionLocal()
+    try:
+        db.add(LLMCall(
+            created_at=datetime.now(),
+            call_site=call_site,
+            model=model,
+            source=source,
+            stream=int(stream),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_estimated=int(estimated),
+            latency_ms=latency_ms,
+            first_token_ms=first_token_ms,
+            error_class=type(error).__name__ if error is not None else None,
+            error=str(error)[:500] if error is not None else None,
+        ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[LLMLedger] 写入调用记录失败: {e}")
+    finally:
+        db.close()
+
+
+def _fmt(d: datetime | None) -> str | None:
+    return d.strftime("%Y-%m-%d %H:%M:%S") if d else None
+
+
+def _round(v: float | None) -> float | None:
+    return round(v, 1) if v is not None else None
+
+
+def call_to_dict(row: LLMCall) -> dict:
+    return {
+        "id":                row.id,
+        "created_at":        _fmt(row.created_at),
+        "call_site":         row.call_site,
+        "model":             row.model,
+        "source":            row.source,
+        "stream":            bool(row.stream),
+        "prompt_tokens":     row.prompt_tokens,
+        "completion_tokens": row.completion_tokens,
+        "tokens_estimated":  bool(row.tokens_estimated),
+        "latency_ms":        _round(row.latency_ms),
+        "first_token_ms":    _round(row.first_token_ms),
+        "error_class":       row.error_class,
+        "error":             row.error,
+    }
+
+
+def list_calls(limit: int = 50, call_site: str | None = None, errors_only: bool = False) -> list[dict]:
+    db = SessionLocal()
+    try:
+        q = db.query(LLMCall)
+        if call_site:
+            q = q.filter(LLMCall.call_site == call_site)
+        if errors_only:
+            q = q.filter(LLMCall.error_class.isnot(None))
+        return [call_to_dict(r) for r in q.order_by(LLMCall.id.desc()).limit(limit)]
+    finally:
+        db.close()
+
+
+def usage_summary(days: int = 7, call_site: str | None = None) -> list[dict]:
+    """
+    按天、按调用点汇总：调用次数（实际请求 / 命中缓存 / 合并）、错误数、
+    实际消耗的 token 与费用（只算 source=api），以及缓存 / 合并省下的 token 与费用。
+    失败且没有产出的调用（4xx 拒绝、重试用尽、合并等待的请求失败）只计次数与错误数，
+    记下的提示词 token 是估算值，上游并未消耗，不计入消耗也不计入节省；流式中途出错前已有产出的照常计入。
+    """
+    since = datetime.now() - timedelta(days=days)
+    db = SessionLocal()
+    try:
+        q = (
+            db.query(LLMCall.created_at, LLMCall.call_site, LLMCall.source,
+                     LLMCall.prompt_tokens, LLMCall.completion_tokens, LLMCall.error_class)
+            .filter(LLMCall.created_at >= since)
+        )
+        if call_site:
+            q = q.filter(LLMCall.call_site == call_site)
+        rows = q.all()
+    finally:
+        db.close()
+
+    groups: dict[tuple[str, str], dict] = {}
+    for created_at, site, source, prompt, completion, error_class in rows:
+        g = groups.setdefault((created_at.strftime("%Y-%m-%d"), site), {
+            "calls": 0, "api": 0, "cache": 0, "coalesced": 0, "errors": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "saved_prompt": 0, "saved_completion": 0,
+        })
+        g["calls"] += 1
+        g[source if source in ("api", "cache", "coalesced") else "api"] += 1
+        if error_class:
+            g["errors"] += 1
+            if not completion:
+                continue
+        if source == "api":
+            g["prompt_tokens"] += prompt or 0
+            g["completion_tokens"] += completion or 0
+        else:
+            g["saved_prompt"] += prompt or 0
+            g["saved_completion"] += completion or 0
+
+    summary = []
+    for (day, site), g in sorted(groups.items()):
+        summary.append({
+            "date":              day,
+            "call_site":         site,
+            "calls":             g["calls"],
+            "api_calls":         g["api"],
+            "cache_hits":        g["cache"],
+            "coalesced":         g["coalesced"],
+            "errors":            g["errors"],
+            "prompt_tokens":     g["prompt_tokens"],
+            "completion_tokens": g["completion_tokens"],
+            "cost":              round(cost_of(g["prompt_tokens"], g["completion_tokens"]), 4),
+            "saved_tokens":      g["saved_prompt"] + g["saved_completion"],
+            "saved_cost":        round(cost_of(g["saved_prompt"], g["saved_completion"]), 4),
+        })
+    return summary
+
+
+def usage_totals(days: int = 7) -> dict:
+    """整段时间合计，附带按调用点的拆分"""
+    rows = usage_summary(days)
+    keys = ("calls", "api_calls", "cache_hits", "coalesced", "errors",
+            "prompt_tokens", "completion_tokens", "cost", "saved_tokens", "saved_cost")
+    by_site: dict[str, dict] = defaultdict(lambda: dict.fromkeys(keys, 0))
+    for r in rows:
+        for k in keys:
+            by_site[r["call_site"]][k] += r[k]
+    total = dict.fromkeys(keys, 0)
+    for site in by_site.values():
+        for k in keys:
+            total[k] += site[k]
+    for d in (total, *by_site.values()):
+        d["cost"] = round(d["cost"], 4)
+        d["saved_cost"] = round(d["saved_cost"], 4)
+    return {"days": days, "total": total, "by_call_site": dict(sorted(by_site.items()))}
+
+
+def latency_stats(days: int = 7, call_site: str | None = None, stream: bool | None = None) -> list[dict]:
+    """按调用点统计实际请求上游（source=api、未报错）的耗时 p50 / p95 / p99，流式调用另给首段耗时"""
+    since = datetime.now() - timedelta(days=days)
+    db = SessionLocal()
+    try:
+        q = (
+            db.query(LLMCall.call_site, LLMCall.latency_ms, LLMCall.first_token_ms, LLMCall.completion_tokens)
+            .filter(LLMCall.created_at >= since, LLMCall.source == "api", LLMCall.error_class.is_(None))
+        )
+        if call_site:
+            q = q.filter(LLMCall.call_site == call_site)
+        if stream is not None:
+            q = q.filter(LLMCall.stream == int(stream))
+        rows = q.all()
+    finally:
+        db.close()
+
+    groups: dict[str, list[tuple]] = defaultdict(list)
+    for site, latency, first_token, completion in rows:
+        if latency is not None:
+            groups[site].append((latency, first_token, completion))
+
+    stats = []
+    for site, samples in sorted(groups.items()):
+        latencies = [s[0] for s in samples]
+        first_tokens = [s[1] for s in samples if s[1] is not None]
+        # 输出速度：completion token / 秒（整段耗时口径）
+        speeds = [s[2] / (s[0] / 1000) for s in samples if s[2] and s[0]]
+        stats.append({
+            "call_site":         site,
+            "calls":             len(samples),
+            "p50_ms":            _round(percentile(latencies, 50)),
+            "p95_ms":            _round(percentile(latencies, 95)),
+            "p99_ms":            _round(percentile(latencies, 99)),
+            "max_ms":            _round(max(latencies)),
+            "first_token_p50_ms": _round(percentile(first_tokens, 50)),
+            "first_token_p95_ms": _round(percentile(first_tokens, 95)),
+            "tokens_per_second_p50": _round(percentile(speeds, 50)),
+        })
+    return stats
@@ -1,8 +1,12 @@
 """
-三步 AI 流水线
-Step 1: 对今日 RawNews 进行维度分类（policy/global/market/tech/consumer/industry/vc/economy）
-Step 2: 每个维度挑选最相关的 3-5 条，生成巨头视角洞察
-Step 3: 合并成完整 Markdown 格式的每日决策简报，并写入 DailyReport 表
+四步 AI 流水线
+Step 1: 对尚未分类（status=0）的 RawNews 增量分类（policy/global/market/tech/consumer/industry/vc/economy），
+        本地模型置信度足够的直接采用，其余送 AI，结果存入 RawNews.section / section_confidence，重跑只处理新增部分
+Step 2: 对已分类的全部候选打分（新近度 / 来源权威度 / 热度 / 报道聚类 / 关键词），按维度、来源分层选出 top-k
+Step 3: 合并成完整 Markdown 格式的每日决策简报（流式生成，边生成边写入 DailyReport 表）
+Step 4: 对各维度排名靠前的新闻批量生成大佬视角洞察，存入 TitanInsight（见 ai/insights.py，已有的不重复生成）
+各步拆成 select / classify / rank / brief / persist / insights 阶段，产物按 (日期, 输入哈希) 存为检查点（见 ai/checkpoints.py），
+失败或进程被杀后重跑时从第一个失效的阶段继续，输入未变的阶段不再调用 LLM。
 """
 from __future__ import annotations
 
@@ -10,10 +14,23 @@ import json
 import logging
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import func, or_
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from ai.checkpoints import Checkpoints, digest
+from ai.classifier import classify as local_classify
+from ai.insights import INSIGHT_ENABLED, INSIGHT_PER_SECTION, generate_insights, select_items
+from ai.personas import PERSONAS
+from ai.prompting import BRIEF_MAX_PER_SECTION, BRIEF_PROMPT_TOKENS, clean_title, pack_sections, title_key
+from ai.ranking import WINDOW_HOURS, rank_section_news
+from ai.tokens import estimate_tokens
+from crawlers.keywords import get_matcher
 from database import SessionLocal
 from models import DailyReport, RawNews
 
@@ -55,14 +72,77 @@ TITAN_PERSPECTIVES = """
 """
 
 
-def _ai_classify(titles_text: str) -> dict[str, list[int]]:
-    """
-    Step 1: 调用 AI 将新闻列表分类到八大维度。
-    返回 {section: [news_id, ...]}
-    """
+CLASSIFY_CHUNK_TOKENS = int(os.getenv("CLASSIFY_CHUNK_TOKENS", "1500"))  # 每批标题部分的 token 上限
+CLASSIFY_CHUNK_ITEMS  = int(os.getenv("CLASSIFY_CHUNK_ITEMS", "60"))     # 每批条数上限（回复 JSON 也随条数变长）
+CLASSIFY_WORKERS      = int(os.getenv("CLASSIFY_WORKERS", "6"))
+CLASSIFY_MAX_RETRIES  = int(os.getenv("CLASSIFY_MAX_RETRIES", "2"))
+CLASSIFY_MAX_ATTEMPTS = int(os.getenv("CLASSIFY_MAX_ATTEMPTS", "3"))     # AI 连续几次运行都没覆盖的条目按规则结果定稿
+BRIEF_FLUSH_SECONDS   = float(os.getenv("BRIEF_FLUSH_SECONDS", "1.0"))      # 流式生成时部分简报落库的间隔
+
+# 进度回调：on_event(event, data)，见 run_pipeline
+PipelineListener = Callable[[str, dict], None]
+
+_CLASSIFY_SYSTEM = "你是专业的财经信息分类助手，用JSON格式回复。"
+
+
+class ClassificationError(Exception):
+    """某一批的 AI 回复无法解析或不符合格式，可重试"""
+
+
+def _chunk_items(items: list[tuple[int, str]]) -> list[list[tuple[int, str]]]:
+    """按 token 预算与条数上限切分，保持原顺序"""
+    chunks: list[list[tuple[int, str]]] = []
+    current: list[tuple[int, str]] = []
+    budget = 0
+    for nid, title in items:
+        cost = estimate_tokens(f"{nid} | {clean_title(title)}") + 1
+        if current and (budget + cost > CLASSIFY_CHUNK_TOKENS or len(current) >= CLASSIFY_CHUNK_ITEMS):
+            chunks.append(current)
+            current, budget = [], 0
+        current.append((nid, title))
+        budget += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _validate_classification(result: str, ids: set[int]) -> dict[int, str]:
+    """校验一批的回复：必须是 {维度: [ID, ...]} 形式，未知维度 / 不在本批的 ID 丢弃"""
+    start = result.find("{")
+    end   = result.rfind("}") + 1
+    if start == -1 or end == 0:
+        raise ClassificationError("回复中没有 JSON")
     try:
-        from ai.volcengine import chat
-        prompt = f"""
+        data = json.loads(result[start:end])
+    except json.JSONDecodeError as e:
+        raise ClassificationError(f"JSON 解析失败: {e}") from e
+    if not isinstance(data, dict):
+        raise ClassificationError("JSON 顶层不是对象")
+
+    by_id: dict[int, str] = {}
+    for sec, sec_ids in data.items():
+        if sec not in SECTIONS:
+            continue
+        if not isinstance(sec_ids, list):
+            raise ClassificationError(f"维度 {sec} 的值不是数组")
+        for nid in sec_ids:
+            try:
+                nid = int(nid)
+            except (TypeError, ValueError):
+                continue
+            if nid in ids:
+                by_id.setdefault(nid, sec)
+    if ids and not by_id:
+        raise ClassificationError("回复未覆盖本批任何一条新闻")
+    return by_id
+
+
+def _ai_classify_chunk(chunk: list[tuple[int, str]], retry: bool = False) -> dict[int, str]:
+    """分类一批；重试时跳过缓存（缓存里可能正是那次不合格的回复）"""
+    from ai.volcengine import chat
+
+    titles_text = "\n".join(f"{nid} | {clean_title(title)}" for nid, title in chunk)
+    prompt = f"""
 你是一个专业的财经信息分类助手。请将下面的新闻列表分类到对应的维度中。
 
 维度说明：
@@ -74,35 +154,105 @@ def _ai_classify(titles_text: str) -> dict[str, list[int]]:
 请返回 JSON，格式为 {{"policy": [id1, id2, ...], "global": [...], ...}}
 只返回 JSON，不要有其他文字。如果某维度无对应新闻，值为空数组。
 """
-        result = chat("你是专业的财经信息分类助手，用JSON格式回复。", prompt, temperature=0.2)
-        # 提取 JSON 部分
-        start = result.find('{')
-        end   = result.rfind('}') + 1
-        if start == -1 or end == 0:
-            logger.warning("AI 分类未返回有效 JSON，fallback 到空分类")
-            return {k: [] for k in SECTIONS}
-        return json.loads(result[start:end])
-    except Exception as e:
-        logger.warning(f"AI 分类失败（可能 API 未配置）: {e}")
-        return {k: [] for k in SECTIONS}
+    result = chat(_CLASSIFY_SYSTEM, prompt, temperature=0.2, call_site="classify", use_cache=not retry)
+    return _validate_classification(result, {nid for nid, _ in chunk})
 
 
-def _ai_generate_brief(section_news: dict[str, list[dict]]) -> tuple[str, int, int]:
+def _ai_classify(items: list[tuple[int, str]]) -> tuple[dict[int, str], bool]:
+    """
+    Step 1: 调用 AI 将新闻分类到八大维度。
+    按 token 预算切批、线程池并发，每批单独校验 JSON，只重试失败的批次。
+    返回 ({news_id: section}, AI 是否有过回复)；AI 未配置或始终失败的条目不在结果中，由调用方兜底。
+    回复不合格也算有回复，请求失败 / 未配置不算。
+    """
+    if not items:
+        return {}, False
+    from ai.volcengine import LLMNotConfigured
+
+    # 归一化后标题相同的只送一次，结果回写给所有同标题条目
+    groups: dict[str, list[int]] = {}
+    unique: list[tuple[int, str]] = []
+    for nid, title in items:
+        key = title_key(title) or f"id:{nid}"
+        if key not in groups:
+            groups[key] = []
+            unique.append((nid, title))
+        groups[key].append(nid)
+    if len(unique) < len(items):
+        logger.info(f"[Pipeline] 标题去重：{len(items)} 条 → {len(unique)} 条")
+    items = unique
+
+    chunks = _chunk_items(items)
+    merged: dict[int, str] = {}
+    replied = False
+    todo = list(range(len(chunks)))
+    logger.info(f"[Pipeline] 分类 {len(items)} 条，切为 {len(chunks)} 批，并发 {min(CLASSIFY_WORKERS, len(chunks))}")
+
+    for attempt in range(CLASSIFY_MAX_RETRIES + 1):
+        failed: list[int] = []
+        with ThreadPoolExecutor(max_workers=min(CLASSIFY_WORKERS, len(todo)), thread_name_prefix="classify") as pool:
+            futures = {pool.submit(_ai_classify_chunk, chunks[i], attempt > 0): i for i in todo}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    merged.update(future.result())
+                    replied = True
+                except ClassificationError as e:
+                    replied = True
+                    logger.warning(f"[Pipeline] 第 {i + 1} 批分类回复不合格（第 {attempt + 1} 次）: {e}")
+                    failed.append(i)
+                except LLMNotConfigured as e:
+                    # API Key / 模型 ID 未配置：重试没有意义
+                    logger.warning(f"AI 分类失败（可能 API 未配置）: {e}")
+                    return _expand(merged, groups), replied
+                except Exception as e:
+                    logger.warning(f"[Pipeline] 第 {i + 1} 批分类请求失败（第 {attempt + 1} 次）: {e}")
+                    failed.append(i)
+        if not failed:
+            break
+        todo = sorted(failed)
+
+    if failed:
+        logger.warning(f"[Pipeline] {len(failed)} 批重试后仍失败，共 {sum(len(chunks[i]) for i in failed)} 条交给规则兜底")
+    return _expand(merged, groups), replied
+
+
+def _expand(by_id: dict[int, str], groups: dict[str, list[int]]) -> dict[int, str]:
+    """把代表条目的分类结果回写给同组的所有条目"""
+    result: dict[int, str] = {}
+    for ids in groups.values():
+        section = by_id.get(ids[0])
+        if section:
+            result.update(dict.fromkeys(ids, section))
+    return result
+
+
+def _render_brief_header(sec: str) -> str:
+    return f"\n\n### {SECTION_TITLES.get(sec, sec)}\n"
+
+
+def _render_brief_item(it: dict) -> str:
+    return f"- {it['title']}\n"
+
+
+def _ai_generate_brief(
+    section_news: dict[str, list[dict]],
+    on_delta: Callable[[str], None] | None = None,
+) -> tuple[str, int, int, bool]:
     """
-    Step 3: 生成完整 Markdown 简报。
-    返回 (markdown, macro_score, tech_score)
+    Step 3: 生成完整 Markdown 简报（流式），每收到一段回复调用一次 on_delta。
+    返回 (markdown, macro_score, tech_score, 是否由 AI 生成)；AI 失败时返回规则汇总的兜底简报
     """
     try:
-        from ai.volcengine import chat
-
-        sections_text = ""
-        for sec, items in section_news.items():
-            if not items:
-                continue
-            title = SECTION_TITLES.get(sec, sec)
-            sections_text += f"\n\n### {title}\n"
-            for it in items[:20]:
-                sections_text += f"- {it['title']}\n"
+        from ai.volcengine import chat_stream
+
+        # 按 token 预算装入各维度新闻（去前缀、去重，装不下的按名次从后往前丢）；
+        # 估算与拼接用同一套渲染函数，估出来的就是实际发出去的
+        packed = pack_sections(section_news, render_header=_render_brief_header, render_item=_render_brief_item)
+        sections_text = "".join(
+            _render_brief_header(sec) + "".join(_render_brief_item(it) for it in items)
+            for sec, items in packed.sections.items()
+        )
 
         prompt = f"""
 你是一位顶级商业决策顾问，请根据今日情报生成每日晨间决策简报。
@@ -123,11 +273,17 @@ def _ai_generate_brief(section_news: dict[str, list[dict]]) -> tuple[str, int, i
 
 保持专业、简洁，面向企业家和投资人。
 """
-        result = chat(
+        chunks: list[str] = []
+        for delta in chat_stream(
             "你是顶级商业决策顾问，生成专业的投资决策简报。",
             prompt,
             temperature=0.6,
-        )
+            call_site="brief",
+        ):
+            chunks.append(delta)
+            if on_delta:
+                on_delta(delta)
+        result = "".join(chunks)
 
         # 提取评分
         macro_score, tech_score = 70, 70
@@ -142,7 +298,7 @@ def _ai_generate_brief(section_news: dict[str, list[dict]]) -> tuple[str, int, i
                 result = result.replace(line, "").strip()
                 break
 
-        return result, macro_score, tech_score
+        return result, macro_score, tech_score, True
 
     except Exception as e:
         logger.warning(f"AI 生成简报失败: {e}")
@@ -157,126 +313,409 @@ def _ai_generate_brief(section_news: dict[str, list[dict]]) -> tuple[str, int, i
                 sections_md += f"- [{it['title']}]({it.get('url', '#')})\n"
 
         md = f"# 每日晨间决策简报\n\n> ⚠️ AI 简报生成失败（API 未配置），以下为原始情报汇总\n\n{sections_md}"
-        return md, 70, 70
+        return md, 70, 70, False
+
+
+# 分类置信度：AI 分类统一给 LLM_CONFIDENCE，规则兜底按依据强弱递减
+LLM_CONFIDENCE = 0.9
+RULE_CONFIDENCE = {"keyword": 0.6, "tag": 0.5, "platform": 0.3}
+
+PLATFORM_SECTION_MAP = {
+    "gov":   "policy", "ndrc": "policy", "stats": "economy",
+    "xinhua": "global", "reuters": "global", "sina": "market",
+    "stcn": "market", "caixin": "market", "36kr": "vc",
+    "hackernews": "tech", "weibo": "consumer", "baidu": "consumer",
+}
+
+
+def _story_key(n: RawNews) -> str:
+    return n.story_id or f"id:{n.id}"
+
+
+def _rule_classify(n: RawNews) -> tuple[str, float]:
+    """规则分类，优先级：标题关键词命中最多的维度 > 爬虫写入的维度标签 > 来源平台"""
+    hits = get_matcher().sections(n.title)
+    if hits:
+        return hits[0], RULE_CONFIDENCE["keyword"]
+    tags = n.tags if isinstance(n.tags, list) else []
+    tagged = next((t for t in tags if t in SECTIONS), None)
+    if tagged:
+        return tagged, RULE_CONFIDENCE["tag"]
+    return PLATFORM_SECTION_MAP.get(n.source_platform, "global"), RULE_CONFIDENCE["platform"]
+
+
+def _assign_section(n: RawNews, section: str, confidence: float, source: str):
+    n.section = section
+    n.section_confidence = confidence
+    n.section_source = source
+    # 规则兜底不算处理完成，AI 可用后的下一次运行会重新分类（超过 CLASSIFY_MAX_ATTEMPTS 次的由调用方定稿）
+    n.status = 1 if source != "rule" else 0
+    tags = list(n.tags) if n.tags else []
+    if section not in tags:
+        tags = [section] + tags
+    n.tags = tags[:5]
+
+
+def _classify_pending(db, since: datetime) -> dict[str, int]:
+    """
+    增量分类简报时间窗（见 _window）内 status=0 的新闻：
+    1. 所属故事已有分类结果的，直接继承
+    2. 其余按故事归并，每个故事取最新一条，先过本地模型（ai/classifier.py），置信度不足的才送 AI，
+       结果回写到故事内所有条目
+    3. AI 未覆盖的条目按规则兜底（status 保持 0）；AI 有回复却漏掉该条的情况累计 CLASSIFY_MAX_ATTEMPTS 次后
+       按规则结果定稿（status=1，section_source 仍为 rule），不再每次运行都送 AI
+    """
+    stats = {"pending": 0, "local": 0, "llm": 0, "story": 0, "rule": 0, "rule_final": 0}
+    pending = (
+        db.query(RawNews)
+        .filter(*_window(since), or_(RawNews.status == 0, RawNews.status.is_(None)))
+        .order_by(RawNews.crawl_time.desc())
+        .all()
+    )
+    stats["pending"] = len(pending)
+    if not pending:
+        return stats
+
+    story_ids = list({n.story_id for n in pending if n.story_id})
+    known: dict[str, tuple[str, float]] = {}
+    for i in range(0, len(story_ids), 500):
+        for story_id, section, confidence in (
+            db.query(RawNews.story_id, RawNews.section, RawNews.section_confidence)
+            .filter(RawNews.story_id.in_(story_ids[i:i + 500]), RawNews.status == 1, RawNews.section.isnot(None))
+        ):
+            known.setdefault(story_id, (section, confidence or LLM_CONFIDENCE))
+
+    groups: dict[str, list[RawNews]] = {}
+    for n in pending:
+        if n.story_id in known:
+            section, confidence = known[n.story_id]
+            _assign_section(n, section, confidence, "story")
+            stats["story"] += 1
+        else:
+            groups.setdefault(_story_key(n), []).append(n)
+
+    if groups:
+        representatives = [members[0] for members in groups.values()]
+        if len(representatives) < sum(len(m) for m in groups.values()):
+            logger.info(f"[Pipeline] 近似重复归并：{sum(len(m) for m in groups.values())} 条 → {len(representatives)} 个故事")
+        logger.info(f"[Pipeline] Step 1: 对 {len(representatives)} 条新闻进行分类...")
+        local, escalate = local_classify([(n.id, n.title) for n in representatives])
+        if local:
+            logger.info(f"[Pipeline] 本地模型分类 {len(local)} 条，{len(escalate)} 条置信度不足送 AI")
+        # AI 本次有过回复才计入尝试次数；AI 未配置 / 请求全部失败时不消耗次数
+        by_id, ai_answered = _ai_classify(escalate)
+
+        for members in groups.values():
+            head = members[0].id
+            section = by_id.get(head)
+            for n in members:
+                if head in local:
+                    _assign_section(n, *local[head], "local")
+                    stats["local"] += 1
+                elif section:
+                    _assign_section(n, section, LLM_CONFIDENCE, "llm")
+                    stats["llm"] += 1
+                else:
+                    _assign_section(n, *_rule_classify(n), "rule")
+                    if ai_answered:
+                        n.classify_attempts = (n.classify_attempts or 0) + 1
+                    if (n.classify_attempts or 0) >= CLASSIFY_MAX_ATTEMPTS:
+                        n.status = 1
+                        stats["rule_final"] += 1
+                    else:
+                        stats["rule"] += 1
+        if stats["rule"]:
+            logger.info(f"[Pipeline] {stats['rule']} 条未获得 AI 分类，使用关键词 / 平台规则分类")
+        if stats["rule_final"]:
+            logger.info(f"[Pipeline] {stats['rule_final']} 条 AI 多次未覆盖，按规则分类定稿")
+
+    db.commit()
+    return stats
+
+
+def _window(since: datetime) -> tuple:
+    """简报时间窗的 crawl_time 条件，与 ai/ranking.py 的候选窗口一致（补跑历史日期时不混入之后抓到的新闻）"""
+    return RawNews.crawl_time >= since, RawNews.crawl_time < since + timedelta(hours=WINDOW_HOURS)
+
+
+def _section_counts(db, since: datetime) -> dict[str, int]:
+    rows = (
+        db.query(RawNews.section, func.count(RawNews.id))
+        .filter(*_window(since), RawNews.section.isnot(None))
+        .group_by(RawNews.section)
+        .all()
+    )
+    return {section: count for section, count in rows}
+
+
+class _PartialWriter:
+    """流式生成时定期把已生成的部分写入 DailyReport，连接断开或进程退出也不丢内容"""
+
+    def __init__(self, db, report: DailyReport, interval: float = BRIEF_FLUSH_SECONDS):
+        self.db = db
+        self.report = report
+        self.interval = interval
+        self.parts: list[str] = []
+        self._last = time.monotonic()
+
+    def append(self, delta: str):
+        self.parts.append(delta)
+        if time.monotonic() - self._last >= self.interval:
+            self.flush()
+
+    def flush(self):
+        self.report.summary_markdown = "".join(self.parts)
+        self.db.commit()
+        self._last = time.monotonic()
+
+
+def _emit(on_event: PipelineListener | None, event: str, data: dict):
+    if on_event is None:
+        return
+    try:
+        on_event(event, data)
+    except Exception as e:
+        logger.warning(f"[Pipeline] 事件回调异常（{event}）: {e}")
+
+
+# 简报提示词（_ai_generate_brief / TITAN_PERSPECTIVES）有实质修改时递增，让已有的 brief 检查点失效
+BRIEF_PROMPT_VERSION = 1
+
+EMPTY_BRIEF = "# 今日暂无情报\n\n请先运行爬虫：`python scheduler.py --once`"
+
+
+def _get_report(db, target_date: date) -> DailyReport | None:
+    return db.query(DailyReport).filter(DailyReport.report_date == target_date).first()
+
+
+def _stage_select(db, since: datetime) -> dict:
+    """时间窗内的全部新闻；ID 集合不变则分类阶段的输入不变"""
+    ids = [i for (i,) in db.query(RawNews.id).filter(*_window(since)).order_by(RawNews.id)]
+    pending = (
+        db.query(func.count(RawNews.id))
+        .filter(*_window(since), or_(RawNews.status == 0, RawNews.status.is_(None)))
+        .scalar()
+    )
+    return {"news": len(ids), "pending": pending, "digest": digest(ids)}
+
+
+def _stage_classify(db, since: datetime) -> dict:
+    stats = _classify_pending(db, since)
+    rows = (
+        db.query(RawNews.id, RawNews.section, RawNews.story_id)
+        .filter(*_window(since), RawNews.section.isnot(None))
+        .order_by(RawNews.id)
+        .all()
+    )
+    return {
+        "stats": stats,
+        "sections": _section_counts(db, since),
+        "digest": digest([list(r) for r in rows]),
+    }
+
+
+def _rank_config() -> list:
+    from ai import ranking
+
+    return [ranking.WEIGHTS, ranking.SOURCE_WEIGHTS, ranking.HALF_LIFE_HOURS, ranking.MAX_PER_SOURCE]
+
+
+def _stage_rank(db, since: datetime, now: datetime) -> dict:
+    section_news = rank_section_news(db, since, now=now)
+    return {
+        "sections": section_news,
+        "digest": digest({sec: [it["id"] for it in items] for sec, items in section_news.items()}),
+    }
+
+
+def _brief_config() -> list:
+    return [os.getenv("VOLCENGINE_MODEL_ID"), BRIEF_PROMPT_VERSION, TITAN_PERSPECTIVES,
+            BRIEF_PROMPT_TOKENS, BRIEF_MAX_PER_SECTION]
+
+
+def _stage_brief(db, target_date: date, section_news: dict[str, list[dict]],
+                 on_event: PipelineListener | None) -> dict:
+    if not section_news:
+        logger.warning(f"[Pipeline] {target_date} 无新闻，生成空简报")
+        return {"markdown": EMPTY_BRIEF, "macro_score": None, "tech_score": None, "ai": True,
+                "digest": digest(EMPTY_BRIEF)}
+
+    report = _get_report(db, target_date)
+    previous = report if report is not None and (report.status or "done") == "done" and report.summary_markdown else None
+    writer = None
+    if previous is None:
+        # 还没有完成的简报：先置为 generating，生成过程中的内容持续写入
+        if report is None:
+            report = DailyReport(report_date=target_date)
+            db.add(report)
+        report.summary_markdown = ""
+        report.status = "generating"
+        db.commit()
+        writer = _PartialWriter(db, report)
+    # 已有完成的简报：新内容只在内存里累积，由 persist 阶段整体替换，生成失败或中断都不影响已有简报
+
+    def on_delta(delta: str):
+        if writer is not None:
+            writer.append(delta)
+        _emit(on_event, "delta", {"text": delta})
+
+    summary_md, macro_score, tech_score, ok = _ai_generate_brief(section_news, on_delta=on_delta)
+    if not ok and previous is not None:
+        logger.warning(f"[Pipeline] {target_date} 简报重新生成失败，保留已有简报")
+        summary_md, macro_score, tech_score = previous.summary_markdown, previous.macro_score, previous.tech_score
+    return {"markdown": summary_md, "macro_score": macro_score, "tech_score": tech_score, "ai": ok,
+            "digest": digest(summary_md, macro_score, tech_score)}
+
+
+def _stage_persist(db, target_date: date, brief: dict) -> dict:
+    report = _get_report(db, target_date)
+    if report is None:
+        report = DailyReport(report_date=target_date)
+        db.add(report)
+    report.summary_markdown = brief["markdown"]
+    report.macro_score = brief["macro_score"]
+    report.tech_score = brief["tech_score"]
+    report.status = "done"
+    db.commit()
+    return {"report_id": report.id, "digest": brief["digest"]}
 
 
-def run_pipeline(target_date: date | None = None) -> DailyReport:
+def run_pipeline(target_date: date | None = None, on_event: PipelineListener | None = None,
+                 force: bool = False) -> DailyReport:
     """
-    执行完整的三步 AI 流水线，生成并保存 DailyReport。
-    如果当天简报已存在则先删除再重建。
+    执行完整的四步 AI 流水线，生成并保存 DailyReport。
+    分为 select → classify → rank → brief → persist → insights 六个阶段，每个阶段的产物存为检查点（见 ai/checkpoints.py）：
+    重跑时输入未变的阶段直接复用产物，从第一个失效的阶段继续；force=True 忽略检查点全部重跑。
+    当天简报已存在时原地更新，不再先删除。
+    on_event(event, data) 接收进度事件（供 /pipeline/stream 推送）：
+      step        {"step", "message", "stage", "skipped"}   每个阶段结束后发一次，skipped 表示该阶段复用了检查点
+      classified  {"stats", "sections", "skipped"}    Step 1 统计与各维度已分类条数
+      delta       {"text"}                 简报的一段新内容（复用检查点时整篇作为一段）
+      insights    {"items", "pairs", "cached", "generated", "failed", "calls"}   Step 4 统计
+      done        {"report_date", "macro_score", "tech_score", "markdown"}
     """
     if target_date is None:
         target_date = date.today()
 
     db = SessionLocal()
+    ckpt = Checkpoints(db, target_date, force=force)
     try:
-        # 删除已有简报（允许重跑）
-        existing = db.query(DailyReport).filter(DailyReport.report_date == target_date).first()
-        if existing:
-            db.delete(existing)
-            db.commit()
-
-        # 取最近24小时新闻
         since = datetime.combine(target_date, datetime.min.time()) - timedelta(hours=6)
-        news_items = (
-            db.query(RawNews)
-            .filter(RawNews.crawl_time >= since)
-            .order_by(RawNews.crawl_time.desc())
-            .limit(200)
-            .all()
-        )
 
-        if not news_items:
-            logger.warning(f"[Pipeline] {target_date} 无新闻，生成空简报")
-            report = DailyReport(
-                report_date=target_date,
-                summary_markdown="# 今日暂无情报\n\n请先运行爬虫：`python scheduler.py --once`",
-                macro_score=None,
-                tech_score=None,
+        # Step 1 只处理尚未分类的增量；时间窗内的新闻没变且上次分类完整时整个阶段跳过
+        selected, _ = ckpt.stage("select", digest(since), lambda: _stage_select(db, since), always=True)
+        classified, skipped = ckpt.stage(
+            "classify", selected["digest"], lambda: _stage_classify(db, since),
+            complete=lambda out: out["stats"]["rule"] == 0,   # 有规则兜底的条目时下次还要再试 AI
+        )
+        _emit(on_event, "step", {"step": 1, "message": "增量分类", "stage": "classify", "skipped": skipped})
+        stats = classified["stats"]
+        if not skipped:
+            logger.info(
+                f"[Pipeline] Step 1 完成：待分类 {stats['pending']} 条，本地模型 {stats['local']} 条，AI 分类 {stats['llm']} 条，"
+                f"同故事继承 {stats['story']} 条，规则兜底 {stats['rule']} 条，规则定稿 {stats['rule_final']} 条"
             )
-            db.add(report)
-            db.commit()
-            db.refresh(report)
-            return report
-
-        logger.info(f"[Pipeline] Step 1: 对 {len(news_items)} 条新闻进行分类...")
-        titles_text = "\n".join(f"{n.id} | {n.title}" for n in news_items)
-        classified   = _ai_classify(titles_text)
-
-        # 构建分类映射 {id: news_obj}
-        news_map = {n.id: n for n in news_items}
-
-        # 如果分类全为空（AI 未配置），按来源平台做简单映射
-        total_classified = sum(len(v) for v in classified.values())
-        if total_classified == 0:
-            logger.info("[Pipeline] 分类结果为空，使用平台规则分类")
-            PLATFORM_SECTION_MAP = {
-                "gov":   "policy", "ndrc": "policy", "stats": "economy",
-                "xinhua": "global", "reuters": "global", "sina": "market",
-                "stcn": "market", "caixin": "market", "36kr": "vc",
-                "hackernews": "tech", "weibo": "consumer", "baidu": "consumer",
-            }
-            for n in news_items:
-                sec = PLATFORM_SECTION_MAP.get(n.source_platform, "global")
-                classified.setdefault(sec, []).append(n.id)
-
-            # 用 tags 覆盖
-            for n in news_items:
-                if n.tags:
-                    for t in (n.tags if isinstance(n.tags, list) else []):
-                        if t in SECTIONS:
-                            for sec in classified.values():
-                                if n.id in sec:
-                                    sec.remove(n.id)
-                            classified.setdefault(t, []).append(n.id)
-                            break
-
-        # 更新 RawNews.tags 为分类结果
-        for sec, ids in classified.items():
-            for nid in ids:
-                n = news_map.get(nid)
-                if n:
-                    existing_tags = list(n.tags) if n.tags else []
-                    if sec not in existing_tags:
-                        existing_tags = [sec] + [t for t in existing_tags if t != sec]
-                    n.tags = existing_tags[:5]
-        db.commit()
+        _emit(on_event, "classified", {"stats": stats, "sections": classified["sections"], "skipped": skipped})
 
-        logger.info("[Pipeline] Step 2: 构建各维度新闻摘要...")
-        section_news: dict[str, list[dict]] = {}
-        for sec, ids in classified.items():
-            section_news[sec] = []
-            for nid in ids[:20]:
-                n = news_map.get(nid)
-                if n:
-                    section_news[sec].append({
-                        "id": n.id, "title": n.title,
-                        "url": n.url or "", "platform": n.source_platform,
-                    })
+        # 新近度以当天结束时刻计算（补跑历史日期时不会因为「太旧」而全部衰减）；
+        # 当天的 now 每次都不同，不计入 input_hash，否则排序阶段永远失效、简报每次都重新生成
+        now = min(datetime.now(), since + timedelta(hours=WINDOW_HOURS))
+        ranked, skipped = ckpt.stage(
+            "rank", digest(classified["digest"], _rank_config()), lambda: _stage_rank(db, since, now),
+        )
+        logger.info(f"[Pipeline] Step 2 完成：各维度候选排序{'（复用检查点）' if skipped else ''}")
+        _emit(on_event, "step", {"step": 2, "message": "构建各维度新闻摘要", "stage": "rank", "skipped": skipped})
+        section_news = ranked["sections"]
 
         logger.info("[Pipeline] Step 3: 生成 AI 简报...")
-        summary_md, macro_score, tech_score = _ai_generate_brief(section_news)
-
-        report = DailyReport(
-            report_date=target_date,
-            summary_markdown=summary_md,
-            macro_score=macro_score,
-            tech_score=tech_score,
+        brief_hash = digest(ranked["digest"], _brief_config())
+        brief, skipped = ckpt.stage(
+            "brief", brief_hash, lambda: _stage_brief(db, target_date, section_news, on_event),
+            complete=lambda out: out["ai"],                   # AI 失败走了兜底的简报下次重新生成
         )
-        db.add(report)
-        db.commit()
+        _emit(on_event, "step", {
+            "step": 3, "message": "简报输入未变，复用已生成的简报" if skipped else "生成 AI 简报",
+            "stage": "brief", "skipped": skipped,
+        })
+        if skipped:
+            _emit(on_event, "delta", {"text": brief["markdown"]})
+
+        report = _get_report(db, target_date)
+        ckpt.stage(
+            "persist", brief["digest"], lambda: _stage_persist(db, target_date, brief),
+            always=report is None or report.status != "done",
+        )
+        logger.info(f"[Pipeline] 简报生成完成，宏观={brief['macro_score']} 科技={brief['tech_score']}")
+
+        if section_news:
+            _insight_stage(db, ckpt, ranked, on_event)
+
+        ckpt.finish()
+        report = _get_report(db, target_date)
         db.refresh(report)
-        logger.info(f"[Pipeline] 简报生成完成，宏观={macro_score} 科技={tech_score}")
+        logger.info(f"[Pipeline] 各阶段：{ckpt.run.stages}")
+        _emit(on_event, "done", _report_payload(report))
         return report
 
+    except Exception as e:
+        db.rollback()
+        report = _get_report(db, target_date)
+        if report is not None and report.status == "generating":
+            try:
+                report.status = "failed"
+                db.commit()
+            except Exception:
+                db.rollback()
+        ckpt.finish(e)
+        raise
+
     finally:
         db.close()
 
 
+def _insight_stage(db, ckpt: Checkpoints, ranked: dict, on_event: PipelineListener | None):
+    """Step 4：简报已落库，洞察失败只记日志，不影响本次流水线结果"""
+    if not INSIGHT_ENABLED:
+        return
+    logger.info("[Pipeline] Step 4: 生成大佬视角洞察...")
+
+    def run() -> dict:
+        try:
+            return generate_insights(db, select_items(ranked["sections"]))
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[Pipeline] 洞察生成失败: {e}")
+            return {"error": str(e)}
+
+    stats, skipped = ckpt.stage(
+        "insights", digest(ranked["digest"], INSIGHT_PER_SECTION, sorted(PERSONAS)), run,
+        complete=lambda out: "error" not in out and out["failed"] == 0,
+    )
+    _emit(on_event, "step", {"step": 4, "message": "生成大佬视角洞察", "stage": "insights", "skipped": skipped})
+    if "error" in stats:
+        return
+    if not skipped:
+        logger.info(
+            f"[Pipeline] Step 4 完成：{stats['items']} 条新闻 {stats['pairs']} 对，已有 {stats['cached']} 对，"
+            f"新生成 {stats['generated']} 对，失败 {stats['failed']} 对，调用 {stats['calls']} 次"
+        )
+    _emit(on_event, "insights", stats)
+
+
+def _report_payload(report: DailyReport) -> dict:
+    return {
+        "report_date": str(report.report_date),
+        "macro_score": report.macro_score,
+        "tech_score": report.tech_score,
+        "markdown": report.summary_markdown or "",
+    }
+
+
 if __name__ == "__main__":
     import sys
     logging.basicConfig(level=logging.INFO)
-    d = date.fromisoformat(sys.argv[1]) if len(sys.argv) > 1 else date.today()
-    r = run_pipeline(d)
+    args = [a for a in sys.argv[1:] if a != "--force"]
+    d = date.fromisoformat(args[0]) if args else date.today()
+    r = run_pipeline(d, force="--force" in sys.argv)
     print(f"\n=== 简报生成完成 ===\n日期: {r.report_date}\n宏观评分: {r.macro_score}\n科技评分: {r.tech_score}")
     print(f"\n--- 简报预览 (前500字) ---\n{(r.summary_markdown or '')[:500]}...")
@@ -0,0 +1,117 @@
+"""
+提示词装配
+- clean_title    去掉「【微博热搜】」这类来源前缀、合并空白
+- title_key      去重键：NFKC 归一化（全角转半角）、小写、去掉标点空白
+- pack_sections  按 token 预算装入各维度新闻：按各维度内的排序轮流装入（先各维度第 1 名，再第 2 名……），
+                 直到预算用完；跨维度重复的标题只保留一次，丢弃的条目记日志
+token 数用 ai/tokens.py 粗估。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+from ai.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+BRIEF_PROMPT_TOKENS   = int(os.getenv("BRIEF_PROMPT_TOKENS", "3000"))   # 简报提示词中新闻部分的预算
+BRIEF_MAX_PER_SECTION = int(os.getenv("BRIEF_MAX_PER_SECTION", "20"))
+
+_PREFIX_RE = re.compile(r"^\s*(?:【[^】]{1,12}】|\[[^\]]{1,12}\])\s*")
+_KEY_STRIP_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def clean_title(title: str) -> str:
+    text = " ".join((title or "").split())
+    while True:
+        stripped = _PREFIX_RE.sub("", text, count=1)
+        if stripped == text:
+            break
+        text = stripped
+    return text or " ".join((title or "").split())
+
+
+def title_key(title: str) -> str:
+    return _KEY_STRIP_RE.sub("", unicodedata.normalize("NFKC", clean_title(title)).lower())
+
+
+@dataclass
+class PackResult:
+    sections: dict[str, list[dict]]
+    tokens: int = 0
+    dropped: dict[str, int] = field(default_factory=dict)      # 每个维度因预算丢弃的条数
+    duplicates: int = 0
+
+
+def pack_sections(
+    section_news: dict[str, list[dict]],
+    render_header,
+    render_item,
+    budget: int = BRIEF_PROMPT_TOKENS,
+    max_per_section: int = BRIEF_MAX_PER_SECTION,
+) -> PackResult:
+    """
+    section_news 中每个维度的条目应已按优先级排好（见 ai/ranking.py）。
+    render_header(section) / render_item(item) 返回该部分在提示词中的文本，用于估算 token。
+    条目的 title 会被替换为 clean_title 后的结果。
+    """
+    seen: set[str] = set()
+    queues: dict[str, list[dict]] = {}
+    duplicates = 0
+    for sec, items in section_news.items():
+        queue = []
+        for it in items[:max_per_section]:
+            # 归一化后为空的标题（纯标点 / 空白）无法判重，按 id 各自保留
+            key = title_key(it["title"]) or f"id:{it.get('id', id(it))}"
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            queue.append({**it, "title": clean_title(it["title"])})
+        if queue:
+            queues[sec] = queue
+
+    packed: dict[str, list[dict]] = {sec: [] for sec in queues}
+    used = 0
+
+    def try_add(sec: str) -> bool:
+        nonlocal used
+        item = queues[sec][len(packed[sec])]
+        cost = estimate_tokens(render_item(item))
+        if not packed[sec]:
+            cost += estimate_tokens(render_header(sec))
+        if used + cost > budget:
+            return False
+        packed[sec].append(item)
+        used += cost
+        return True
+
+    # 按名次轮流装入：先装各维度第 1 名，再装各维度第 2 名……某个维度装不下后不再给它加条目
+    full: set[str] = set()
+    depth = max((len(q) for q in queues.values()), default=0)
+    for rank in range(depth):
+        for sec, queue in queues.items():
+            if sec in full or rank >= len(queue):
+                continue
+            if not try_add(sec):
+                full.add(sec)
+
+    result = PackResult(
+        sections={sec: items for sec, items in packed.items() if items},
+        tokens=used,
+        dropped={sec: len(queues[sec]) - len(packed[sec]) for sec in queues if len(queues[sec]) > len(packed[sec])},
+        duplicates=duplicates,
+    )
+    if result.dropped or duplicates:
+        detail = "，".join(f"{sec} {n} 条" for sec, n in result.dropped.items()) or "无"
+        logger.info(
+            f"[Prompt] 新闻部分约 {used}/{budget} tokens，预算不足丢弃：{detail}；重复标题去掉 {duplicates} 条"
+        )
+        for sec, n in result.dropped.items():
+            for it in queues[sec][len(packed[sec]):]:
+                logger.debug(f"[Prompt] 丢弃 {sec}: {it['title']}")
+    return result
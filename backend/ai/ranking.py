@@ -0,0 +1,205 @@
+"""
+简报候选排序
+对时间窗内已分类的全部新闻计算特征并打分（NumPy 向量化），再按维度、按来源分层选出 top-k 送入简报：
+- recency    新近度，按半衰期 RANK_HALF_LIFE_HOURS 指数衰减
+- authority  来源权威度（SOURCE_WEIGHTS）
+- heat       热搜热度（从 content 的「热度：N」「热度值：N」解析），同平台内取 log 归一化
+- cluster    同一故事被多少条报道覆盖（story_id 聚类大小），log 归一化
+- keywords   标题命中所属维度关键词的个数（crawlers/keywords.py），3 个封顶
+- confidence 分类置信度（section_confidence）
+同一故事只保留得分最高的一条；每个维度内单一来源最多 RANK_MAX_PER_SOURCE 条，不足 k 条时再放宽来源限制补齐。
+"""
+from __future__ import annotations
+
+import math
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from crawlers.keywords import get_matcher
+from models import RawNews
+
+HALF_LIFE_HOURS = float(os.getenv("RANK_HALF_LIFE_HOURS", "12"))
+MAX_PER_SOURCE  = int(os.getenv("RANK_MAX_PER_SOURCE", "4"))
+WINDOW_HOURS    = 30   # 候选时间窗：since（简报日前一天 18:00）起 30 小时，即到简报日结束
+
+# 特征权重（各特征都已归一化到 0~1）
+WEIGHTS: dict[str, float] = {
+    "recency":    0.30,
+    "authority":  0.25,
+    "heat":       0.15,
+    "cluster":    0.15,
+    "keywords":   0.10,
+    "confidence": 0.05,
+}
+
+SOURCE_WEIGHTS: dict[str, float] = {
+    "gov": 1.0, "ndrc": 1.0, "stats": 1.0,
+    "xinhua": 0.9, "caixin": 0.85, "reuters": 0.85,
+    "stcn": 0.8, "sina": 0.7, "36kr": 0.7,
+    "hackernews": 0.6, "weibo": 0.5, "baidu": 0.5,
+}
+DEFAULT_SOURCE_WEIGHT = 0.6
+
+_HEAT_RE = re.compile(r"热度值?[：:]\s*(\d+)")
+
+
+@dataclass
+class Candidates:
+    """按列存放的候选集，每个数组长度相同"""
+    ids: np.ndarray
+    titles: list[str]
+    urls: list[str]
+    platforms: np.ndarray
+    sections: np.ndarray
+    stories: np.ndarray
+    timestamps: np.ndarray      # 发布时间（缺失时用抓取时间），epoch 秒
+    heat: np.ndarray
+    confidence: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def parse_heat(content: str | None) -> float:
+    m = _HEAT_RE.search(content or "")
+    return float(m.group(1)) if m else 0.0
+
+
+def load_candidates(db, since: datetime) -> Candidates:
+    rows = (
+        db.query(
+            RawNews.id, RawNews.title, RawNews.url, RawNews.source_platform, RawNews.section,
+            RawNews.story_id, RawNews.publish_time, RawNews.crawl_time, RawNews.content,
+            RawNews.section_confidence,
+        )
+        .filter(
+            RawNews.crawl_time >= since,
+            RawNews.crawl_time < since + timedelta(hours=WINDOW_HOURS),  # 补跑历史日期时不混入之后抓到的新闻
+            RawNews.section.isnot(None),
+        )
+        .all()
+    )
+    now = datetime.now()
+    return Candidates(
+        ids=np.array([r.id for r in rows], dtype=np.int64),
+        titles=[r.title for r in rows],
+        urls=[r.url or "" for r in rows],
+        platforms=np.array([r.source_platform or "" for r in rows], dtype=object),
+        sections=np.array([r.section for r in rows], dtype=object),
+        stories=np.array([r.story_id or f"id:{r.id}" for r in rows], dtype=object),
+        timestamps=np.array([(r.publish_time or r.crawl_time or now).timestamp() for r in rows], dtype=np.float64),
+        heat=np.array([parse_heat(r.content) for r in rows], dtype=np.float64),
+        confidence=np.array([r.section_confidence or 0.0 for r in rows], dtype=np.float64),
+    )
+
+
+def _log_norm(values: np.ndarray) -> np.ndarray:
+    top = values.max() if len(values) else 0.0
+    if top <= 0:
+        return np.zeros_like(values)
+    return np.log1p(values) / math.log1p(top)
+
+
+def features(c: Candidates, now: datetime | None = None) -> dict[str, np.ndarray]:
+    now_ts = (now or datetime.now()).timestamp()
+    age_hours = np.clip((now_ts - c.timestamps) / 3600, 0, None)
+    recency = np.exp(-age_hours * math.log(2) / HALF_LIFE_HOURS)
+
+    authority = np.array([SOURCE_WEIGHTS.get(p, DEFAULT_SOURCE_WEIGHT) for p in c.platforms], dtype=np.float64)
+
+    # 热度各平台口径不同，按平台分别归一化
+    heat = np.zeros(len(c), dtype=np.float64)
+    for platform in np.unique(c.platforms[c.heat > 0]) if len(c) else []:
+        mask = c.platforms == platform
+        heat[mask] = _log_norm(c.heat[mask])
+
+    _, inverse, counts = np.unique(c.stories, return_inverse=True, return_counts=True)
+    cluster = _log_norm((counts[inverse] - 1).astype(np.float64))
+
+    matcher = get_matcher()
+    keywords = np.array(
+        [sum(1 for hit in matcher.match(t) if hit.section == s) for t, s in zip(c.titles, c.sections)],
+        dtype=np.float64,
+    )
+    keywords = np.minimum(keywords, 3) / 3
+
+    return {
+        "recency": recency,
+        "authority": authority,
+        "heat": heat,
+        "cluster": cluster,
+        "keywords": keywords,
+        "confidence": np.clip(c.confidence, 0, 1),
+    }
+
+
+def score(c: Candidates, now: datetime | None = None) -> np.ndarray:
+    feats = features(c, now)
+    total = np.zeros(len(c), dtype=np.float64)
+    for name, weight in WEIGHTS.items():
+        total += weight * feats[name]
+    return total
+
+
+def _best_per_story(stories: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """每个故事得分最高的一条的下标"""
+    _, codes = np.unique(stories, return_inverse=True)
+    order = np.lexsort((-scores, codes))
+    sorted_stories = codes[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_stories[1:] != sorted_stories[:-1]
+    return order[first]
+
+
+def select(c: Candidates, scores: np.ndarray, per_section: int = 20,
+           max_per_source: int = MAX_PER_SOURCE) -> dict[str, list[int]]:
+    """分层 top-k：返回 {section: [候选下标, ...]}，按得分从高到低"""
+    if len(c) == 0:
+        return {}
+    keep = _best_per_story(c.stories, scores)
+    picked: dict[str, list[int]] = {}
+    for section in np.unique(c.sections[keep]):
+        idx = keep[c.sections[keep] == section]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        chosen, overflow = [], []
+        per_source: dict[str, int] = {}
+        for i in idx:
+            if len(chosen) >= per_section:
+                break
+            platform = c.platforms[i]
+            if per_source.get(platform, 0) < max_per_source:
+                per_source[platform] = per_source.get(platform, 0) + 1
+                chosen.append(int(i))
+            else:
+                overflow.append(int(i))
+        # 来源太集中时放宽限制补齐
+        chosen += overflow[:per_section - len(chosen)]
+        chosen.sort(key=lambda i: -scores[i])
+        picked[str(section)] = chosen
+    return picked
+
+
+def rank_section_news(db, since: datetime, per_section: int = 20,
+                      now: datetime | None = None) -> dict[str, list[dict]]:
+    """载入时间窗内已分类的新闻，打分并分层选出各维度 top-k"""
+    c = load_candidates(db, since)
+    if len(c) == 0:
+        return {}
+    scores = score(c, now)
+    return {
+        section: [
+            {
+                "id": int(c.ids[i]),
+                "title": c.titles[i],
+                "url": c.urls[i],
+                "platform": c.platforms[i],
+                "score": round(float(scores[i]), 4),
+            }
+            for i in idx
+        ]
+        for section, idx in select(c, scores, per_section).items()
+    }
@@ -0,0 +1,17 @@
+"""
+Token 数粗估
+不依赖分词器：中日韩字符约 1 token/字，其余字符约 4 字符/token。
+只用于切分批次、控制提示词预算，偏保守（宁可多估）。
+"""
+from __future__ import annotations
+
+import re
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
@@ -1,40 +1,271 @@
 """
 火山引擎 (Volcengine) AI 调用封装
 兼容 OpenAI SDK 接口规范，调用 DeepSeek / Doubao-pro 模型
+相同请求的响应会被缓存，见 ai/cache.py；chat_stream 逐段产出回复，供简报流式生成使用
+achat 为异步版本（共享 AsyncOpenAI 连接池），供 FastAPI 路由并发调用，不阻塞事件循环
+所有上游请求都经过 ai/gateway.py 的并发 / 速率限制、退避重试与单飞合并，每次调用记入 ai/ledger.py 的台账
 """
 from __future__ import annotations
+import asyncio
+import logging
 import os
-from openai import OpenAI
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
 
+from ai.cache import CACHE_ENABLED, cache_key, get_cache, ttl_for
+from ai.gateway import get_gateway
+from ai.ledger import record_call
+from ai.tokens import estimate_tokens
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 _client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+
+
+class LLMNotConfigured(ValueError):
+    """API Key / 模型 ID 未配置"""
+
+
+def _credentials() -> tuple[str, str]:
+    api_key = os.getenv("VOLCENGINE_API_KEY")
+    base_url = os.getenv("VOLCENGINE_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3")
+    if not api_key:
+        raise LLMNotConfigured("VOLCENGINE_API_KEY 未配置，请在 .env 文件中设置")
+    return api_key, base_url
 
 
 def get_client() -> OpenAI:
     global _client
     if _client is None:
-        api_key = os.getenv("VOLCENGINE_API_KEY")
-        base_url = os.getenv("VOLCENGINE_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3")
-        if not api_key:
-            raise ValueError("VOLCENGINE_API_KEY 未配置，请在 .env 文件中设置")
-        _client = OpenAI(api_key=api_key, base_url=base_url)
+        api_key, base_url = _credentials()
+        _client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)  # 重试由网关负责
     return _client
 
 
-def chat(system_prompt: str, user_message: str, temperature: float = 0.7) -> str:
+def get_async_client() -> AsyncOpenAI:
+    """进程内共享的异步客户端：所有协程复用同一个连接池（keep-alive）"""
+    global _async_client
+    if _async_client is None:
+        api_key, base_url = _credentials()
+        _async_client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+    return _async_client
+
+
+@dataclass
+class Completion:
+    text: str
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+
+
+def chat(
+    system_prompt: str,
+    user_message: str,
+    temperature: float = 0.7,
+    call_site: str = "default",
+    use_cache: bool = True,
+) -> str:
     """
     通用 Chat 调用
     :param system_prompt: 系统角色提示词
     :param user_message: 用户消息
     :param temperature: 创意度，0=保守，1=随机
+    :param call_site: 调用点名称，决定缓存 TTL（见 ai/cache.py），也是调用台账的统计维度（见 ai/ledger.py）
+    :param use_cache: False 时跳过缓存读取，强制重新生成（结果仍会写入缓存）
     :return: 模型回复文本
     """
+    model_id = _model_id()
+    key = cache_key(model_id, system_prompt, user_message, temperature)
+    prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_message)
+    started = time.perf_counter()
+    if CACHE_ENABLED and use_cache:
+        cached = get_cache().get(key)
+        if cached is not None:
+            logger.info(f"[LLM] {call_site} 命中缓存")
+            record_call(**_cache_hit_record(call_site, model_id, prompt_tokens, cached, started))
+            return cached
+
+    meta: dict = {}
+    try:
+        completion, shared = get_gateway().call(
+            lambda: _complete(model_id, system_prompt, user_message, temperature),
+            tokens=prompt_tokens,
+            key=key,
+            meta=meta,
+        )
+    except Exception as e:
+        record_call(**_error_record(call_site, model_id, meta, prompt_tokens, started, e))
+        raise
+    record_call(**_completion_record(call_site, model_id, completion, shared, prompt_tokens, started))
+    if CACHE_ENABLED and not shared:  # 合并的调用由发起者写缓存
+        get_cache().put(key, completion.text, model=model_id, call_site=call_site, ttl=ttl_for(call_site))
+    return completion.text
+
+
+async def achat(
+    system_prompt: str,
+    user_message: str,
+    temperature: float = 0.7,
+    call_site: str = "default",
+    use_cache: bool = True,
+) -> str:
+    """chat() 的异步版本：模型调用走异步客户端，缓存与台账读写（数据库）放到线程池里"""
+    model_id = _model_id()
+    key = cache_key(model_id, system_prompt, user_message, temperature)
+    prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_message)
+    started = time.perf_counter()
+    if CACHE_ENABLED and use_cache:
+        cached = await asyncio.to_thread(get_cache().get, key)
+        if cached is not None:
+            logger.info(f"[LLM] {call_site} 命中缓存")
+            await asyncio.to_thread(
+                lambda: record_call(**_cache_hit_record(call_site, model_id, prompt_tokens, cached, started))
+            )
+            return cached
+
+    meta: dict = {}
+    try:
+        completion, shared = await get_gateway().acall(
+            lambda: _acomplete(model_id, system_prompt, user_message, temperature),
+            tokens=prompt_tokens,
+            key=key,
+            meta=meta,
+        )
+    except Exception as e:
+        await asyncio.to_thread(
+            lambda: record_call(**_error_record(call_site, model_id, meta, prompt_tokens, started, e))
+        )
+        raise
+    await asyncio.to_thread(
+        lambda: record_call(**_completion_record(call_site, model_id, completion, shared, prompt_tokens, started))
+    )
+    if CACHE_ENABLED and not shared:
+        await asyncio.to_thread(
+            get_cache().put, key, completion.text, model=model_id, call_site=call_site, ttl=ttl_for(call_site)
+        )
+    return completion.text
+
+
+def chat_stream(
+    system_prompt: str,
+    user_message: str,
+    temperature: float = 0.7,
+    call_site: str = "default",
+    use_cache: bool = True,
+) -> Iterator[str]:
+    """
+    流式 Chat 调用：逐段产出模型回复，参数同 chat()
+    命中缓存时一次性产出整段；只有完整读完的回复才写入缓存，中途断开不会缓存半截内容。
+    """
+    model_id = _model_id()
+    key = cache_key(model_id, system_prompt, user_message, temperature)
+    prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_message)
+    started = time.perf_counter()
+    if CACHE_ENABLED and use_cache:
+        cached = get_cache().get(key)
+        if cached is not None:
+            logger.info(f"[LLM] {call_site} 命中缓存")
+            record_call(**_cache_hit_record(call_site, model_id, prompt_tokens, cached, started), stream=True)
+            yield cached
+            return
+
+    parts: list[str] = []
+    usage: dict = {}
+    first_token_ms = None
+    try:
+        for delta in get_gateway().stream(
+            lambda: _stream_complete(model_id, system_prompt, user_message, temperature, usage),
+            tokens=prompt_tokens,
+        ):
+            if first_token_ms is None:
+                first_token_ms = _elapsed_ms(started)
+            parts.append(delta)
+            yield delta
+    except GeneratorExit:
+        # 调用方提前停止读取：照常记账，但不写缓存
+        record_call(**_stream_record(call_site, model_id, usage, parts, prompt_tokens, started, first_token_ms))
+        raise
+    except Exception as e:
+        record_call(**_stream_record(call_site, model_id, usage, parts, prompt_tokens, started, first_token_ms),
+                    error=e)
+        raise
+    record_call(**_stream_record(call_site, model_id, usage, parts, prompt_tokens, started, first_token_ms))
+    if CACHE_ENABLED:
+        get_cache().put(key, "".join(parts), model=model_id, call_site=call_site, ttl=ttl_for(call_site))
+
+
+# ─────────────────────────────────────────
+# 台账记录
+# ─────────────────────────────────────────
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def _cache_hit_record(call_site: str, model_id: str, prompt_tokens: int, text: str, started: float) -> dict:
+    # 命中缓存没有实际消耗，记下估算的 token 数，用于统计缓存省下的量
+    return dict(call_site=call_site, model=model_id, source="cache", latency_ms=_elapsed_ms(started),
+                prompt_tokens=prompt_tokens, completion_tokens=estimate_tokens(text), estimated=True)
+
+
+def _completion_record(call_site: str, model_id: str, completion: Completion, shared: bool,
+                       prompt_tokens: int, started: float) -> dict:
+    estimated = completion.prompt_tokens is None or completion.completion_tokens is None
+    return dict(
+        call_site=call_site, model=model_id, source="coalesced" if shared else "api",
+        latency_ms=_elapsed_ms(started),
+        prompt_tokens=prompt_tokens if completion.prompt_tokens is None else completion.prompt_tokens,
+        completion_tokens=(estimate_tokens(completion.text) if completion.completion_tokens is None
+                           else completion.completion_tokens),
+        estimated=estimated,
+    )
+
+
+def _error_record(call_site: str, model_id: str, meta: dict, prompt_tokens: int, started: float,
+                  error: BaseException) -> dict:
+    # 失败调用不计入消耗（见 ai/ledger.py usage_summary）；等待的在途请求失败时记为 coalesced
+    return dict(call_site=call_site, model=model_id, source="coalesced" if meta.get("coalesced") else "api",
+                latency_ms=_elapsed_ms(started), prompt_tokens=prompt_tokens, completion_tokens=None,
+                estimated=True, error=error)
+
+
+def _stream_record(call_site: str, model_id: str, usage: dict, parts: list[str], prompt_tokens: int,
+                   started: float, first_token_ms: float | None) -> dict:
+    estimated = "prompt_tokens" not in usage
+    return dict(
+        call_site=call_site, model=model_id, source="api", latency_ms=_elapsed_ms(started),
+        prompt_tokens=usage.get("prompt_tokens", prompt_tokens),
+        completion_tokens=usage.get("completion_tokens", estimate_tokens("".join(parts))),
+        estimated=estimated, stream=True, first_token_ms=first_token_ms,
+    )
+
+
+# ─────────────────────────────────────────
+# 上游请求
+# ─────────────────────────────────────────
+def _model_id() -> str:
     model_id = os.getenv("VOLCENGINE_MODEL_ID")
     if not model_id:
-        raise ValueError("VOLCENGINE_MODEL_ID 未配置，请在 .env 中设置推理接入点 ID")
+        raise LLMNotConfigured("VOLCENGINE_MODEL_ID 未配置，请在 .env 中设置推理接入点 ID")
+    return model_id
 
+
+def _to_completion(response) -> Completion:
+    usage = getattr(response, "usage", None)
+    return Completion(
+        text=response.choices[0].message.content or "",
+        prompt_tokens=getattr(usage, "prompt_tokens", None),
+        completion_tokens=getattr(usage, "completion_tokens", None),
+    )
+
+
+def _complete(model_id: str, system_prompt: str, user_message: str, temperature: float) -> Completion:
     client = get_client()
     response = client.chat.completions.create(
         model=model_id,
@@ -44,4 +275,42 @@ def chat(system_prompt: str, user_message: str, temperature: float = 0.7) -> str
         ],
         temperature=temperature,
     )
-    return response.choices[0].message.content or ""
+    return _to_completion(response)
+
+
+async def _acomplete(model_id: str, system_prompt: str, user_message: str, temperature: float) -> Completion:
+    client = get_async_client()
+    response = await client.chat.completions.create(
+        model=model_id,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user",   "content": user_message},
+        ],
+        temperature=temperature,
+    )
+    return _to_completion(response)
+
+
+def _stream_complete(model_id: str, system_prompt: str, user_message: str, temperature: float,
+                     usage: dict | None = None) -> Iterator[str]:
+    """逐段产出回复；流的最后一个 chunk 带 usage（stream_options.include_usage），写入 usage 字典"""
+    client = get_client()
+    stream = client.chat.completions.create(
+        model=model_id,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user",   "content": user_message},
+        ],
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    try:
+        for chunk in stream:
+            if chunk.usage is not None and usage is not None:
+                usage["prompt_tokens"] = chunk.usage.prompt_tokens
+                usage["completion_tokens"] = chunk.usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        stream.close()
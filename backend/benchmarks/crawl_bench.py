@@ -0,0 +1,245 @@
+"""
+爬虫基准测试（离线）
+基于 cassette 回放（crawlers/cassette.py），每轮使用全新的临时 SQLite，分别计量每个爬虫的：
+- fetch   抓取总耗时（回放网络 + 解析）
+- parse   解析耗时 = fetch - 网络耗时（见 BaseCrawler.metrics）
+- ingest  入库耗时（去重 + 近似重复归并 + 批量写入）
+结果取多轮中位数，可写出 JSON，并与基线 JSON 比较，parse / ingest 变慢超过容差时返回非零退出码。
+
+用法（在 backend/ 下）：
+    python -m benchmarks.crawl_bench run                       # 合成 cassette，scale=50
+    python -m benchmarks.crawl_bench run --scale 500 --repeat 5 --json bench.json
+    python -m benchmarks.crawl_bench run --baseline bench.json --tolerance 0.25
+    python -m benchmarks.crawl_bench record --out benchmarks/cassettes/live.json   # 需要外网
+    python -m benchmarks.crawl_bench run --cassette benchmarks/cassettes/live.json --latency-ms 80
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+
+import models  # noqa: F401  注册全部表
+from database import Base, SessionLocal
+from crawlers.base import NotModified
+from crawlers.cassette import RECORD, use_cassette
+from crawlers.dedup import reset_story_index
+from crawlers.engine import ALL_CRAWLERS, expand_crawlers
+
+from benchmarks.fixtures import build_synthetic_cassette
+
+logger = logging.getLogger("benchmark")
+
+
+@dataclass
+class CrawlerBench:
+    """单个爬虫（类）一轮的计量，多个源（如 RSS）合计"""
+    crawler: str
+    sources: int = 0
+    items: int = 0
+    inserted: int = 0
+    bytes: int = 0
+    errors: int = 0
+    fetch_ms: float = 0.0
+    network_ms: float = 0.0
+    parse_ms: float = 0.0
+    ingest_ms: float = 0.0
+
+    @property
+    def parse_items_per_sec(self) -> float:
+        return self.items / (self.parse_ms / 1000) if self.parse_ms > 0 else 0.0
+
+    @property
+    def ingest_rows_per_sec(self) -> float:
+        return self.items / (self.ingest_ms / 1000) if self.ingest_ms > 0 else 0.0
+
+
+@contextmanager
+def fresh_database():
+    """临时 SQLite 建好全部表，把 SessionLocal 重新绑定过去；退出时恢复并删除"""
+    tmp = tempfile.mkdtemp(prefix="titan-bench-")
+    engine = create_engine(f"sqlite:///{tmp}/bench.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    previous = SessionLocal.kw.get("bind")
+    SessionLocal.configure(bind=engine)
+    reset_story_index()
+    try:
+        yield engine
+    finally:
+        SessionLocal.configure(bind=previous)
+        reset_story_index()
+        engine.dispose()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def bench_crawler(cls, cassette: str, **replay_options) -> CrawlerBench:
+    """一轮：全新数据库 + 回放，逐个源 fetch → save 并计时"""
+    result = CrawlerBench(crawler=cls.__name__)
+    with fresh_database(), use_cassette(cassette, **replay_options):
+        for task in expand_crawlers([cls]):
+            result.sources += 1
+            t0 = time.perf_counter()
+            try:
+                items = task.fetch()
+            except NotModified:
+                items = []
+            except Exception as e:
+                result.errors += 1
+                logger.warning(f"[Bench] {task.source_id} 抓取失败: {e}")
+                continue
+            fetch_ms = (time.perf_counter() - t0) * 1000
+
+            t1 = time.perf_counter()
+            ingest = task.save(items)
+            result.ingest_ms += (time.perf_counter() - t1) * 1000
+
+            result.fetch_ms += fetch_ms
+            result.network_ms += task.metrics.network_ms
+            result.parse_ms += max(fetch_ms - task.metrics.network_ms, 0.0)
+            result.bytes += task.metrics.bytes
+            result.items += len(items)
+            result.inserted += ingest.inserted
+    return result
+
+
+def _median(runs: list[CrawlerBench]) -> CrawlerBench:
+    first = runs[0]
+    merged = CrawlerBench(crawler=first.crawler, sources=first.sources)
+    for key in ("items", "inserted", "bytes", "errors"):
+        setattr(merged, key, int(statistics.median(getattr(r, key) for r in runs)))
+    for key in ("fetch_ms", "network_ms", "parse_ms", "ingest_ms"):
+        setattr(merged, key, statistics.median(getattr(r, key) for r in runs))
+    return merged
+
+
+def run_suite(cassette: str, repeat: int = 3, classes=None, **replay_options) -> list[CrawlerBench]:
+    results = []
+    for cls in classes or ALL_CRAWLERS:
+        bench_crawler(cls, cassette, **replay_options)  # 预热：导入、正则编译、连接池等
+        results.append(_median([bench_crawler(cls, cassette, **replay_options) for _ in range(repeat)]))
+    return results
+
+
+def to_dict(results: list[CrawlerBench]) -> dict:
+    return {
+        r.crawler: {
+            **asdict(r),
+            "parse_items_per_sec": round(r.parse_items_per_sec, 1),
+            "ingest_rows_per_sec": round(r.ingest_rows_per_sec, 1),
+        }
+        for r in results
+    }
+
+
+def print_table(results: list[CrawlerBench]):
+    header = f"{'crawler':<18}{'src':>4}{'items':>7}{'KB':>8}{'fetch ms':>10}{'parse ms':>10}{'ingest ms':>11}{'parse/s':>10}{'ingest/s':>10}{'err':>5}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r.crawler:<18}{r.sources:>4}{r.items:>7}{r.bytes / 1024:>8.1f}"
+            f"{r.fetch_ms:>10.1f}{r.parse_ms:>10.1f}{r.ingest_ms:>11.1f}"
+            f"{r.parse_items_per_sec:>10.0f}{r.ingest_rows_per_sec:>10.0f}{r.errors:>5}"
+        )
+
+
+def compare(results: list[CrawlerBench], baseline: dict, tolerance: float) -> list[str]:
+    """parse / ingest 比基线慢超过 tolerance（比例）的项"""
+    regressions = []
+    for r in results:
+        base = baseline.get(r.crawler)
+        if not base:
+            continue
+        for key in ("parse_ms", "ingest_ms"):
+            old, new = base.get(key) or 0, getattr(r, key)
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(f"{r.crawler}.{key}: {old:.1f} → {new:.1f} ms（+{(new / old - 1) * 100:.0f}%）")
+    return regressions
+
+
+def record(out: str, classes=None):
+    """联网跑一遍全部爬虫，把响应录到 out（不入库）"""
+    with use_cassette(out, mode=RECORD):
+        for task in expand_crawlers(classes or ALL_CRAWLERS):
+            try:
+                items = task.fetch()
+                print(f"  ✓ {task.source_id}: {len(items)} 条")
+            except Exception as e:
+                print(f"  ✗ {task.source_id}: {e}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Titan View 爬虫离线基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="联网录制 cassette")
+    rec.add_argument("--out", required=True)
+
+    run = sub.add_parser("run", help="回放 cassette 并计量")
+    run.add_argument("--cassette", help="cassette 路径；不指定时生成合成 cassette")
+    run.add_argument("--scale", type=int, default=50, help="合成 cassette 中每个源的条目数")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--crawler", action="append", help="只跑指定爬虫类名，可重复")
+    run.add_argument("--latency-ms", type=float, default=0.0)
+    run.add_argument("--jitter-ms", type=float, default=0.0)
+    run.add_argument("--failure-rate", type=float, default=0.0)
+    run.add_argument("--seed", type=int, default=0, help="延迟抖动与故障注入的随机种子")
+    run.add_argument("--json", help="结果写入该 JSON 文件")
+    run.add_argument("--baseline", help="与该 JSON 基线比较")
+    run.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    # 爬虫模块导入时已配置过 INFO 级日志，这里压低，只保留告警
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.command == "record":
+        record(args.out)
+        return 0
+
+    classes = [c for c in ALL_CRAWLERS if not args.crawler or c.__name__ in args.crawler]
+    tmp_dir = None
+    cassette = args.cassette
+    if not cassette:
+        tmp_dir = tempfile.mkdtemp(prefix="titan-cassette-")
+        cassette = build_synthetic_cassette(os.path.join(tmp_dir, "synthetic.json"), scale=args.scale)
+    try:
+        results = run_suite(
+            cassette, repeat=args.repeat, classes=classes,
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            failure_rate=args.failure_rate, seed=args.seed,
+        )
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(to_dict(results), f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n性能回退：")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n与基线相比无超过 {args.tolerance:.0%} 的回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
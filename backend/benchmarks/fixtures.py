@@ -0,0 +1,157 @@
+"""
+合成 cassette
+沙箱 / CI 中没有外网，也没有真实录制时，用固定种子生成结构与体量接近线上的响应：
+RSS（每源 scale 条）、微博热搜 / 百度热榜 JSON、三个政府网站列表页（带大段导航与页脚）。
+生成结果是确定的，同一 scale 下各次基准测试可直接对比。
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawlers.gov import ChinaGovCrawler, NdrcCrawler, StatsCrawler
+from crawlers.hot_search import BaiduHotCrawler, WeiboCrawler
+from crawlers.rss import RSS_SOURCES
+
+SEED = 20240101
+BASE_TIME = datetime(2024, 6, 1, 12, 0, 0)
+
+_TOPICS = [
+    "央行宣布降准0.5个百分点", "A股三大指数集体收涨", "国务院常务会议部署稳就业",
+    "人工智能大模型加速落地", "半导体设备国产化率提升", "新能源汽车出口同比增长",
+    "美联储维持利率不变", "统计局发布5月CPI数据", "发改委推进重大项目建设",
+    "独角兽企业完成新一轮融资", "房地产市场调控政策优化", "光伏产业链价格企稳",
+    "中美经贸磋商取得进展", "芯片企业科创板IPO过会", "消费券带动假日消费回暖",
+]
+_NOISE = ["某明星官宣恋情", "综艺节目收视创新高", "演唱会门票秒空", "电视剧大结局引热议"]
+
+
+def _title(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(_TOPICS)}（第{i}期）{rng.choice(['', '：专家解读', '，市场反应积极', '，多地跟进'])}"
+
+
+def _rss(source: dict, rng: random.Random, n: int) -> str:
+    entries = []
+    for i in range(n):
+        when = BASE_TIME - timedelta(minutes=7 * i)
+        entries.append(
+            "<item>"
+            f"<title>{_title(rng, i)}</title>"
+            f"<link>https://example.com/{source['platform']}/{when:%Y%m%d}/{i}.html</link>"
+            f"<description><![CDATA[<p>{'据报道，' * 20}{_title(rng, i)}。</p>]]></description>"
+            f"<pubDate>{format_datetime(when.replace(tzinfo=None))} +0800</pubDate>"
+            f"<guid>{source['platform']}-{i}</guid>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>{source["name"]}</title>'
+        f'<link>https://example.com/{source["platform"]}</link>'
+        + "".join(entries)
+        + "</channel></rss>"
+    )
+
+
+def _weibo(rng: random.Random) -> str:
+    realtime = []
+    for i in range(50):
+        word = rng.choice(_NOISE) if i % 4 == 3 else _title(rng, i)[:16]
+        realtime.append({"word": word, "num": 5_000_000 - i * 80_000, "word_scheme": f"#{word}#"})
+    return json.dumps({"ok": 1, "data": {"realtime": realtime}}, ensure_ascii=False)
+
+
+def _baidu(rng: random.Random) -> str:
+    content = []
+    for i in range(30):
+        word = rng.choice(_NOISE) if i % 4 == 3 else _title(rng, i)[:16]
+        content.append({
+            "word": word,
+            "url": f"https://www.baidu.com/s?wd={word}",
+            "desc": f"{word}，详情请见报道。",
+            "hotScore": str(4_900_000 - i * 100_000),
+        })
+    return json.dumps({"success": True, "data": {"cards": [{"content": content}]}}, ensure_ascii=False)
+
+
+def _page(body: str, rng: random.Random) -> str:
+    """政府网站列表页：真正的列表只占页面一小部分，其余是导航、推荐位和页脚"""
+    nav = "".join(
+        f'<li class="nav-item"><a href="/col{i}/index.htm">{rng.choice(_TOPICS)[:6]}</a>'
+        f'<ul class="sub">{"".join(f"<li><a href=/col{i}/s{j}.htm>栏目{j}</a></li>" for j in range(12))}</ul></li>'
+        for i in range(40)
+    )
+    aside = "".join(
+        f'<li><a href="/zt/{i}/index.htm">专题：{rng.choice(_TOPICS)}</a><span>2024-05-{i % 28 + 1:02d}</span></li>'
+        for i in range(60)
+    )
+    footer = "".join(f'<p><a href="/link{i}.htm">相关链接 {i}</a> | 版权所有 © 2024</p>' for i in range(80))
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>列表</title>"
+        + "".join(f"<script>var cfg{i} = {{a: {i}, b: '{'x' * 200}'}};</script>" for i in range(20))
+        + f"</head><body><div class='header'><ul class='nav'>{nav}</ul></div>"
+        + f"<div class='main'>{body}</div><div class='aside'><ul>{aside}</ul></div>"
+        + f"<div class='footer'>{footer}</div></body></html>"
+    )
+
+
+def _gov_cn(rng: random.Random, n: int) -> str:
+    lis = "".join(
+        f'<li><h4><a href="/zhengce/content/2024-05/{i:02d}/content_{6950000 + i}.htm" target="_blank">'
+        f'{_title(rng, i)}</a><span class="date">2024-05-{i % 28 + 1:02d}</span></h4></li>'
+        for i in range(n)
+    )
+    return _page(f'<div class="news_box"><div class="list list_1 list_2"><ul>{lis}</ul></div></div>', rng)
+
+
+def _ndrc(rng: random.Random, n: int) -> str:
+    lis = "".join(
+        f'<li><a href="./202405/t202405{i % 28 + 1:02d}_{1380000 + i}.html" target="_blank" '
+        f'title="{_title(rng, i)}">{_title(rng, i)}</a><span>2024/05/{i % 28 + 1:02d}</span></li>'
+        for i in range(n)
+    )
+    return _page(f'<div class="list"><ul class="u-list">{lis}</ul></div>', rng)
+
+
+def _stats(rng: random.Random, n: int) -> str:
+    lis = "".join(
+        f'<li><a class="fl pc_1600" href="./202405/t202405{i % 28 + 1:02d}_{1950000 + i}.html" target="_blank">'
+        f'{_title(rng, i)}</a><span class="fr">2024-05-{i % 28 + 1:02d}</span></li>'
+        for i in range(n)
+    )
+    return _page(f'<div class="list-content"><ul>{lis}</ul></div>', rng)
+
+
+def _entry(url: str, body: str, content_type: str) -> dict:
+    return {
+        "method": "GET",
+        "url": url,
+        "status": 200,
+        "reason": "OK",
+        "headers": {"Content-Type": content_type},
+        "body": body,
+    }
+
+
+def build_synthetic_cassette(path: str, scale: int = 50) -> str:
+    """生成合成 cassette 写到 path；scale 为每个 RSS 源 / 政府列表页的条目数"""
+    rng = random.Random(SEED)
+    interactions = [
+        _entry(s["url"], _rss(s, rng, scale), "application/rss+xml; charset=utf-8")
+        for s in RSS_SOURCES
+    ]
+    interactions += [
+        _entry(WeiboCrawler.WEIBO_HOT_URL, _weibo(rng), "application/json; charset=utf-8"),
+        _entry(BaiduHotCrawler.BAIDU_HOT_URL, _baidu(rng), "application/json; charset=utf-8"),
+        _entry(ChinaGovCrawler.GOV_URL, _gov_cn(rng, scale), "text/html; charset=utf-8"),
+        _entry(NdrcCrawler.NDRC_URL, _ndrc(rng, scale), "text/html; charset=utf-8"),
+        _entry(StatsCrawler.STATS_URL, _stats(rng, scale), "text/html; charset=utf-8"),
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"interactions": interactions}, f, ensure_ascii=False)
+    return path
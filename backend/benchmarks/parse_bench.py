@@ -0,0 +1,127 @@
+"""
+政府网站列表页解析基准
+对 cassette 中录制（或合成）的列表页，分别计量：
+- legacy   旧写法：BeautifulSoup(html.parser) 解析整页 + 宽泛选择器（li / a[href]）
+- 各后端   crawlers/htmlparse.py 中可用的 selectolax / lxml / bs4，只解析列表容器
+并校验各后端抽取结果一致。
+
+用法（在 backend/ 下）：
+    python -m benchmarks.parse_bench                   # 合成 cassette，scale=50
+    python -m benchmarks.parse_bench --scale 200 --iterations 50
+    python -m benchmarks.parse_bench --cassette benchmarks/cassettes/live.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from crawlers.gov import ChinaGovCrawler, GovListCrawler, NdrcCrawler, StatsCrawler
+from crawlers.htmlparse import LayoutChanged, available_backends, parse_list
+
+from benchmarks.fixtures import build_synthetic_cassette
+
+GOV_CRAWLERS: list[type[GovListCrawler]] = [ChinaGovCrawler, NdrcCrawler, StatsCrawler]
+
+
+def _legacy_parse(html: bytes) -> int:
+    """旧实现的解析部分：整页建树后在全部 li / a[href] 上筛选，仅用于对比"""
+    soup = BeautifulSoup(html.decode("utf-8", errors="replace"), "html.parser")
+    return len([a for a in soup.select("a[href]")[:50] if 8 <= len(a.get_text(strip=True)) <= 100])
+
+
+def _load_pages(cassette: str) -> dict[str, bytes]:
+    with open(cassette, encoding="utf-8") as f:
+        interactions = json.load(f)["interactions"]
+    pages = {}
+    for entry in interactions:
+        if entry.get("status") == 200 and "body" in entry:
+            pages.setdefault(entry["url"], entry["body"].encode("utf-8"))
+    return pages
+
+
+def _time(fn, iterations: int) -> float:
+    """单次耗时中位数（毫秒）"""
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def _parse(cls: type[GovListCrawler], html: bytes, backend: str):
+    return parse_list(
+        html, cls.RULES, base_url=cls.LIST_URL,
+        min_len=cls.MIN_TITLE_LEN, max_len=cls.MAX_TITLE_LEN, limit=cls.LIMIT, backend=backend,
+    )
+
+
+def run(cassette: str, iterations: int = 20) -> list[dict]:
+    pages = _load_pages(cassette)
+    rows = []
+    for cls in GOV_CRAWLERS:
+        html = pages.get(cls.LIST_URL)
+        if html is None:
+            print(f"  cassette 中没有 {cls.LIST_URL}，跳过 {cls.__name__}")
+            continue
+
+        legacy_ms = _time(lambda: _legacy_parse(html), iterations)
+        rows.append({"crawler": cls.__name__, "backend": "legacy", "kb": len(html) / 1024,
+                     "ms": legacy_ms, "items": None, "speedup": 1.0})
+
+        reference = None
+        for backend in available_backends():
+            try:
+                entries = _parse(cls, html, backend)
+            except LayoutChanged as e:
+                print(f"  {cls.__name__} / {backend}: {e}")
+                continue
+            keys = [(e.title, e.url, e.publish_time) for e in entries]
+            if reference is None:
+                reference = keys
+            elif keys != reference:
+                print(f"  ⚠ {cls.__name__} / {backend} 抽取结果与 {available_backends()[0]} 不一致")
+            ms = _time(lambda: _parse(cls, html, backend), iterations)
+            rows.append({"crawler": cls.__name__, "backend": backend, "kb": len(html) / 1024,
+                         "ms": ms, "items": len(entries), "speedup": legacy_ms / ms if ms else 0.0})
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="政府网站列表页解析基准")
+    parser.add_argument("--cassette", help="cassette 路径；不指定时生成合成 cassette")
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    tmp_dir = None
+    cassette = args.cassette
+    if not cassette:
+        tmp_dir = tempfile.mkdtemp(prefix="titan-cassette-")
+        cassette = build_synthetic_cassette(os.path.join(tmp_dir, "synthetic.json"), scale=args.scale)
+    try:
+        rows = run(cassette, args.iterations)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"{'crawler':<18}{'backend':<12}{'KB':>8}{'ms/page':>10}{'items':>7}{'speedup':>9}")
+    print("-" * 64)
+    for r in rows:
+        items = "-" if r["items"] is None else r["items"]
+        print(f"{r['crawler']:<18}{r['backend']:<12}{r['kb']:>8.1f}{r['ms']:>10.2f}{items:>7}{r['speedup']:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,9 @@
 """
 from __future__ import annotations
 
-import hashlib
 import logging
+import time
+from contextlib import nullcontext
 from datetime import datetime
 from dataclasses import dataclass, field
 from typing import Optional
@@ -15,20 +16,29 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import requests
+from sqlalchemy import insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import RawNews
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+try:
+    from crawlers.dedup import StoryBatch, get_story_index
+    from crawlers.transport import HEADERS, new_session, request_timeout, start_timing, stop_timing  # noqa: F401  HEADERS 保留旧导入路径
+    from crawlers.urls import url_hash
+    from crawlers.validators import (
+        NotModified, body_hash, conditional_headers, load_validator, save_validators,
+    )
+except ImportError:
+    from dedup import StoryBatch, get_story_index
+    from transport import HEADERS, new_session, request_timeout, start_timing, stop_timing
+    from urls import url_hash
+    from validators import (
+        NotModified, body_hash, conditional_headers, load_validator, save_validators,
+    )
 
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/122.0.0.0 Safari/537.36"
-    ),
-    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-}
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
 
 @dataclass
@@ -44,69 +54,290 @@ class NewsItem:
     section: str = ""             # 对应首页维度，如 'policy', 'market', 'tech'
 
 
+@dataclass
+class IngestResult:
+    """一次批量入库的统计结果"""
+    received: int = 0             # 爬虫交来的条数
+    inserted: int = 0             # 实际写入条数
+    invalid: int = 0              # 缺标题/链接被丢弃
+    batch_duplicates: int = 0     # 同一批次内重复的链接
+    existing: int = 0             # 数据库中已存在
+    story_duplicates: int = 0     # 已写入，但与其他平台的条目归为同一故事
+    # 本批新条目的故事签名，提交成功后调用 stories.register() 才进全局索引
+    stories: StoryBatch | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def skipped(self) -> int:
+        return self.received - self.inserted
+
+
+# IN 查询与批量写入的分块大小（MySQL/SQLite 的参数个数都有上限）
+INGEST_CHUNK_SIZE = 500
+
+
+def _chunks(seq: list, size: int = INGEST_CHUNK_SIZE):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _insert_ignore(db: Session):
+    """按方言构造「冲突即跳过」的 INSERT，兜底并发写入同一 url_hash 的情况"""
+    table = RawNews.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite_insert(table).on_conflict_do_nothing()
+    if dialect == "mysql":
+        return mysql_insert(table).prefix_with("IGNORE")
+    return insert(table)
+
+
+def ingest_items(items: list[NewsItem], db: Session) -> IngestResult:
+    """
+    批量入库：批内去重 → 分块 IN 查询已存在的 url_hash → 近似重复归并 → 批量 INSERT。
+    去重键为规范化 URL 的 md5，见 crawlers/urls.py；故事归并见 crawlers/dedup.py。
+    调用方负责 commit / rollback，commit 成功后调用 result.stories.register()（见 BaseCrawler.save）。
+    """
+    result = IngestResult(received=len(items))
+
+    # 1. 批内去重（保留首次出现）
+    unique: dict[str, NewsItem] = {}
+    for item in items:
+        if not item.title or not item.url:
+            result.invalid += 1
+            continue
+        key = url_hash(item.url)
+        if key in unique:
+            result.batch_duplicates += 1
+            continue
+        unique[key] = item
+
+    # 2. 一次（分块）查询库中已有的 url_hash
+    hashes = list(unique)
+    existing: set[str] = set()
+    for chunk in _chunks(hashes):
+        existing.update(h for (h,) in db.query(RawNews.url_hash).filter(RawNews.url_hash.in_(chunk)))
+    result.existing = len(existing)
+
+    # 3. 批量写入
+    now = datetime.now()
+    rows = [
+        {
+            "source_platform": item.source_platform,
+            "title": item.title,
+            "content": item.content,
+            "url": item.url,
+            "url_hash": key,
+            "publish_time": item.publish_time or now,
+            "author": item.author,
+            "tags": item.tags + ([item.section] if item.section else []),
+            "status": 0,
+        }
+        for key, item in unique.items()
+        if key not in existing
+    ]
+
+    # 3.5 跨平台近似重复：同一事件归到同一个 story_id
+    if rows:
+        result.stories = StoryBatch(get_story_index())
+        for row in rows:
+            own = row["url_hash"][:16]
+            row["story_id"] = result.stories.assign(row["url_hash"], row["title"], own, now)
+            if row["story_id"] != own:
+                result.story_duplicates += 1
+
+    stmt = _insert_ignore(db)
+    for chunk in _chunks(rows):
+        res = db.execute(stmt, chunk)
+        # executemany 的 rowcount 为各行之和；被 IGNORE 的并发冲突行不计入
+        inserted = res.rowcount if res.rowcount is not None and res.rowcount >= 0 else len(chunk)
+        result.existing += len(chunk) - inserted
+        result.inserted += inserted
+        if inserted < len(chunk):
+            # 被 IGNORE 的行在库里是并发写入的那一条，story_id 可能与本批分配的不同，不进索引
+            stored = dict(
+                db.query(RawNews.url_hash, RawNews.story_id)
+                .filter(RawNews.url_hash.in_([r["url_hash"] for r in chunk]))
+            )
+            result.stories.discard(r["url_hash"] for r in chunk if stored.get(r["url_hash"]) != r["story_id"])
+
+    return result
+
+
+@dataclass
+class FetchMetrics:
+    """一个数据源本次抓取的网络耗时累计（毫秒），写入 crawl_source_runs"""
+    requests: int = 0
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0
+    ttfb_ms: float = 0.0       # 发出请求到收到响应头（含 DNS 与建连）
+    network_ms: float = 0.0    # session.get 总耗时；stream=True 时不含正文读取
+    bytes: int = 0
+
+    def to_result_fields(self, total_ms: float) -> dict:
+        """换算成 SourceResult 的耗时字段；解析耗时 = 抓取总耗时 - 网络耗时"""
+        return {
+            "dns_ms":     self.dns_ms,
+            "connect_ms": self.connect_ms,
+            "ttfb_ms":    self.ttfb_ms,
+            "parse_ms":   max(total_ms - self.network_ms, 0.0),
+            "bytes":      self.bytes,
+            "requests":   self.requests,
+        }
+
+
 class BaseCrawler:
     """所有爬虫的基类"""
 
     platform: str = "unknown"
     section: str = "unknown"
+    # 自适应轮询间隔的上下限（分钟），见 crawlers/polling.py
+    poll_bounds: tuple[int, int] = (30, 720)
 
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+        self.last_result: IngestResult | None = None
+        # 共享进程级连接池，见 crawlers/transport.py
+        self.session = new_session()
+        # 由并发引擎注入：按 host 限流、整体截止时间（time.monotonic）
+        self.limiter = None
+        self.deadline: float | None = None
+        # 条件请求拿到的新校验值，入库成功后才落盘（入库失败下次仍会全量重抓）
+        self._pending_validators: dict[str, dict] = {}
+        # stream=True 的条件请求：上次的正文 md5，调用方读完正文后由 finish_stream 比对
+        self._previous_body_hashes: dict[str, str | None] = {}
+        self.metrics = FetchMetrics()
+
+    @property
+    def source_id(self) -> str:
+        """数据源标识，用于并发引擎的统计与日志"""
+        return self.platform
 
     def fetch(self) -> list[NewsItem]:
         """子类必须实现，返回 NewsItem 列表"""
         raise NotImplementedError
 
-    def get(self, url: str, timeout: int = 10, **kwargs) -> requests.Response:
-        """带错误处理的 GET 请求"""
+    def get(self, url: str, timeout: float = 10, conditional: bool = False, **kwargs) -> requests.Response:
+        """
+        带错误处理的 GET 请求
+        conditional=True 时发送 If-None-Match / If-Modified-Since，
+        服务器返回 304 或正文 md5 与上次相同则抛出 NotModified，调用方应跳过解析。
+        """
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout(f"超过整体截止时间，放弃 GET {url}")
+            timeout = min(timeout, remaining)
+
+        validator = load_validator(url) if conditional else None
+        if validator:
+            headers = {**conditional_headers(validator), **kwargs.pop("headers", {})}
+            kwargs["headers"] = headers
+
+        slot = self.limiter.slot(url) if self.limiter is not None else nullcontext()
         try:
-            resp = self.session.get(url, timeout=timeout, **kwargs)
+            with slot:
+                # 计时从拿到 host 配额之后开始，排队等待不算网络耗时
+                timing = start_timing()
+                t0 = time.perf_counter()
+                try:
+                    resp = self.session.get(url, timeout=request_timeout(timeout), **kwargs)
+                finally:
+                    self._record_timing(timing, t0)
+            self.metrics.ttfb_ms += resp.elapsed.total_seconds() * 1000
+            if not kwargs.get("stream"):
+                self.metrics.bytes += len(resp.content)
+            if conditional and resp.status_code == 304:
+                raise NotModified(url, "304")
             resp.raise_for_status()
-            return resp
         except requests.RequestException as e:
             self.logger.error(f"GET {url} 失败: {e}")
             raise
 
-    def run(self) -> int:
-        """执行爬取并写入数据库，返回新增条数"""
-        self.logger.info(f"[{self.platform}] 开始爬取...")
+        if conditional:
+            # stream=True 时正文尚未读取，md5 由调用方读完后补上
+            record = {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "body_hash": None if kwargs.get("stream") else body_hash(resp.content),
+            }
+            self._pending_validators[url] = record
+            if kwargs.get("stream"):
+                self._previous_body_hashes[url] = validator.get("body_hash") if validator else None
+            if record["body_hash"] and validator and validator.get("body_hash") == record["body_hash"]:
+                raise NotModified(url, "正文未变")
+        return resp
+
+    def finish_stream(self, url: str, digest: str):
+        """
+        stream=True 的条件请求读完完整正文后调用：补上正文 md5，与上次相同则抛出 NotModified。
+        提前停止读取时不要调用（没有完整正文的 md5）。
+        """
+        record = self._pending_validators.get(url)
+        if record is None:
+            return
+        record["body_hash"] = digest
+        if self._previous_body_hashes.pop(url, None) == digest:
+            raise NotModified(url, "正文未变")
+
+    def _record_timing(self, timing, t0: float):
+        stop_timing()
+        self.metrics.requests += 1
+        self.metrics.dns_ms += timing.dns_ms
+        self.metrics.connect_ms += timing.connect_ms
+        self.metrics.network_ms += (time.perf_counter() - t0) * 1000
+
+    def commit_state(self):
+        """
+        保存本次抓取的增量状态（条件请求校验值等），在入库成功或确认未变化之后调用。
+        子类有额外状态（如 RSS 水位线）时覆盖并调用 super()。
+        """
+        if not self._pending_validators:
+            return
         try:
-            items = self.fetch()
+            save_validators(self._pending_validators)
+            self._pending_validators = {}
         except Exception as e:
-            self.logger.error(f"[{self.platform}] 爬取失败: {e}")
-            return 0
+            self.logger.warning(f"[{self.source_id}] 保存条件请求校验值失败: {e}")
 
-        saved = 0
+    def save(self, items: list[NewsItem]) -> IngestResult:
+        """把 fetch 结果批量写入数据库，失败时回滚并抛出"""
         db: Session = SessionLocal()
         try:
-            for item in items:
-                if not item.title or not item.url:
-                    continue
-                # 以 url md5 做唯一索引，防重
-                url_hash = hashlib.md5(item.url.encode()).hexdigest()
-                exists = db.query(RawNews).filter(RawNews.url == item.url).first()
-                if exists:
-                    continue
-                news = RawNews(
-                    source_platform=item.source_platform,
-                    title=item.title,
-                    content=item.content,
-                    url=item.url,
-                    publish_time=item.publish_time or datetime.now(),
-                    author=item.author,
-                    tags=item.tags + ([item.section] if item.section else []),
-                    status=0,
-                )
-                db.add(news)
-                saved += 1
+            result = ingest_items(items, db)
             db.commit()
-        except Exception as e:
+        except Exception:
             db.rollback()
-            self.logger.error(f"[{self.platform}] 数据库写入失败: {e}")
+            raise
         finally:
             db.close()
 
-        self.logger.info(f"[{self.platform}] 完成，新增 {saved} 条")
-        return saved
+        if result.stories is not None:
+            result.stories.register()
+
+        self.commit_state()
+        self.last_result = result
+        self.logger.info(
+            f"[{self.source_id}] 完成，新增 {result.inserted} 条，跳过 {result.skipped} 条"
+            f"（批内重复 {result.batch_duplicates} / 已存在 {result.existing} / 无效 {result.invalid}），"
+            f"归入已有故事 {result.story_duplicates} 条"
+        )
+        return result
+
+    def run(self) -> int:
+        """执行爬取并写入数据库，返回新增条数"""
+        self.logger.info(f"[{self.source_id}] 开始爬取...")
+        try:
+            items = self.fetch()
+        except NotModified as e:
+            self.commit_state()
+            self.logger.info(f"[{self.source_id}] {e}，跳过解析")
+            return 0
+        except Exception as e:
+            self.logger.error(f"[{self.source_id}] 爬取失败: {e}")
+            return 0
+
+        try:
+            return self.save(items).inserted
+        except Exception as e:
+            self.logger.error(f"[{self.source_id}] 数据库写入失败: {e}")
+            return 0
@@ -0,0 +1,227 @@
+"""
+录制 / 回放传输层（cassette）
+把真实响应录到磁盘，之后无需联网即可确定性地回放，用于离线调试与基准测试：
+- record  通过真实连接池请求，并把每个响应（状态码、响应头、正文）写入 cassette 文件
+- replay  只从 cassette 返回响应；未录制的 URL 直接抛 ConnectionError，不会偷偷联网
+回放时可注入延迟与故障（按 种子 + URL + 第几次请求 取随机数，与线程调度无关，结果可复现），并按录制的 ETag / Last-Modified
+响应条件请求（304），便于覆盖 crawlers/validators.py 的路径。
+
+用法：
+    with use_cassette("benchmarks/cassettes/live.json", mode="record"):
+        WeiboCrawler().fetch()
+    with use_cassette("benchmarks/cassettes/live.json", latency_ms=50, failure_rate=0.1):
+        run_crawlers()
+cassette 文件为 JSON：{"interactions": [{method, url, status, reason, headers, body | body_b64}]}
+"""
+from __future__ import annotations
+
+import base64
+import io
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+try:
+    from crawlers.transport import build_adapter, get_adapter, set_adapter
+except ImportError:
+    from transport import build_adapter, get_adapter, set_adapter
+
+logger = logging.getLogger("crawler.cassette")
+
+RECORD, REPLAY = "record", "replay"
+
+# 正文以解码后的形式保存，这些头回放时不再成立
+_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "set-cookie"}
+
+
+class CassetteMiss(requests.ConnectionError):
+    """回放模式下请求了未录制的 URL"""
+
+
+class InjectedFailure(requests.ConnectionError):
+    """回放时按 failure_rate 注入的连接故障"""
+
+
+def _encode_body(content: bytes) -> dict:
+    try:
+        return {"body": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(entry: dict) -> bytes:
+    if "body_b64" in entry:
+        return base64.b64decode(entry["body_b64"])
+    return entry.get("body", "").encode("utf-8")
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    挂到 transport.set_adapter() 上即可对所有爬虫生效。
+    同一 URL 录了多次时按顺序回放，播完后停在最后一条。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = REPLAY,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        failure_rate: float = 0.0,
+        error_status: int | None = None,
+        seed: int = 0,
+        honor_conditional: bool = True,
+    ):
+        super().__init__()
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"未知的 cassette 模式：{mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        # 为 None 时注入连接错误，否则注入该状态码的响应（如 503）
+        self.error_status = error_status
+        self.honor_conditional = honor_conditional
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._interactions: list[dict] = []
+        self._index: dict[tuple[str, str], list[dict]] = {}
+        self._cursor: dict[tuple[str, str], int] = {}
+        self._real: HTTPAdapter | None = None
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._interactions = json.load(f).get("interactions", [])
+        elif mode == REPLAY:
+            raise FileNotFoundError(f"cassette 不存在：{path}")
+        for entry in self._interactions:
+            self._index.setdefault((entry["method"], entry["url"]), []).append(entry)
+        if mode == RECORD:
+            self._real = build_adapter()
+
+    # ─────────────────────────────────────
+    # requests 适配器接口
+    # ─────────────────────────────────────
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.mode == RECORD:
+            return self._record(request, stream, timeout, verify, cert, proxies)
+        return self._replay(request)
+
+    def close(self):
+        if self._real is not None:
+            self._real.close()
+        super().close()
+
+    # ─────────────────────────────────────
+    # 录制
+    # ─────────────────────────────────────
+    def _record(self, request, stream, timeout, verify, cert, proxies):
+        resp = self._real.send(request, stream=False, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        entry = {
+            "method":  request.method,
+            "url":     request.url,
+            "status":  resp.status_code,
+            "reason":  resp.reason,
+            "headers": {k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS},
+            "recorded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            **_encode_body(resp.content),
+        }
+        with self._lock:
+            self._interactions.append(entry)
+        # 已读出的正文重新包装，调用方的 stream / iter_content 照常可用
+        return self._build(request, entry)
+
+    def save(self):
+        if self.mode != RECORD:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock, open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"interactions": self._interactions}, f, ensure_ascii=False, indent=1)
+        logger.info(f"[Cassette] 已保存 {len(self._interactions)} 条录制到 {self.path}")
+
+    # ─────────────────────────────────────
+    # 回放
+    # ─────────────────────────────────────
+    def _next_attempt(self, method: str, url: str) -> int:
+        key = (method, url)
+        with self._lock:
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+        return i
+
+    def _find(self, method: str, url: str, attempt: int) -> dict | None:
+        matches = self._index.get((method, url))
+        if not matches:
+            return None
+        return matches[min(attempt, len(matches) - 1)]
+
+    def _replay(self, request):
+        attempt = self._next_attempt(request.method, request.url)
+        rng = random.Random(f"{self.seed}:{request.method}:{request.url}:{attempt}")
+        delay = max(self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms), 0.0)
+        fail = rng.random() < self.failure_rate
+        if delay:
+            time.sleep(delay / 1000)
+        if fail and self.error_status is None:
+            raise InjectedFailure(f"cassette 注入的连接故障：{request.url}", request=request)
+
+        entry = self._find(request.method, request.url, attempt)
+        if entry is None:
+            raise CassetteMiss(f"cassette 中没有 {request.method} {request.url}", request=request)
+        if fail:
+            entry = {**entry, "status": self.error_status, "reason": "Injected", "body": ""}
+            entry.pop("body_b64", None)
+        elif self.honor_conditional and self._not_modified(request, entry):
+            entry = {**entry, "status": 304, "reason": "Not Modified", "body": ""}
+            entry.pop("body_b64", None)
+        return self._build(request, entry)
+
+    @staticmethod
+    def _not_modified(request, entry: dict) -> bool:
+        headers = {k.lower(): v for k, v in entry.get("headers", {}).items()}
+        etag = request.headers.get("If-None-Match")
+        since = request.headers.get("If-Modified-Since")
+        if etag and headers.get("etag") == etag:
+            return True
+        return bool(since and headers.get("last-modified") == since)
+
+    def _build(self, request, entry: dict) -> requests.Response:
+        body = _decode_body(entry)
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers={**entry.get("headers", {}), "Content-Length": str(len(body))},
+            status=entry["status"],
+            reason=entry.get("reason"),
+            preload_content=False,
+            decode_content=False,
+            request_method=request.method,
+            request_url=request.url,
+        )
+        return self.build_response(request, raw)
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = REPLAY, **options):
+    """
+    在 with 块内把共享 adapter 换成 CassetteAdapter。
+    只对块内新建的爬虫（Session）生效；录制模式退出时写盘。
+    """
+    previous = get_adapter()
+    adapter = CassetteAdapter(path, mode=mode, **options)
+    set_adapter(adapter)
+    try:
+        yield adapter
+    finally:
+        set_adapter(previous)
+        adapter.save()
+        adapter.close()
@@ -0,0 +1,205 @@
+"""
+跨平台近似重复检测（MinHash-LSH）
+同一事件会以略有差异的标题出现在新华社、新浪、财新、微博、百度等多个平台。
+入库时把近似重复的条目归到同一个 story_id 下：每条仍然保存（不丢覆盖面），
+但下游流水线按 story 只取一条送给 LLM。
+
+- 特征：规范化标题的字符 shingle（中文按字、英文按词，取相邻二元组）
+- 签名：72 个哈希置换的 MinHash，分 24 个 band（每 band 3 行）做 LSH 分桶
+- 校验：候选对再算一次精确 Jaccard，≥ 阈值才算同一故事
+内存中只保留最近 WINDOW_HOURS 小时的条目，每天数万条规模没有压力。
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+
+from database import SessionLocal
+from models import RawNews
+
+NUM_PERM      = 72
+BANDS         = 24
+ROWS          = NUM_PERM // BANDS
+THRESHOLD     = float(os.getenv("DEDUP_JACCARD_THRESHOLD", "0.5"))
+WINDOW_HOURS  = int(os.getenv("DEDUP_WINDOW_HOURS", "48"))
+
+try:
+    import numpy as np
+except ImportError:  # numpy 可选：没有时退回纯 Python 实现，结果一致只是慢一些
+    np = None
+
+_MASK64 = (1 << 64) - 1
+_rng = random.Random(20240101)  # 固定种子：签名跨进程、跨重启保持一致
+_PERMS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+if np is not None:
+    _PERM_A = np.array([a for a, _ in _PERMS], dtype=np.uint64)[:, None]
+    _PERM_B = np.array([b for _, b in _PERMS], dtype=np.uint64)[:, None]
+
+_PREFIX_RE = re.compile(r"^【[^】]{0,12}】")
+_TOKEN_RE  = re.compile(r"[\u4e00-\u9fff]|[a-z0-9]+")
+
+
+def shingles(title: str) -> frozenset[str]:
+    """去掉【微博热搜】之类前缀与标点后，取相邻 token 二元组"""
+    text = _PREFIX_RE.sub("", (title or "").strip()).lower()
+    tokens = _TOKEN_RE.findall(text)
+    if len(tokens) < 2:
+        return frozenset(tokens)
+    return frozenset(a + b for a, b in zip(tokens, tokens[1:]))
+
+
+def minhash(sh: frozenset[str]) -> tuple[int, ...]:
+    """
+    MinHash 签名：每个置换为 (a*h + b) mod 2^64 取高 32 位。
+    numpy 可用时整块向量化（uint64 乘加天然按 2^64 回绕）。
+    """
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in sh]
+    if not hashes:
+        return ()
+    if np is not None:
+        h = np.array(hashes, dtype=np.uint64)[None, :]
+        return tuple(((_PERM_A * h + _PERM_B) >> np.uint64(32)).min(axis=1).tolist())
+    return tuple(min(((a * x + b) & _MASK64) >> 32 for x in hashes) for a, b in _PERMS)
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class StoryIndex:
+    """内存中的 LSH 索引：shingle 集合 → story_id"""
+
+    def __init__(self, threshold: float = THRESHOLD, window_hours: int = WINDOW_HOURS):
+        self.threshold = threshold
+        self.window = timedelta(hours=window_hours)
+        self._entries: list[tuple[frozenset, tuple, str, datetime]] = []
+        self._buckets: dict[tuple[int, tuple], list[int]] = {}
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    @staticmethod
+    def _bands(sig: tuple[int, ...]):
+        for i in range(BANDS):
+            yield i, sig[i * ROWS:(i + 1) * ROWS]
+
+    def _match(self, sh: frozenset, sig: tuple[int, ...]) -> str | None:
+        best, best_score = None, self.threshold
+        seen: set[int] = set()
+        for key in self._bands(sig):
+            for idx in self._buckets.get(key, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                other, _, story_id, _ = self._entries[idx]
+                score = jaccard(sh, other)
+                if score >= best_score:
+                    best, best_score = story_id, score
+        return best
+
+    def _add(self, sh: frozenset, sig: tuple[int, ...], story_id: str, when: datetime):
+        idx = len(self._entries)
+        self._entries.append((sh, sig, story_id, when))
+        for key in self._bands(sig):
+            self._buckets.setdefault(key, []).append(idx)
+
+    def lookup(self, sh: frozenset, sig: tuple[int, ...]) -> str | None:
+        with self._lock:
+            return self._match(sh, sig)
+
+    def add_entries(self, entries: list[tuple[frozenset, tuple, str, datetime]]):
+        with self._lock:
+            for entry in entries:
+                self._add(*entry)
+
+    def prune(self, now: datetime | None = None):
+        """丢弃窗口外的条目并重建分桶；过期超过 1 小时才重建，避免每批都重建"""
+        cutoff = (now or datetime.now()) - self.window
+        with self._lock:
+            if not self._entries or self._entries[0][3] >= cutoff - timedelta(hours=1):
+                return
+            kept = [e for e in self._entries if e[3] >= cutoff]
+            self._entries, self._buckets = [], {}
+            for sh, sig, story_id, when in kept:
+                self._add(sh, sig, story_id, when)
+
+    def warm_up(self):
+        """从数据库载入窗口内已入库的条目（进程启动后首次入库时调用）"""
+        since = datetime.now() - self.window
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(RawNews.title, RawNews.story_id, RawNews.url_hash, RawNews.crawl_time)
+                .filter(RawNews.crawl_time >= since)
+                .order_by(RawNews.id)
+                .all()
+            )
+        finally:
+            db.close()
+        for title, story_id, h, crawl_time in rows:
+            sh = shingles(title)
+            if sh:
+                with self._lock:
+                    self._add(sh, minhash(sh), story_id or (h or "")[:16], crawl_time or datetime.now())
+        self.warmed = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class StoryBatch:
+    """
+    一批待入库条目的故事归并：先查全局索引，再查本批已分配的条目。
+    签名先暂存在本批，入库提交成功后由 register() 写入全局索引；
+    回滚的批次、被 INSERT IGNORE 丢掉的行不会进索引，避免后来的条目挂到库里不存在的 story_id 上。
+    """
+
+    def __init__(self, index: StoryIndex):
+        self.index = index
+        self._local = StoryIndex(index.threshold)
+        self._staged: dict[str, tuple[frozenset, tuple, str, datetime]] = {}
+
+    def assign(self, key: str, title: str, default_story_id: str, when: datetime | None = None) -> str:
+        """返回该标题所属的 story_id；找不到近似条目时以 default_story_id 开新故事。key 为该行的 url_hash"""
+        sh = shingles(title)
+        if not sh:
+            return default_story_id
+        sig = minhash(sh)
+        when = when or datetime.now()
+        story_id = self.index.lookup(sh, sig) or self._local._match(sh, sig) or default_story_id
+        self._local._add(sh, sig, story_id, when)
+        self._staged[key] = (sh, sig, story_id, when)
+        return story_id
+
+    def discard(self, keys):
+        for key in keys:
+            self._staged.pop(key, None)
+
+    def register(self):
+        self.index.add_entries(list(self._staged.values()))
+        self._staged = {}
+
+
+_index = StoryIndex()
+_index_lock = threading.Lock()
+
+
+def get_story_index() -> StoryIndex:
+    with _index_lock:
+        if not _index.warmed:
+            _index.warm_up()
+        else:
+            _index.prune()
+    return _index
+
+
+def reset_story_index():
+    """丢弃内存索引，下次使用时从（可能已切换的）数据库重新载入；基准测试换库时使用"""
+    global _index
+    with _index_lock:
+        _index = StoryIndex()
@@ -0,0 +1,265 @@
+"""
+并发爬取引擎
+所有数据源（含每个 RSS 源）并行抓取，整体耗时约等于最慢的单个源：
+- 全局并发上限：线程池大小
+- 按 host 限流：同一站点同时最多 N 个请求
+- 整体截止时间：超时的源直接放弃，单个请求的 timeout 也会被截到剩余时间内
+- 熔断：连续失败的源在冷却期内直接跳过，见 crawlers/health.py
+- 遥测：每次爬取及每个源的 DNS / 建连 / TTFB / 解析耗时写入 crawl_runs，见 crawlers/telemetry.py
+抓取在线程池中进行，入库在调用线程中串行完成（避免 SQLite 写锁竞争）。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from urllib.parse import urlsplit
+
+try:
+    from crawlers.base import BaseCrawler, NotModified
+    from crawlers.health import HealthTracker
+    from crawlers.telemetry import save_report
+    from crawlers.rss import RssCrawler
+    from crawlers.hot_search import WeiboCrawler, BaiduHotCrawler
+    from crawlers.gov import ChinaGovCrawler, NdrcCrawler, StatsCrawler
+except ImportError:
+    from base import BaseCrawler, NotModified
+    from health import HealthTracker
+    from telemetry import save_report
+    from rss import RssCrawler
+    from hot_search import WeiboCrawler, BaiduHotCrawler
+    from gov import ChinaGovCrawler, NdrcCrawler, StatsCrawler
+
+logger = logging.getLogger("crawler.engine")
+
+ALL_CRAWLERS = [
+    RssCrawler,
+    WeiboCrawler,
+    BaiduHotCrawler,
+    ChinaGovCrawler,
+    NdrcCrawler,
+    StatsCrawler,
+]
+
+MAX_WORKERS    = int(os.getenv("CRAWL_MAX_WORKERS", "8"))
+PER_HOST_LIMIT = int(os.getenv("CRAWL_PER_HOST_LIMIT", "2"))
+DEADLINE_SECS  = float(os.getenv("CRAWL_DEADLINE_SECONDS", "60"))
+
+
+class HostLimiter:
+    """按 host 的并发信号量"""
+
+    def __init__(self, per_host: int = PER_HOST_LIMIT):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._sems: dict[str, threading.BoundedSemaphore] = {}
+
+    def _sem(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._sems:
+                self._sems[host] = threading.BoundedSemaphore(self.per_host)
+            return self._sems[host]
+
+    @contextmanager
+    def slot(self, url: str):
+        sem = self._sem(urlsplit(url).hostname or "")
+        with sem:
+            yield
+
+
+@dataclass
+class SourceResult:
+    """单个数据源的执行结果"""
+    source: str
+    fetched: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    not_modified: bool = False    # 304 / 正文未变，跳过了解析
+    circuit_open: bool = False    # 熔断中，本轮未抓取
+    error: str | None = None
+    error_class: str | None = None
+    # 网络与解析耗时（毫秒），见 BaseCrawler.metrics
+    requests: int = 0
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0
+    ttfb_ms: float = 0.0
+    parse_ms: float = 0.0
+    bytes: int = 0
+
+
+@dataclass
+class CrawlReport:
+    """一次完整爬取的汇总"""
+    started_at: datetime
+    elapsed: float = 0.0
+    sources: list[SourceResult] = field(default_factory=list)
+    run_id: int | None = None     # crawl_runs.id，落库失败时为 None
+
+    @property
+    def total_inserted(self) -> int:
+        return sum(s.inserted for s in self.sources)
+
+    @property
+    def failed(self) -> list[str]:
+        return [s.source for s in self.sources if s.error]
+
+    @property
+    def circuit_open(self) -> list[str]:
+        return [s.source for s in self.sources if s.circuit_open]
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id":     self.run_id,
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed":    round(self.elapsed, 2),
+            "inserted":   self.total_inserted,
+            "sources": [
+                {
+                    "source":   s.source,
+                    "fetched":  s.fetched,
+                    "inserted": s.inserted,
+                    "skipped":  s.skipped,
+                    "elapsed":  round(s.elapsed, 2),
+                    "ttfb_ms":  round(s.ttfb_ms, 1),
+                    "parse_ms": round(s.parse_ms, 1),
+                    "bytes":    s.bytes,
+                    "not_modified": s.not_modified,
+                    "circuit_open": s.circuit_open,
+                    "error":    s.error,
+                }
+                for s in self.sources
+            ],
+        }
+
+
+def expand_crawlers(classes: list[type[BaseCrawler]]) -> list[BaseCrawler]:
+    """把爬虫类展开成任务；提供 expand() 的类（如 RssCrawler）按源拆分"""
+    tasks: list[BaseCrawler] = []
+    for cls in classes:
+        expand = getattr(cls, "expand", None)
+        tasks.extend(expand() if expand else [cls()])
+    return tasks
+
+
+def list_source_ids(classes: list[type[BaseCrawler]] | None = None) -> list[str]:
+    return [task.source_id for task in expand_crawlers(classes or ALL_CRAWLERS)]
+
+
+def _timed_fetch(crawler: BaseCrawler):
+    """返回 (items, 耗时秒)；未变化时 items 为 None。失败时耗时记在 crawler.fetch_elapsed"""
+    start = time.monotonic()
+    try:
+        items = crawler.fetch()
+    except NotModified:
+        items = None
+    finally:
+        crawler.fetch_elapsed = time.monotonic() - start
+    return items, crawler.fetch_elapsed
+
+
+def _fill_metrics(result: SourceResult, crawler: BaseCrawler):
+    elapsed = getattr(crawler, "fetch_elapsed", None)
+    if elapsed is not None:
+        result.elapsed = elapsed
+    for key, value in crawler.metrics.to_result_fields(result.elapsed * 1000).items():
+        setattr(result, key, value)
+
+
+def run_crawlers(
+    classes: list[type[BaseCrawler]] | None = None,
+    max_workers: int = MAX_WORKERS,
+    per_host: int = PER_HOST_LIMIT,
+    deadline: float = DEADLINE_SECS,
+    use_breaker: bool = True,
+    only: set[str] | None = None,
+    trigger: str = "manual",
+) -> CrawlReport:
+    """
+    并发执行爬虫并入库，返回 CrawlReport；only 指定时只跑这些 source_id。
+    trigger 记录本次爬取的来源（poll / manual / schedule / cli），写入 crawl_runs。
+    """
+    report = CrawlReport(started_at=datetime.now())
+    start = time.monotonic()
+    stop_at = start + deadline
+
+    health = HealthTracker()
+    tasks = []
+    for task in expand_crawlers(classes or ALL_CRAWLERS):
+        if only is not None and task.source_id not in only:
+            continue
+        if use_breaker and not health.allow(task.source_id):
+            report.sources.append(SourceResult(source=task.source_id, circuit_open=True))
+            continue
+        tasks.append(task)
+    if report.circuit_open:
+        logger.info(f"[Engine] 熔断中跳过：{', '.join(report.circuit_open)}")
+
+    limiter = HostLimiter(per_host)
+    for task in tasks:
+        task.limiter = limiter
+        task.deadline = stop_at
+
+    logger.info(f"[Engine] 开始并发爬取 {len(tasks)} 个数据源（并发 {max_workers}，单站 {per_host}，截止 {deadline:.0f}s）")
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crawl")
+    pending = {pool.submit(_timed_fetch, task): task for task in tasks}
+    try:
+        while pending:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = pending.pop(future)
+                result = SourceResult(source=task.source_id)
+                try:
+                    items, result.elapsed = future.result()
+                    if items is None:
+                        result.not_modified = True
+                        task.commit_state()
+                    else:
+                        result.fetched = len(items)
+                        ingest = task.save(items)
+                        result.inserted, result.skipped = ingest.inserted, ingest.skipped
+                except Exception as e:
+                    result.error_class = type(e).__name__
+                    result.error = f"{result.error_class}: {e}"
+                    logger.error(f"[Engine] {task.source_id} 失败: {result.error}")
+                _fill_metrics(result, task)
+                health.record(task.source_id, ok=result.error is None, latency=result.elapsed, error=result.error)
+                report.sources.append(result)
+
+        for future, task in pending.items():
+            future.cancel()
+            result = SourceResult(
+                source=task.source_id,
+                elapsed=deadline,
+                error_class="DeadlineExceeded",
+                error=f"DeadlineExceeded: 超过 {deadline:.0f}s 未完成",
+            )
+            health.record(task.source_id, ok=False, error=result.error)
+            report.sources.append(result)
+            logger.warning(f"[Engine] {task.source_id} 超过截止时间，已放弃")
+    finally:
+        # 不等待超时的线程：它们的请求 timeout 已被截到截止时间内，很快会自行结束
+        pool.shutdown(wait=False, cancel_futures=True)
+        try:
+            health.close()
+        except Exception as e:
+            logger.warning(f"[Engine] 保存数据源健康状态失败: {e}")
+
+    report.elapsed = time.monotonic() - start
+    logger.info(
+        f"[Engine] 爬取完成，共入库 {report.total_inserted} 条，"
+        f"失败 {len(report.failed)} 个源，熔断跳过 {len(report.circuit_open)} 个，耗时 {report.elapsed:.1f}s"
+    )
+    try:
+        report.run_id = save_report(report, trigger)
+    except Exception as e:
+        logger.warning(f"[Engine] 保存爬取遥测失败: {e}")
+    return report
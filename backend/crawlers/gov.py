@@ -2,173 +2,117 @@
 政府网站爬虫
 覆盖：中国政府网、国家发改委、国家统计局
 这是「宏观政策」和「经济数据」维度的权威数据来源
+列表页很大（导航、专题、页脚占了绝大部分），每个站点配置列表容器规则，只解析容器内的条目，
+解析后端见 crawlers/htmlparse.py。
 """
 from __future__ import annotations
-import re
 from datetime import datetime
-from bs4 import BeautifulSoup
 
 try:
-    from crawlers.base import BaseCrawler, NewsItem
+    from crawlers.base import BaseCrawler, NewsItem, NotModified
+    from crawlers.htmlparse import ListRule, parse_list
 except ImportError:
-    from base import BaseCrawler, NewsItem
+    from base import BaseCrawler, NewsItem, NotModified
+    from htmlparse import ListRule, parse_list
 
 
-class ChinaGovCrawler(BaseCrawler):
+class GovListCrawler(BaseCrawler):
+    """政府网站列表页的通用抓取流程，子类只需给出 URL、容器规则与标签"""
+
+    LIST_URL: str = ""
+    RULES: list[ListRule] = []
+    TAGS: list[str] = []
+    SITE_NAME: str = "政府网站"
+    MIN_TITLE_LEN = 8
+    MAX_TITLE_LEN = 100
+    LIMIT = 15
+
+    def fetch(self) -> list[NewsItem]:
+        try:
+            resp = self.get(self.LIST_URL, timeout=15, conditional=True)
+            entries = parse_list(
+                resp.content,
+                self.RULES,
+                base_url=self.LIST_URL,
+                encoding="utf-8",
+                min_len=self.MIN_TITLE_LEN,
+                max_len=self.MAX_TITLE_LEN,
+                limit=self.LIMIT,
+            )
+        except NotModified:
+            raise
+        except Exception as e:
+            self.logger.error(f"{self.SITE_NAME}请求失败: {e}")
+            raise
+
+        return [
+            NewsItem(
+                source_platform=self.platform,
+                title=entry.title,
+                url=entry.url,
+                publish_time=entry.publish_time or datetime.now(),
+                tags=list(self.TAGS),
+                section=self.section,
+            )
+            for entry in entries
+        ]
+
+
+class ChinaGovCrawler(GovListCrawler):
     """
     中国政府网 最新政策文件
     URL：https://www.gov.cn/zhengce/zuixin/
     """
     platform = "gov"
     section  = "policy"
+    poll_bounds = (60, 720)
 
-    GOV_URL = "https://www.gov.cn/zhengce/zuixin/"
+    GOV_URL = LIST_URL = "https://www.gov.cn/zhengce/zuixin/"
+    RULES = [
+        ListRule("div", "news_box"),
+        ListRule("ul", "news-list"),
+    ]
+    TAGS = ["政府网", "政策", "国务院"]
+    SITE_NAME = "政府网站"
+    MIN_TITLE_LEN = 5
+    LIMIT = 20
 
-    def fetch(self) -> list[NewsItem]:
-        items = []
-        try:
-            resp = self.get(self.GOV_URL, timeout=15)
-            resp.encoding = "utf-8"
-            soup = BeautifulSoup(resp.text, "html.parser")
-        except Exception as e:
-            self.logger.error(f"政府网站请求失败: {e}")
-            return items
-
-        # 解析文章列表
-        for li in soup.select("ul.news_box li, .news-list li, li")[:30]:
-            a_tag = li.find("a")
-            if not a_tag:
-                continue
-
-            title = a_tag.get_text(strip=True)
-            href  = a_tag.get("href", "")
-            if not title or len(title) < 5:
-                continue
-
-            # 补全相对 URL
-            if href.startswith("/"):
-                href = f"https://www.gov.cn{href}"
-            elif not href.startswith("http"):
-                continue
-
-            # 提取日期
-            date_text = li.get_text()
-            pub_time  = None
-            date_match = re.search(r"(\d{4}-\d{2}-\d{2})", date_text)
-            if date_match:
-                try:
-                    pub_time = datetime.strptime(date_match.group(1), "%Y-%m-%d")
-                except ValueError:
-                    pass
-
-            items.append(NewsItem(
-                source_platform="gov",
-                title=title,
-                url=href,
-                publish_time=pub_time or datetime.now(),
-                tags=["政府网", "政策", "国务院"],
-                section="policy",
-            ))
-
-        return items[:20]
-
-
-class NdrcCrawler(BaseCrawler):
+
+class NdrcCrawler(GovListCrawler):
     """
     国家发展和改革委员会 新闻动态
     URL：https://www.ndrc.gov.cn/xwdt/xwfb/
     """
     platform = "ndrc"
     section  = "policy"
+    poll_bounds = (120, 720)
 
-    NDRC_URL = "https://www.ndrc.gov.cn/xwdt/xwfb/"
-
-    def fetch(self) -> list[NewsItem]:
-        items = []
-        try:
-            resp = self.get(self.NDRC_URL, timeout=15)
-            resp.encoding = "utf-8"
-            soup = BeautifulSoup(resp.text, "html.parser")
-        except Exception as e:
-            self.logger.error(f"发改委请求失败: {e}")
-            return items
-
-        for a_tag in soup.select("a[href]")[:50]:
-            title = a_tag.get_text(strip=True)
-            href  = a_tag.get("href", "")
-
-            if len(title) < 8 or len(title) > 100:
-                continue
-            if "javascript" in href or "#" in href:
-                continue
-
-            if href.startswith("/"):
-                href = f"https://www.ndrc.gov.cn{href}"
-            elif not href.startswith("http"):
-                continue
-
-            items.append(NewsItem(
-                source_platform="ndrc",
-                title=title,
-                url=href,
-                publish_time=datetime.now(),
-                tags=["发改委", "宏观政策", "产业政策"],
-                section="policy",
-            ))
-
-            if len(items) >= 15:
-                break
+    NDRC_URL = LIST_URL = "https://www.ndrc.gov.cn/xwdt/xwfb/"
+    # 列表文字可能被截断，完整标题在 <a title="...">
+    RULES = [
+        ListRule("ul", "u-list", title_attr="title"),
+        ListRule("div", "list", title_attr="title"),
+    ]
+    TAGS = ["发改委", "宏观政策", "产业政策"]
+    SITE_NAME = "发改委"
 
-        return items
 
-
-class StatsCrawler(BaseCrawler):
+class StatsCrawler(GovListCrawler):
     """
     国家统计局 数据发布
     URL：https://www.stats.gov.cn/sj/zxfb/
     """
     platform = "stats"
     section  = "economy"
-
-    STATS_URL = "https://www.stats.gov.cn/sj/zxfb/"
-
-    def fetch(self) -> list[NewsItem]:
-        items = []
-        try:
-            resp = self.get(self.STATS_URL, timeout=15)
-            resp.encoding = "utf-8"
-            soup = BeautifulSoup(resp.text, "html.parser")
-        except Exception as e:
-            self.logger.error(f"统计局请求失败: {e}")
-            return items
-
-        for a_tag in soup.select("a[href]")[:50]:
-            title = a_tag.get_text(strip=True)
-            href  = a_tag.get("href", "")
-
-            if len(title) < 8 or len(title) > 100:
-                continue
-            if "javascript" in href or "#" in href:
-                continue
-
-            if href.startswith("/"):
-                href = f"https://www.stats.gov.cn{href}"
-            elif not href.startswith("http"):
-                continue
-
-            items.append(NewsItem(
-                source_platform="stats",
-                title=title,
-                url=href,
-                publish_time=datetime.now(),
-                tags=["国家统计局", "经济数据", "PMI"],
-                section="economy",
-            ))
-
-            if len(items) >= 15:
-                break
-
-        return items
+    poll_bounds = (240, 1440)
+
+    STATS_URL = LIST_URL = "https://www.stats.gov.cn/sj/zxfb/"
+    RULES = [
+        ListRule("div", "list-content"),
+        ListRule("ul", "list-content"),
+    ]
+    TAGS = ["国家统计局", "经济数据", "PMI"]
+    SITE_NAME = "统计局"
 
 
 # ─────────────────────────────────────────
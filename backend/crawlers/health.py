@@ -0,0 +1,128 @@
+"""
+数据源健康状态与熔断器
+每个数据源（source_id）记录连续失败次数、最近成功时间、平均耗时：
+- closed     正常抓取
+- open       连续失败达到阈值，冷却期内直接跳过，不再白等超时
+- half_open  冷却期结束，放行一次试探；成功则恢复，失败则冷却时间翻倍
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from database import SessionLocal
+from models import SourceHealth
+
+FAILURE_THRESHOLD = int(os.getenv("CRAWL_BREAKER_THRESHOLD", "3"))
+BASE_COOLDOWN     = timedelta(minutes=int(os.getenv("CRAWL_BREAKER_COOLDOWN_MINUTES", "30")))
+MAX_COOLDOWN      = timedelta(hours=24)
+LATENCY_ALPHA     = 0.3   # 平均耗时的指数滑动系数
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def cooldown_for(consecutive_failures: int) -> timedelta:
+    """达到阈值后每多失败一次，冷却时间翻倍"""
+    exp = max(consecutive_failures - FAILURE_THRESHOLD, 0)
+    return min(BASE_COOLDOWN * (2 ** exp), MAX_COOLDOWN)
+
+
+class HealthTracker:
+    """一次爬取内使用：开始时读入全部状态，结束时统一写回"""
+
+    def __init__(self):
+        self._rows: dict[str, SourceHealth] = {}
+        self._db = SessionLocal()
+        for row in self._db.query(SourceHealth).all():
+            self._rows[row.source_id] = row
+
+    def _row(self, source_id: str) -> SourceHealth:
+        row = self._rows.get(source_id)
+        if row is None:
+            row = SourceHealth(
+                source_id=source_id, state=CLOSED,
+                consecutive_failures=0, total_runs=0, total_failures=0,
+            )
+            self._db.add(row)
+            self._rows[source_id] = row
+        return row
+
+    def allow(self, source_id: str, now: datetime | None = None) -> bool:
+        """熔断打开且仍在冷却期内返回 False；冷却期已过则转为 half_open 放行一次试探"""
+        row = self._rows.get(source_id)
+        if row is None or row.state == CLOSED:
+            return True
+        now = now or datetime.now()
+        if row.open_until and now < row.open_until:
+            return False
+        row.state = HALF_OPEN
+        return True
+
+    def record(self, source_id: str, ok: bool, latency: float | None = None, error: str | None = None):
+        row = self._row(source_id)
+        now = datetime.now()
+        row.total_runs = (row.total_runs or 0) + 1
+        if ok:
+            row.state = CLOSED
+            row.consecutive_failures = 0
+            row.open_until = None
+            row.last_success = now
+            if latency is not None:
+                ms = latency * 1000
+                row.avg_latency_ms = ms if row.avg_latency_ms is None else (
+                    LATENCY_ALPHA * ms + (1 - LATENCY_ALPHA) * row.avg_latency_ms
+                )
+        else:
+            row.consecutive_failures = (row.consecutive_failures or 0) + 1
+            row.total_failures = (row.total_failures or 0) + 1
+            row.last_failure = now
+            row.last_error = (error or "")[:500]
+            if row.state == HALF_OPEN or row.consecutive_failures >= FAILURE_THRESHOLD:
+                row.state = OPEN
+                row.open_until = now + cooldown_for(row.consecutive_failures)
+        row.updated_at = now
+
+    def close(self):
+        try:
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+        finally:
+            self._db.close()
+
+
+def _fmt(d: datetime | None) -> str | None:
+    return d.strftime("%Y-%m-%d %H:%M:%S") if d else None
+
+
+def health_to_dict(source_id: str, row: SourceHealth | None) -> dict:
+    """/crawler/sources 的单条输出；从未运行过的源视为 closed"""
+    if row is None:
+        row = SourceHealth(state=CLOSED, consecutive_failures=0, total_runs=0, total_failures=0)
+    return {
+        "source":               source_id,
+        "state":                row.state,
+        "consecutive_failures": row.consecutive_failures,
+        "last_success":         _fmt(row.last_success),
+        "last_failure":         _fmt(row.last_failure),
+        "last_error":           row.last_error,
+        "avg_latency_ms":       round(row.avg_latency_ms, 1) if row.avg_latency_ms is not None else None,
+        "open_until":           _fmt(row.open_until),
+        "total_runs":           row.total_runs,
+        "total_failures":       row.total_failures,
+        "poll_interval_min":    round(row.poll_interval / 60, 1) if row.poll_interval else None,
+        "next_poll_at":         _fmt(row.next_poll_at),
+        "new_items_per_hour":   round(row.new_item_rate, 2) if row.new_item_rate is not None else None,
+    }
+
+
+def list_health(source_ids: list[str]) -> list[dict]:
+    db = SessionLocal()
+    try:
+        rows = {r.source_id: r for r in db.query(SourceHealth).all()}
+    finally:
+        db.close()
+    # 已下线但仍有记录的源也一并展示
+    ids = source_ids + sorted(set(rows) - set(source_ids))
+    return [health_to_dict(sid, rows.get(sid)) for sid in ids]
@@ -2,17 +2,28 @@
 热搜榜爬虫
 覆盖：微博热搜 Top50、百度热榜 Top30
 这两个榜单反映中国社会情绪，是「消费与社会情绪」维度的核心数据源
+两个榜单都用共享的关键词匹配器（crawlers/keywords.py）过滤娱乐话题，
+并把命中的维度写进 tags 作为预标签，流水线规则分类时直接使用。
 """
 from __future__ import annotations
 
 import json
 import re
 from datetime import datetime
+from urllib.parse import quote
 
 try:
     from crawlers.base import BaseCrawler, NewsItem
+    from crawlers.keywords import get_matcher
 except ImportError:
     from base import BaseCrawler, NewsItem
+    from keywords import get_matcher
+
+
+def keyword_tags(title: str) -> list[str] | None:
+    """命中任一关键词时返回命中的维度（按命中数排序），未命中返回 None 表示应过滤掉"""
+    sections = get_matcher().sections(title)
+    return sections or None
 
 
 class WeiboCrawler(BaseCrawler):
@@ -23,25 +34,10 @@ class WeiboCrawler(BaseCrawler):
     """
     platform = "weibo"
     section  = "consumer"
+    poll_bounds = (5, 60)
 
     WEIBO_HOT_URL = "https://weibo.com/ajax/side/hotSearch"
 
-    KEEP_KEYWORDS = [
-        "经济", "股市", "A股", "楼市", "房价", "央行", "美联储",
-        "AI", "人工智能", "科技", "半导体", "芯片",
-        "就业", "裁员", "消费", "降价", "涨价",
-        "政策", "监管", "法规", "政府",
-        "大学", "考研", "考公", "职场",
-        "创业", "融资", "上市", "IPO",
-        "能源", "新能源", "电动车",
-    ]
-
-    def _should_keep(self, title: str) -> bool:
-        for kw in self.KEEP_KEYWORDS:
-            if kw in title:
-                return True
-        return False
-
     def fetch(self) -> list[NewsItem]:
         items = []
         try:
@@ -50,22 +46,23 @@ class WeiboCrawler(BaseCrawler):
             hot_list = data.get("data", {}).get("realtime", [])
         except Exception as e:
             self.logger.error(f"微博热搜接口请求失败: {e}")
-            return items
+            raise
 
         for entry in hot_list[:50]:
             title = entry.get("word", "").strip()
-            if not title or not self._should_keep(title):
+            sections = keyword_tags(title) if title else None
+            if not sections:
                 continue
             rank     = entry.get("num", 0)
             hot_word = entry.get("word_scheme", f"#{title}#")
-            url      = f"https://s.weibo.com/weibo?q={hot_word}"
+            url      = f"https://s.weibo.com/weibo?q={quote(hot_word)}"
             items.append(NewsItem(
                 source_platform="weibo",
                 title=f"【微博热搜】{title}",
                 url=url,
                 content=f"热度：{rank}，话题：{hot_word}",
                 publish_time=datetime.now(),
-                tags=["微博热搜", "社会情绪", title[:10]],
+                tags=["微博热搜", "社会情绪", title[:10], *sections],
                 section="consumer",
             ))
 
@@ -74,9 +71,10 @@ class WeiboCrawler(BaseCrawler):
 
 
 class BaiduHotCrawler(BaseCrawler):
-    """百度热榜爬虫"""
+    """百度热榜爬虫，过滤规则与微博热搜相同"""
     platform = "baidu"
     section  = "consumer"
+    poll_bounds = (5, 60)
 
     BAIDU_HOT_URL = "https://top.baidu.com/api/board?platform=wise&tab=realtime"
 
@@ -88,24 +86,27 @@ class BaiduHotCrawler(BaseCrawler):
             board_list = data.get("data", {}).get("cards", [{}])[0].get("content", [])
         except Exception as e:
             self.logger.error(f"百度热榜接口请求失败: {e}")
-            return items
+            raise
 
         for entry in board_list[:30]:
             title = entry.get("word", "").strip()
+            sections = keyword_tags(title) if title else None
+            if not sections:
+                continue
             url   = entry.get("url", f"https://www.baidu.com/s?wd={title}")
             desc  = entry.get("desc", "")
             hot   = entry.get("hotScore", 0)
-            if not title:
-                continue
             items.append(NewsItem(
                 source_platform="baidu",
                 title=f"【百度热榜】{title}",
                 url=url,
                 content=f"{desc} 热度值：{hot}" if desc else f"热度值：{hot}",
                 publish_time=datetime.now(),
-                tags=["百度热榜", "热搜", "社会情绪"],
+                tags=["百度热榜", "热搜", "社会情绪", *sections],
                 section="consumer",
             ))
+
+        self.logger.info(f"百度热榜过滤后保留 {len(items)} 条财经/社会类话题")
         return items
 
 
@@ -0,0 +1,219 @@
+"""
+列表页解析（可插拔解析后端）
+政府网站列表页体积大，而真正需要的只是其中一个列表容器。这里按站点规则只抽取容器内的条目：
+- selectolax  最快（可选依赖），CSS 选择器直达容器
+- lxml        C 实现，XPath 定位容器
+- bs4         兜底：html.parser + SoupStrainer，只为各规则的容器建树
+每页只解析一次，多条规则在同一棵树上查找。
+后端默认按上面顺序自动选择，可用 HTML_PARSER=selectolax|lxml|bs4 强制指定。
+规则可写多条（站点改版时新旧并存），按顺序取第一个找到的容器；都找不到时抛出 LayoutChanged，
+让健康状态与爬取遥测记下这次失败，而不是悄悄返回 0 条。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+from urllib.parse import urljoin
+
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxParser
+except ImportError:  # 可选依赖
+    _SelectolaxParser = None
+
+try:
+    import lxml.html as _lxml_html
+except ImportError:
+    _lxml_html = None
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger("crawler.htmlparse")
+
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")
+
+_DATE_RE = re.compile(r"(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})")
+
+
+class LayoutChanged(Exception):
+    """页面上找不到任何一条规则对应的列表容器，多半是站点改版"""
+
+
+@dataclass(frozen=True)
+class ListRule:
+    """一个列表容器：<container_tag class="... container_class ..."> 下的每个 <item_tag> 是一条"""
+    container_tag: str
+    container_class: str
+    item_tag: str = "li"
+    # 标题优先取 <a> 的该属性（如 title，列表里的文字可能被截断），为空时取文字
+    title_attr: str | None = None
+
+
+@dataclass
+class ListEntry:
+    title: str
+    url: str
+    publish_time: datetime | None
+
+
+def parse_date(text: str) -> datetime | None:
+    m = _DATE_RE.search(text or "")
+    if not m:
+        return None
+    try:
+        return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    except ValueError:
+        return None
+
+
+def _clean(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+# ─────────────────────────────────────────
+# 各后端：parse 每页只建一次树，items 在树上按一条规则取容器内每个条目的 (标题, href, 条目全文)，
+# 找不到容器返回 None
+# ─────────────────────────────────────────
+def _parse_selectolax(html: bytes, rules: list[ListRule], encoding: str):
+    return _SelectolaxParser(html.decode(encoding, errors="replace"))
+
+
+def _items_selectolax(tree, rule: ListRule):
+    container = tree.css_first(f"{rule.container_tag}.{rule.container_class}")
+    if container is None:
+        return None
+    rows = []
+    for item in container.css(rule.item_tag):
+        a = item.css_first("a[href]")
+        if a is None:
+            continue
+        title = (a.attributes.get(rule.title_attr) if rule.title_attr else None) or a.text(separator="")
+        rows.append((title, a.attributes.get("href") or "", item.text(separator=" ")))
+    return rows
+
+
+def _parse_lxml(html: bytes, rules: list[ListRule], encoding: str):
+    parser = _lxml_html.HTMLParser(encoding=encoding)
+    return _lxml_html.document_fromstring(html, parser=parser)
+
+
+def _items_lxml(doc, rule: ListRule):
+    found = doc.xpath(
+        f"//{rule.container_tag}[contains(concat(' ', normalize-space(@class), ' '), ' {rule.container_class} ')]"
+    )
+    if not found:
+        return None
+    rows = []
+    for item in found[0].iter(rule.item_tag):
+        links = item.xpath(".//a[@href]")
+        if not links:
+            continue
+        a = links[0]
+        title = (a.get(rule.title_attr) if rule.title_attr else None) or a.text_content()
+        rows.append((title, a.get("href") or "", item.text_content()))
+    return rows
+
+
+def _parse_bs4(html: bytes, rules: list[ListRule], encoding: str):
+    # 只为各规则的容器建树；解析时 class 是原始字符串（可能含多个类名）
+    tags = sorted({r.container_tag for r in rules})
+    classes = {r.container_class for r in rules}
+    strainer = SoupStrainer(
+        tags, class_=lambda v: bool(v) and not classes.isdisjoint(v.split() if isinstance(v, str) else v)
+    )
+    return BeautifulSoup(html, "html.parser", parse_only=strainer, from_encoding=encoding)
+
+
+def _items_bs4(soup, rule: ListRule):
+    container = soup.find(rule.container_tag, class_=rule.container_class)
+    if container is None:
+        return None
+    rows = []
+    for item in container.find_all(rule.item_tag):
+        a = item.find("a", href=True)
+        if a is None:
+            continue
+        title = (a.get(rule.title_attr) if rule.title_attr else None) or a.get_text()
+        rows.append((title, a.get("href") or "", item.get_text(" ")))
+    return rows
+
+
+@dataclass(frozen=True)
+class Backend:
+    parse: Callable    # (html, rules, encoding) -> 树
+    items: Callable    # (树, rule) -> [(标题, href, 条目全文)] | None
+
+
+BACKENDS = {
+    "selectolax": Backend(_parse_selectolax, _items_selectolax),
+    "lxml":       Backend(_parse_lxml, _items_lxml),
+    "bs4":        Backend(_parse_bs4, _items_bs4),
+}
+
+
+def available_backends() -> list[str]:
+    names = []
+    if _SelectolaxParser is not None:
+        names.append("selectolax")
+    if _lxml_html is not None:
+        names.append("lxml")
+    names.append("bs4")
+    return names
+
+
+def resolve_backend(name: str = HTML_PARSER) -> str:
+    available = available_backends()
+    if name == "auto":
+        return available[0]
+    if name not in available:
+        logger.warning(f"[HtmlParse] 解析后端 {name} 不可用，改用 {available[0]}")
+        return available[0]
+    return name
+
+
+def parse_list(
+    html: bytes | str,
+    rules: list[ListRule],
+    base_url: str,
+    encoding: str = "utf-8",
+    min_len: int = 5,
+    max_len: int = 100,
+    limit: int = 20,
+    backend: str | None = None,
+) -> list[ListEntry]:
+    """按规则抽取列表条目：补全相对链接，过滤 javascript: / 锚点链接与长度不合规的标题"""
+    if isinstance(html, str):
+        html = html.encode(encoding)
+    parser = BACKENDS[resolve_backend(backend or HTML_PARSER)]
+
+    # 整页只解析一次，各条规则在同一棵树上依次查找
+    tree = parser.parse(html, rules, encoding)
+    rows = None
+    for rule in rules:
+        rows = parser.items(tree, rule)
+        if rows is not None:
+            break
+    if rows is None:
+        names = ", ".join(f"{r.container_tag}.{r.container_class}" for r in rules)
+        raise LayoutChanged(f"{base_url} 未找到列表容器（{names}）")
+
+    entries: list[ListEntry] = []
+    seen: set[str] = set()
+    for title, href, text in rows:
+        title = _clean(title)
+        href = href.strip()
+        if not (min_len <= len(title) <= max_len):
+            continue
+        if not href or href.startswith(("javascript", "#", "mailto:")):
+            continue
+        url = urljoin(base_url, href)
+        if not url.startswith("http") or url in seen:
+            continue
+        seen.add(url)
+        entries.append(ListEntry(title=title, url=url, publish_time=parse_date(text)))
+        if len(entries) >= limit:
+            break
+    return entries
@@ -0,0 +1,172 @@
+"""
+多模式关键词匹配（Aho-Corasick）
+按维度（section）配置关键词，一次扫描标题即可拿到全部命中的关键词及其维度：
+- 热搜爬虫用它过滤娱乐话题，并给条目打上维度预标签
+- 流水线在 AI 分类不可用时用它做规则分类
+匹配耗时只与文本长度和命中数有关，关键词从几十个扩到几千个也不会变慢。
+
+默认词表见 DEFAULT_KEYWORDS；设置 KEYWORDS_FILE 指向 JSON 文件（{section: [关键词, ...]}）
+可按维度覆盖默认词表，文件中未出现的维度保留默认值。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass
+
+logger = logging.getLogger("crawler.keywords")
+
+KEYWORDS_FILE = os.getenv("KEYWORDS_FILE", "")
+
+DEFAULT_KEYWORDS: dict[str, list[str]] = {
+    "policy": [
+        "政策", "监管", "法规", "政府", "国务院", "发改委", "财政部", "证监会",
+        "两会", "改革", "条例", "通知", "规划", "税改", "减税",
+    ],
+    "global": [
+        "美国", "中美", "关税", "制裁", "外交", "地缘", "俄罗斯", "乌克兰", "欧盟",
+        "日本", "出口", "进口", "汇率", "人民币", "联合国",
+    ],
+    "market": [
+        "股市", "A股", "港股", "美股", "大盘", "涨停", "跌停", "基金", "债券",
+        "黄金", "原油", "比特币", "央行", "美联储", "降息", "加息",
+    ],
+    "tech": [
+        "AI", "人工智能", "大模型", "科技", "半导体", "芯片", "算力", "机器人",
+        "量子", "5G", "华为", "英伟达", "OpenAI", "自动驾驶",
+    ],
+    "consumer": [
+        "消费", "降价", "涨价", "就业", "裁员", "职场", "大学", "考研", "考公",
+        "房价", "楼市", "外卖", "网购", "双十一",
+    ],
+    "industry": [
+        "能源", "新能源", "电动车", "光伏", "锂电", "储能", "医药", "房地产",
+        "汽车", "制造业", "比亚迪", "特斯拉",
+    ],
+    "vc": ["创业", "融资", "上市", "IPO", "独角兽", "并购", "估值", "天使轮", "风投"],
+    "economy": ["经济", "GDP", "CPI", "PPI", "PMI", "通胀", "通缩", "社融", "外汇储备", "失业率"],
+}
+
+
+@dataclass(frozen=True)
+class KeywordHit:
+    keyword: str
+    section: str
+    start: int     # 在原文中的起始下标
+
+
+class KeywordMatcher:
+    """
+    预编译的 Aho-Corasick 自动机。英文关键词不区分大小写。
+    同一关键词可属于多个维度，命中时每个维度各返回一条。
+    """
+
+    def __init__(self, keywords: dict[str, list[str]]):
+        self.keywords = {sec: list(dict.fromkeys(kws)) for sec, kws in keywords.items()}
+        # 节点 i 的转移表 / 失败指针 / 输出 (关键词, 维度, 长度)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[str, str, int]]] = [[]]
+        for section, kws in self.keywords.items():
+            for kw in kws:
+                if kw:
+                    self._add(kw, section)
+        self._build()
+
+    def _add(self, keyword: str, section: str):
+        node = 0
+        for ch in keyword.lower():
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node].append((keyword, section, len(keyword)))
+
+    def _build(self):
+        """BFS 计算失败指针，并把失败链上的输出合并到本节点，匹配时无需再沿链回溯"""
+        queue = deque(self._goto[0].values())   # 第一层节点的失败指针都指向根
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return sum(len(kws) for kws in self.keywords.values())
+
+    def iter_hits(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate((text or "").lower()):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for keyword, section, length in out[node]:
+                yield KeywordHit(keyword, section, i - length + 1)
+
+    def match(self, text: str) -> list[KeywordHit]:
+        """所有命中（同一关键词在同一维度只返回首次出现）"""
+        seen: set[tuple[str, str]] = set()
+        hits = []
+        for hit in self.iter_hits(text):
+            key = (hit.keyword, hit.section)
+            if key not in seen:
+                seen.add(key)
+                hits.append(hit)
+        return hits
+
+    def sections(self, text: str) -> list[str]:
+        """命中的维度，按命中的不同关键词数从多到少排序（相同时按首次出现先后）"""
+        counts = Counter(hit.section for hit in self.match(text))
+        return [sec for sec, _ in counts.most_common()]
+
+    def matches_any(self, text: str) -> bool:
+        return next(self.iter_hits(text), None) is not None
+
+
+def load_keywords(path: str = KEYWORDS_FILE) -> dict[str, list[str]]:
+    """默认词表 + KEYWORDS_FILE 覆盖；文件读取失败时退回默认词表"""
+    keywords = {sec: list(kws) for sec, kws in DEFAULT_KEYWORDS.items()}
+    if not path:
+        return keywords
+    try:
+        with open(path, encoding="utf-8") as f:
+            custom = json.load(f)
+        for sec, kws in custom.items():
+            keywords[sec] = [str(k) for k in kws]
+        logger.info(f"[Keywords] 从 {path} 载入 {len(custom)} 个维度的关键词")
+    except Exception as e:
+        logger.warning(f"[Keywords] 读取关键词文件 {path} 失败，使用默认词表: {e}")
+    return keywords
+
+
+_matcher: KeywordMatcher | None = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher() -> KeywordMatcher:
+    """进程级共享的匹配器，首次使用时编译"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = KeywordMatcher(load_keywords())
+    return _matcher
+
+
+def reload_matcher() -> KeywordMatcher:
+    """关键词文件修改后重新编译"""
+    global _matcher
+    with _matcher_lock:
+        _matcher = KeywordMatcher(load_keywords())
+    return _matcher
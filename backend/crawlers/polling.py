@@ -0,0 +1,145 @@
+"""
+自适应轮询调度
+取代固定的 04:00 / 12:00 全量爬取：调度器每分钟 tick 一次，只抓「到期」的数据源。
+每个源的轮询间隔按观测到的新条目产出速率调整：
+- 有新增：间隔 ≈ TARGET_NEW_ITEMS / 产出速率（每次轮询期望拿到几条新内容）
+- 无新增（304 / 全部已存在）：间隔 × GROWTH，逐步放慢
+- 始终限制在该源的 poll_bounds（分钟）内，并加 ±JITTER 随机抖动，避免各源同时扎堆
+状态与健康信息存在同一张 source_health 表。
+轮询 tick 与手动全量爬取共用 CRAWL_LOCK，同一时间只有一轮爬取在入库（SQLite 单写者）。
+"""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+from database import SessionLocal
+from models import SourceHealth
+
+try:
+    from crawlers.engine import ALL_CRAWLERS, CrawlReport, SourceResult, expand_crawlers, run_crawlers
+except ImportError:
+    from engine import ALL_CRAWLERS, CrawlReport, SourceResult, expand_crawlers, run_crawlers
+
+logger = logging.getLogger("crawler.polling")
+
+TARGET_NEW_ITEMS = float(os.getenv("POLL_TARGET_NEW_ITEMS", "5"))
+GROWTH           = 1.5
+RATE_ALPHA       = 0.4     # 产出速率的指数滑动系数
+JITTER           = 0.1
+
+# 进程内同一时间只允许一轮爬取（轮询 tick / 手动全量），拿不到锁的一方跳过而不是排队
+CRAWL_LOCK = threading.Lock()
+
+
+def next_interval(
+    bounds: tuple[int, int],
+    prev_interval: float | None,
+    rate_per_hour: float,
+    got_new: bool,
+) -> float:
+    """计算下一次轮询间隔（秒），不含抖动"""
+    lo, hi = bounds[0] * 60, bounds[1] * 60
+    prev = prev_interval or lo
+    if rate_per_hour <= 0:
+        interval = prev * GROWTH
+    else:
+        by_rate = TARGET_NEW_ITEMS / rate_per_hour * 3600
+        interval = by_rate if got_new else max(by_rate, prev * GROWTH)
+    return min(max(interval, lo), hi)
+
+
+def _jitter(seconds: float) -> float:
+    return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def update_schedule(report: CrawlReport, bounds: dict[str, tuple[int, int]], now: datetime | None = None):
+    """根据一次爬取结果更新各源的产出速率与下次轮询时间"""
+    now = now or datetime.now()
+    db = SessionLocal()
+    try:
+        rows = {r.source_id: r for r in db.query(SourceHealth).filter(
+            SourceHealth.source_id.in_([s.source for s in report.sources])
+        )}
+        for res in report.sources:
+            row = rows.get(res.source)
+            if row is None:
+                row = SourceHealth(source_id=res.source, state="closed", consecutive_failures=0,
+                                   total_runs=0, total_failures=0)
+                db.add(row)
+            _update_row(row, res, bounds.get(res.source, (30, 720)), now)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _update_row(row: SourceHealth, res: SourceResult, bounds: tuple[int, int], now: datetime):
+    if res.circuit_open:
+        # 熔断中：不改变速率估计，冷却结束后再来
+        wait = max((row.open_until - now).total_seconds(), bounds[0] * 60) if row.open_until else bounds[0] * 60
+        row.next_poll_at = now + timedelta(seconds=wait)
+        return
+
+    if res.error is None:
+        elapsed_h = (
+            (now - row.last_poll_at).total_seconds() / 3600 if row.last_poll_at
+            else (row.poll_interval or bounds[0] * 60) / 3600
+        )
+        sample = res.inserted / max(elapsed_h, 1 / 60)
+        row.new_item_rate = sample if row.new_item_rate is None else (
+            RATE_ALPHA * sample + (1 - RATE_ALPHA) * row.new_item_rate
+        )
+        row.unchanged_polls = 0 if res.inserted else (row.unchanged_polls or 0) + 1
+        row.poll_interval = next_interval(bounds, row.poll_interval, row.new_item_rate, res.inserted > 0)
+        row.last_poll_at = now
+    elif row.poll_interval is None:
+        row.poll_interval = bounds[0] * 60
+
+    row.next_poll_at = now + timedelta(seconds=_jitter(row.poll_interval))
+
+
+def due_sources(source_ids: list[str], now: datetime | None = None) -> list[str]:
+    """到期（或从未轮询过）的 source_id"""
+    now = now or datetime.now()
+    db = SessionLocal()
+    try:
+        scheduled = {
+            sid: next_at
+            for sid, next_at in db.query(SourceHealth.source_id, SourceHealth.next_poll_at)
+            .filter(SourceHealth.source_id.in_(source_ids))
+        }
+    finally:
+        db.close()
+    return [sid for sid in source_ids if scheduled.get(sid) is None or scheduled[sid] <= now]
+
+
+def run_due_sources(classes=None) -> CrawlReport | None:
+    """调度器 tick：抓取所有到期的数据源，并更新它们的下次轮询时间；已有爬取在进行时跳过本次 tick"""
+    if not CRAWL_LOCK.acquire(blocking=False):
+        logger.info("[Polling] 已有爬取在进行，跳过本次 tick")
+        return None
+    try:
+        tasks = expand_crawlers(classes or ALL_CRAWLERS)
+        bounds = {t.source_id: tuple(t.poll_bounds) for t in tasks}
+        due = due_sources(list(bounds))
+        if not due:
+            return None
+
+        logger.info(f"[Polling] 到期数据源：{', '.join(due)}")
+        report = run_crawlers(classes, only=set(due), trigger="poll")
+        update_schedule(report, bounds)
+        return report
+    finally:
+        CRAWL_LOCK.release()
+
+
+def record_full_crawl(report: CrawlReport, classes=None):
+    """手动全量爬取后同样刷新轮询计划，避免紧接着又被 tick 重复抓取"""
+    bounds = {t.source_id: tuple(t.poll_bounds) for t in expand_crawlers(classes or ALL_CRAWLERS)}
+    update_schedule(report, bounds)
@@ -5,14 +5,23 @@ RSS 最稳定，无需 JS 渲染，无反爬风险，是首选数据源
 """
 from __future__ import annotations
 
+import hashlib
+import io
 import xml.etree.ElementTree as ET
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
+from typing import Iterator
 
 try:
-    from crawlers.base import BaseCrawler, NewsItem
+    from crawlers.base import BaseCrawler, NewsItem, NotModified
+    from crawlers.urls import url_hash
 except ImportError:
-    from base import BaseCrawler, NewsItem
+    from base import BaseCrawler, NewsItem, NotModified
+    from urls import url_hash
+
+from database import SessionLocal
+from models import FeedWatermark
 
 # ─────────────────────────────────────────
 # RSS 源配置表
@@ -49,6 +58,7 @@ RSS_SOURCES = [
         "name":     "Hacker News Top",
         "url":      "https://hnrss.org/frontpage",
         "tags":     ["AI", "硬科技", "HackerNews"],
+        "ordered":  False,  # 按热度排序而非时间，水位线只过滤不截断
     },
     # 财新网
     {
@@ -82,6 +92,7 @@ NS = {
     "content": "http://purl.org/rss/1.0/modules/content/",
     "media":   "http://search.yahoo.com/mrss/",
 }
+ATOM = "{%s}" % NS["atom"]
 
 
 def _parse_date(date_str: str | None) -> datetime | None:
@@ -96,79 +107,262 @@ def _parse_date(date_str: str | None) -> datetime | None:
             return None
 
 
-def _parse_rss_feed(xml_text: str, platform: str, section: str, tags: list[str]) -> list[NewsItem]:
-    """解析标准 RSS 2.0 / Atom feed"""
-    items = []
+def _to_utc_naive(dt: datetime | None) -> datetime | None:
+    """水位线统一按 UTC naive 比较"""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _text(elem: ET.Element, tag: str) -> str:
+    return (elem.findtext(tag) or "").strip()
+
+
+def iter_feed_entries(stream) -> Iterator[dict]:
+    """
+    iterparse 流式解析 RSS 2.0 / Atom，逐条产出条目。
+    每条处理完即从父节点摘除，内存占用与 feed 大小无关。
+    """
+    parents: list[ET.Element] = []
     try:
-        root = ET.fromstring(xml_text)
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                parents.append(elem)
+                continue
+            parents.pop()
+
+            if elem.tag == "item":
+                url = _text(elem, "link")
+                entry = {
+                    "title":   _text(elem, "title"),
+                    "url":     url,
+                    "guid":    _text(elem, "guid") or url,
+                    "summary": _text(elem, "description"),
+                    "pub":     _parse_date(elem.findtext("pubDate")),
+                }
+            elif elem.tag == f"{ATOM}entry":
+                link_el = elem.find(f"{ATOM}link")
+                url = ((link_el.get("href") if link_el is not None else "") or "").strip()
+                entry = {
+                    "title":   _text(elem, f"{ATOM}title"),
+                    "url":     url,
+                    "guid":    _text(elem, f"{ATOM}id") or url,
+                    "summary": _text(elem, f"{ATOM}summary"),
+                    "pub":     _parse_date(elem.findtext(f"{ATOM}updated") or elem.findtext(f"{ATOM}published")),
+                }
+            else:
+                continue
+
+            if parents:
+                parents[-1].remove(elem)
+            yield entry
     except ET.ParseError:
-        return items
+        return
+
+
+def parse_feed(
+    stream,
+    platform: str,
+    section: str,
+    tags: list[str],
+    watermark: dict | None = None,
+    ordered: bool = True,
+) -> tuple[list[NewsItem], dict | None, bool]:
+    """
+    解析 feed，只返回水位线之后的新条目。
+    watermark: {"pub_time": 最新发布时间(UTC), "guid": 上次头部条目}
+    ordered:   feed 按时间倒序排列时，遇到已入库条目即停止读取；
+               排行类 feed（如 HN 首页）只跳过旧条目，不提前停止。
+    返回 (新条目, 新水位线, 是否提前停止)
+    """
+    old_pub  = watermark.get("pub_time") if watermark else None
+    old_guid = watermark.get("guid") if watermark else None
 
-    # 尝试 RSS 2.0
-    for item in root.findall(".//item"):
-        title = item.findtext("title", "").strip()
-        url   = item.findtext("link",  "").strip()
-        if not title or not url:
+    items: list[NewsItem] = []
+    head_guid, newest, stopped = None, old_pub, False
+    for entry in iter_feed_entries(stream):
+        guid = entry["guid"]
+        pub  = _to_utc_naive(entry["pub"])
+        if head_guid is None:
+            head_guid = guid
+
+        seen = bool(old_guid and guid == old_guid) or bool(old_pub and pub and pub < old_pub)
+        if seen:
+            if ordered:
+                stopped = True
+                break
+            continue
+
+        if pub and (newest is None or pub > newest):
+            newest = pub
+        if not entry["title"] or not entry["url"]:
             continue
-        desc  = item.findtext("description", "").strip()
-        pub   = _parse_date(item.findtext("pubDate"))
         items.append(NewsItem(
             source_platform=platform,
-            title=title,
-            url=url,
-            content=desc[:500] if desc else "",
-            publish_time=pub,
+            title=entry["title"],
+            url=entry["url"],
+            content=entry["summary"][:500],
+            publish_time=entry["pub"],
             tags=tags.copy(),
             section=section,
         ))
 
-    # 尝试 Atom
-    if not items:
-        for entry in root.findall(".//{http://www.w3.org/2005/Atom}entry"):
-            title = (entry.findtext("{http://www.w3.org/2005/Atom}title") or "").strip()
-            link_el = entry.find("{http://www.w3.org/2005/Atom}link")
-            url = (link_el.get("href") if link_el is not None else "") or ""
-            if not title or not url:
-                continue
-            summary = (entry.findtext("{http://www.w3.org/2005/Atom}summary") or "").strip()
-            pub = _parse_date(entry.findtext("{http://www.w3.org/2005/Atom}updated"))
-            items.append(NewsItem(
-                source_platform=platform,
-                title=title,
-                url=url,
-                content=summary[:500],
-                publish_time=pub,
-                tags=tags.copy(),
-                section=section,
-            ))
+    if head_guid is None:
+        return items, watermark, stopped
+    return items, {"pub_time": newest, "guid": head_guid}, stopped
+
+
+def _parse_rss_feed(xml_text: str, platform: str, section: str, tags: list[str]) -> list[NewsItem]:
+    """解析标准 RSS 2.0 / Atom feed（整段文本，无水位线）"""
+    return parse_feed(io.StringIO(xml_text), platform, section, tags)[0]
+
+
+def _load_watermark(url: str) -> dict | None:
+    db = SessionLocal()
+    try:
+        wm = db.query(FeedWatermark).filter(FeedWatermark.url_hash == url_hash(url)).first()
+        if wm is None:
+            return None
+        return {"pub_time": wm.last_pub_time, "guid": wm.last_guid}
+    finally:
+        db.close()
+
+
+def _save_watermark(url: str, watermark: dict):
+    db = SessionLocal()
+    try:
+        h = url_hash(url)
+        wm = db.query(FeedWatermark).filter(FeedWatermark.url_hash == h).first()
+        if wm is None:
+            wm = FeedWatermark(url_hash=h, url=url[:1000])
+            db.add(wm)
+        wm.last_pub_time = watermark.get("pub_time")
+        wm.last_guid = (watermark.get("guid") or "")[:500]
+        wm.updated_at = datetime.now()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class _HashingReader:
+    """包装响应原始流：边读边算 md5 与字节数"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.md5 = hashlib.md5()
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.raw.read(size)
+        self.md5.update(chunk)
+        self.bytes_read += len(chunk)
+        return chunk
 
-    return items
+
+class RssFeedCrawler(BaseCrawler):
+    """单个 RSS 源，并发引擎按源调度，互不阻塞"""
+
+    platform = "rss"
+    section  = "mixed"
+    poll_bounds = (15, 240)
+
+    def __init__(self, source: dict):
+        super().__init__()
+        self.source   = source
+        self.platform = source["platform"]
+        self.section  = source["section"]
+        self.poll_bounds = source.get("poll_bounds", self.poll_bounds)
+        self._pending_watermark: dict | None = None
+
+    @property
+    def source_id(self) -> str:
+        return f"rss:{self.platform}"
+
+    def fetch(self) -> list[NewsItem]:
+        source = self.source
+        url = source["url"]
+        self.logger.info(f"  拉取 {source['name']} ({url})")
+        watermark = _load_watermark(url)
+        resp = self.get(url, timeout=15, conditional=True, stream=True)
+        reader = None
+        try:
+            resp.raw.decode_content = True
+            reader = _HashingReader(resp.raw)
+            items, new_watermark, stopped = parse_feed(
+                reader,
+                platform=source["platform"],
+                section=source["section"],
+                tags=source["tags"],
+                watermark=watermark,
+                ordered=source.get("ordered", True),
+            )
+        finally:
+            resp.close()
+            if reader is not None:
+                self.metrics.bytes += reader.bytes_read
+
+        self._pending_watermark = new_watermark
+        if not stopped:
+            # 读完了整个正文：md5 与上次相同说明 feed 未变，本批条目都已入过库
+            self.finish_stream(url, reader.md5.hexdigest())
+        self.logger.info(
+            f"  ✓ {source['name']} 新增候选 {len(items)} 条"
+            + ("（已到达水位线，提前停止）" if stopped else "")
+        )
+        return items
+
+    def commit_state(self):
+        super().commit_state()
+        if self._pending_watermark:
+            try:
+                _save_watermark(self.source["url"], self._pending_watermark)
+                self._pending_watermark = None
+            except Exception as e:
+                self.logger.warning(f"[{self.source_id}] 保存水位线失败: {e}")
 
 
 class RssCrawler(BaseCrawler):
-    """RSS 通用爬虫，一次运行拉取所有配置的 RSS 源"""
+    """RSS 通用爬虫，一次运行并发拉取所有配置的 RSS 源"""
 
     platform = "rss_multi"
     section  = "mixed"
 
+    def __init__(self):
+        super().__init__()
+        self._fetched_feeds: list[RssFeedCrawler] = []
+
+    @classmethod
+    def expand(cls) -> list[BaseCrawler]:
+        """并发引擎调用：拆成每个 RSS 源一个任务"""
+        return [RssFeedCrawler(source) for source in RSS_SOURCES]
+
     def fetch(self) -> list[NewsItem]:
         all_items: list[NewsItem] = []
-        for source in RSS_SOURCES:
-            self.logger.info(f"  拉取 {source['name']} ({source['url']})")
-            try:
-                resp = self.get(source["url"], timeout=15)
-                items = _parse_rss_feed(
-                    resp.text,
-                    platform=source["platform"],
-                    section=source["section"],
-                    tags=source["tags"],
-                )
-                self.logger.info(f"  ✓ {source['name']} 获取 {len(items)} 条")
-                all_items.extend(items)
-            except Exception as e:
-                self.logger.warning(f"  ✗ {source['name']} 失败: {e}")
+        feeds = self.expand()
+        self._fetched_feeds = []
+        with ThreadPoolExecutor(max_workers=len(feeds) or 1) as pool:
+            futures = {pool.submit(feed.fetch): feed for feed in feeds}
+            for future in as_completed(futures):
+                feed = futures[future]
+                try:
+                    all_items.extend(future.result())
+                except NotModified as e:
+                    self.logger.info(f"  - {feed.source['name']} {e}")
+                except Exception as e:
+                    self.logger.warning(f"  ✗ {feed.source['name']} 失败: {e}")
+                    continue
+                # 各源的校验值 / 水位线随本次整体入库一起落盘
+                self._fetched_feeds.append(feed)
         return all_items
 
+    def commit_state(self):
+        super().commit_state()
+        for feed in self._fetched_feeds:
+            feed.commit_state()
+
 
 # ─────────────────────────────────────────
 # 单独运行测试
@@ -0,0 +1,217 @@
+"""
+爬取遥测
+每次爬取写一行 crawl_runs，每个数据源写一行 crawl_source_runs：
+DNS / 建连 / TTFB / 总耗时、下载字节、解析耗时、解析条数、入库条数、错误类型。
+查询侧按源、按天给出 p50 / p95，用来找出拖慢爬取窗口的源，以及验证优化是否见效。
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from database import SessionLocal
+from models import CrawlRun, CrawlSourceRun
+
+# 可查询分位数的耗时字段
+LATENCY_METRICS = ("total_ms", "dns_ms", "connect_ms", "ttfb_ms", "parse_ms")
+
+
+def save_report(report, trigger: str = "manual") -> int:
+    """把 CrawlReport 写入 crawl_runs / crawl_source_runs，返回 run_id"""
+    db = SessionLocal()
+    try:
+        run = CrawlRun(
+            trigger=trigger,
+            started_at=report.started_at,
+            finished_at=report.started_at + timedelta(seconds=report.elapsed),
+            elapsed_ms=report.elapsed * 1000,
+            sources_total=len(report.sources),
+            sources_failed=len(report.failed),
+            items_inserted=report.total_inserted,
+        )
+        run.sources = [
+            CrawlSourceRun(
+                source_id=s.source,
+                started_at=report.started_at,
+                requests=s.requests,
+                dns_ms=s.dns_ms,
+                connect_ms=s.connect_ms,
+                ttfb_ms=s.ttfb_ms,
+                total_ms=s.elapsed * 1000,
+                parse_ms=s.parse_ms,
+                bytes=s.bytes,
+                items_parsed=s.fetched,
+                items_inserted=s.inserted,
+                not_modified=int(s.not_modified),
+                circuit_open=int(s.circuit_open),
+                error_class=s.error_class,
+                error=(s.error or "")[:500] or None,
+            )
+            for s in report.sources
+        ]
+        db.add(run)
+        db.commit()
+        return run.id
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """线性插值分位数，q ∈ [0, 100]"""
+    if not values:
+        return None
+    data = sorted(values)
+    pos = (len(data) - 1) * q / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return data[lo] + (data[hi] - data[lo]) * (pos - lo)
+
+
+def _fmt(d: datetime | None) -> str | None:
+    return d.strftime("%Y-%m-%d %H:%M:%S") if d else None
+
+
+def _round(v: float | None) -> float | None:
+    return round(v, 1) if v is not None else None
+
+
+def run_to_dict(run: CrawlRun) -> dict:
+    return {
+        "id":             run.id,
+        "trigger":        run.trigger,
+        "started_at":     _fmt(run.started_at),
+        "finished_at":    _fmt(run.finished_at),
+        "elapsed_ms":     _round(run.elapsed_ms),
+        "sources_total":  run.sources_total,
+        "sources_failed": run.sources_failed,
+        "items_inserted": run.items_inserted,
+    }
+
+
+def source_run_to_dict(row: CrawlSourceRun) -> dict:
+    return {
+        "source":         row.source_id,
+        "requests":       row.requests,
+        "dns_ms":         _round(row.dns_ms),
+        "connect_ms":     _round(row.connect_ms),
+        "ttfb_ms":        _round(row.ttfb_ms),
+        "total_ms":       _round(row.total_ms),
+        "parse_ms":       _round(row.parse_ms),
+        "bytes":          row.bytes,
+        "items_parsed":   row.items_parsed,
+        "items_inserted": row.items_inserted,
+        "not_modified":   bool(row.not_modified),
+        "circuit_open":   bool(row.circuit_open),
+        "error_class":    row.error_class,
+        "error":          row.error,
+    }
+
+
+def list_runs(limit: int = 50, trigger: str | None = None) -> list[dict]:
+    db = SessionLocal()
+    try:
+        q = db.query(CrawlRun)
+        if trigger:
+            q = q.filter(CrawlRun.trigger == trigger)
+        return [run_to_dict(r) for r in q.order_by(CrawlRun.id.desc()).limit(limit)]
+    finally:
+        db.close()
+
+
+def get_run(run_id: int) -> dict | None:
+    db = SessionLocal()
+    try:
+        run = db.query(CrawlRun).filter(CrawlRun.id == run_id).first()
+        if run is None:
+            return None
+        data = run_to_dict(run)
+        # 最慢的源排在前面
+        data["sources"] = [
+            source_run_to_dict(s)
+            for s in sorted(run.sources, key=lambda s: s.total_ms or 0, reverse=True)
+        ]
+        return data
+    finally:
+        db.close()
+
+
+def latency_stats(
+    days: int = 7,
+    metric: str = "total_ms",
+    source_id: str | None = None,
+    bucket: str = "day",
+) -> list[dict]:
+    """
+    按源、按时间桶（day / hour）统计耗时 p50 / p95。
+    只统计实际发起了抓取的记录（熔断跳过的不计）；失败的抓取同样计入，超时本身就是慢。
+    """
+    if metric not in LATENCY_METRICS:
+        raise ValueError(f"不支持的指标 {metric}，可选：{', '.join(LATENCY_METRICS)}")
+    fmt = "%Y-%m-%d %H:00" if bucket == "hour" else "%Y-%m-%d"
+    since = datetime.now() - timedelta(days=days)
+
+    db = SessionLocal()
+    try:
+        column = getattr(CrawlSourceRun, metric)
+        q = (
+            db.query(CrawlSourceRun.source_id, CrawlSourceRun.started_at, column, CrawlSourceRun.error_class)
+            .filter(CrawlSourceRun.started_at >= since, CrawlSourceRun.circuit_open == 0)
+        )
+        if source_id:
+            q = q.filter(CrawlSourceRun.source_id == source_id)
+        rows = q.all()
+    finally:
+        db.close()
+
+    groups: dict[tuple[str, str], list] = defaultdict(list)
+    for sid, started_at, value, error_class in rows:
+        if value is not None:
+            groups[(sid, started_at.strftime(fmt))].append((value, error_class))
+
+    stats = []
+    for (sid, period), samples in sorted(groups.items()):
+        values = [v for v, _ in samples]
+        stats.append({
+            "source": sid,
+            "period": period,
+            "runs":   len(values),
+            "errors": sum(1 for _, err in samples if err),
+            "p50":    _round(percentile(values, 50)),
+            "p95":    _round(percentile(values, 95)),
+            "max":    _round(max(values)),
+        })
+    return stats
+
+
+def slowest_sources(days: int = 1, metric: str = "total_ms", limit: int = 10) -> list[dict]:
+    """整段时间合并后按 p95 从高到低排序，直接回答「谁在拖慢爬取窗口」"""
+    if metric not in LATENCY_METRICS:
+        raise ValueError(f"不支持的指标 {metric}，可选：{', '.join(LATENCY_METRICS)}")
+    since = datetime.now() - timedelta(days=days)
+    merged: dict[str, list[float]] = defaultdict(list)
+    db = SessionLocal()
+    try:
+        column = getattr(CrawlSourceRun, metric)
+        for sid, value in (
+            db.query(CrawlSourceRun.source_id, column)
+            .filter(CrawlSourceRun.started_at >= since, CrawlSourceRun.circuit_open == 0)
+        ):
+            if value is not None:
+                merged[sid].append(value)
+    finally:
+        db.close()
+
+    ranked = [
+        {
+            "source": sid,
+            "runs":   len(values),
+            "p50":    _round(percentile(values, 50)),
+            "p95":    _round(percentile(values, 95)),
+        }
+        for sid, values in merged.items()
+    ]
+    ranked.sort(key=lambda r: r["p95"] or 0, reverse=True)
+    return ranked[:limit]
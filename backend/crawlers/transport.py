@@ -0,0 +1,207 @@
+"""
+进程级共享 HTTP 传输层
+所有爬虫共用同一个 HTTPAdapter（即同一组 urllib3 连接池）：
+- 按 host 维护连接池，keep-alive 复用 TCP / TLS 连接，跨爬虫、跨轮次都不重复握手
+- 5xx / 连接失败 / 读超时自动重试，指数退避 + 随机抖动
+- gzip / deflate 解压；装了 brotli 时同时声明 br
+- 连接超时与读超时分开设置
+- 记录新建连接的 DNS 解析、TCP+TLS 建连耗时（写入当前线程的 RequestTiming）
+每个爬虫仍持有自己的 requests.Session（cookie / header 互不干扰），只是挂载共享的 adapter。
+"""
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # noqa: F401  urllib3 检测到即可解码 br
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    "Accept-Encoding": _ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+CONNECT_TIMEOUT = float(os.getenv("CRAWL_CONNECT_TIMEOUT", "5"))
+POOL_HOSTS      = int(os.getenv("CRAWL_POOL_HOSTS", "32"))     # 缓存多少个 host 的连接池
+POOL_PER_HOST   = int(os.getenv("CRAWL_POOL_PER_HOST", "4"))   # 每个 host 保持的连接数
+RETRY_TOTAL     = int(os.getenv("CRAWL_RETRY_TOTAL", "2"))
+RETRY_BACKOFF   = float(os.getenv("CRAWL_RETRY_BACKOFF", "0.5"))
+RETRY_JITTER    = float(os.getenv("CRAWL_RETRY_JITTER", "0.5"))
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_lock = threading.Lock()
+_adapter: HTTPAdapter | None = None
+
+
+# ─────────────────────────────────────────
+# 连接阶段计时
+# ─────────────────────────────────────────
+@dataclass
+class RequestTiming:
+    """一次 GET（含重试）在连接阶段的耗时；复用 keep-alive 连接时均为 0"""
+    dns_ms: float = 0.0
+    connect_ms: float = 0.0   # TCP 建连 + TLS 握手
+
+
+_local = threading.local()
+
+
+def start_timing() -> RequestTiming:
+    """在当前线程开始记录，随后该线程新建的连接会把耗时累加进来"""
+    _local.timing = RequestTiming()
+    return _local.timing
+
+
+def stop_timing():
+    _local.timing = None
+
+
+def _current_timing() -> RequestTiming | None:
+    return getattr(_local, "timing", None)
+
+
+class _TimedConnectionMixin:
+    """
+    先单独解析域名（计入 dns_ms），再直接连解析出的 IP，避免重复解析。
+    依赖 urllib3 2.x 的私有属性 HTTPConnection._new_conn / _dns_host（requirements.txt 限定了版本范围，
+    tests/test_transport.py 在钩子失效时会失败）；万一缺少 _dns_host，退回 urllib3 自己的建连，只是不计 DNS 耗时。
+    """
+
+    def _new_conn(self):
+        timing = _current_timing()
+        host = getattr(self, "_dns_host", None)
+        if host is None:
+            return super()._new_conn()
+        t0 = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        if timing is not None:
+            timing.dns_ms += (time.perf_counter() - t0) * 1000
+
+        addrs = list(dict.fromkeys(info[4][0] for info in infos))
+        last_error = None
+        try:
+            for addr in addrs:
+                self._dns_host = addr
+                try:
+                    return super()._new_conn()
+                except Exception as e:  # 依次尝试下一个地址（如 IPv6 不通退回 IPv4）
+                    last_error = e
+            raise last_error
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        timing = _current_timing()
+        dns_before = timing.dns_ms if timing is not None else 0.0
+        t0 = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            if timing is not None:
+                elapsed = (time.perf_counter() - t0) * 1000
+                timing.connect_ms += max(elapsed - (timing.dns_ms - dns_before), 0.0)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """连接池使用带计时的连接类"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http":  _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def build_retry() -> Retry:
+    """第 n 次重试前等待 backoff * 2^(n-1) + random(0, jitter) 秒"""
+    return Retry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=RETRY_TOTAL,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        backoff_jitter=RETRY_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # 重试用尽后返回最后一次响应，由 raise_for_status 处理
+    )
+
+
+def build_adapter() -> HTTPAdapter:
+    return TimedHTTPAdapter(
+        pool_connections=POOL_HOSTS,
+        pool_maxsize=POOL_PER_HOST,
+        max_retries=build_retry(),
+    )
+
+
+def get_adapter() -> HTTPAdapter:
+    """进程内唯一的 adapter，首次使用时创建"""
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            _adapter = build_adapter()
+        return _adapter
+
+
+def set_adapter(adapter: HTTPAdapter | None):
+    """替换共享 adapter（录制/回放、测试用）；传 None 恢复默认"""
+    global _adapter
+    with _lock:
+        _adapter = adapter
+
+
+def new_session() -> requests.Session:
+    """创建挂载共享连接池的 Session"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = get_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def request_timeout(read_timeout: float) -> tuple[float, float]:
+    """(连接超时, 读超时)；连接阶段不应比整个读超时还长"""
+    return min(CONNECT_TIMEOUT, read_timeout), read_timeout
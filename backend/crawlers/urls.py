@@ -0,0 +1,96 @@
+"""
+URL 规范化与去重键
+同一条新闻常以不同形式出现：http/https、带 utm 等追踪参数、带 #锚点、
+微博/百度热搜的查询词编码方式不同（#话题# / %23话题%23 / 二次编码）。
+先规范化再取 md5，得到定长 32 位的去重键 RawNews.url_hash。
+"""
+from __future__ import annotations
+
+import hashlib
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit
+
+# 通用追踪参数（精确匹配）
+TRACKING_PARAMS = {
+    "spm", "from", "fr", "ref", "refer", "referer", "source", "src",
+    "share_from", "share_token", "sharesource", "wfr", "sudaref",
+    "display", "retcode", "isappinstalled", "scene", "clicktime",
+    "fbclid", "gclid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+}
+# 以这些前缀开头的参数一律视为追踪参数
+TRACKING_PREFIXES = ("utm_", "rsv_", "hmsr", "hmpl", "hmcu", "hmkw", "hmci")
+
+# 搜索类落地页只有查询词有意义，其余参数全部丢弃
+# host -> (path, {原参数名: 规范参数名})
+SEARCH_PAGES: dict[str, tuple[str, dict[str, str]]] = {
+    "s.weibo.com":   ("/weibo", {"q": "q"}),
+    "m.weibo.cn":    ("/search", {"q": "q"}),
+    "www.baidu.com": ("/s", {"wd": "wd", "word": "wd"}),
+    "m.baidu.com":   ("/s", {"wd": "wd", "word": "wd"}),
+}
+# 镜像域名归一
+HOST_ALIASES = {
+    "m.baidu.com": "www.baidu.com",
+    "baidu.com":   "www.baidu.com",
+}
+
+
+def _unquote_fully(value: str, rounds: int = 3) -> str:
+    """反复解码，兼容二次编码的查询词"""
+    for _ in range(rounds):
+        decoded = unquote(value)
+        if decoded == value:
+            break
+        value = decoded
+    return value
+
+
+def _is_tracking(key: str) -> bool:
+    k = key.lower()
+    return k in TRACKING_PARAMS or k.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    返回用于去重的规范形式（不含协议）：//host/path?sorted_query
+    - 忽略协议差异、默认端口、#锚点、结尾斜杠
+    - 去除追踪参数，剩余参数排序并统一编码
+    - 微博/百度搜索页只保留查询词，并去掉话题两侧的 #
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "//" not in url:
+        url = f"//{url}"
+    parts = urlsplit(url)
+    # 热搜链接里的话题常以未编码的 #话题# 出现，不能按锚点截断
+    if (parts.hostname or "").lower() in SEARCH_PAGES:
+        parts = urlsplit(url, allow_fragments=False)
+
+    host = (parts.hostname or "").lower().rstrip(".")
+    host = HOST_ALIASES.get(host, host)
+    port = parts.port
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+
+    path = quote(_unquote_fully(parts.path), safe="/%:@!$&'()*+,;=-._~")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    path = path or "/"
+
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    search = SEARCH_PAGES.get((parts.hostname or "").lower())
+    if search and path == search[0]:
+        keep = search[1]
+        params = [
+            (keep[k], _unquote_fully(v).strip().strip("#").strip())
+            for k, v in params if k in keep
+        ]
+    else:
+        params = [(k, v) for k, v in params if not _is_tracking(k)]
+
+    query = urlencode(sorted(params), quote_via=quote)
+    return f"//{netloc}{path}" + (f"?{query}" if query else "")
+
+
+def url_hash(url: str) -> str:
+    """规范化 URL 的 md5（32 位十六进制），即 RawNews.url_hash"""
+    return hashlib.md5(canonicalize_url(url).encode("utf-8")).hexdigest()
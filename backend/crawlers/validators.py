@@ -0,0 +1,85 @@
+"""
+HTTP 条件请求校验值存储
+按 URL 持久化 ETag / Last-Modified / 正文 md5：
+- 下次请求带上 If-None-Match / If-Modified-Since，服务器可直接回 304
+- 服务器不支持条件请求时，正文 md5 未变同样视为未更新，跳过解析
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+
+from database import SessionLocal
+from models import HttpValidator
+
+try:
+    from crawlers.urls import url_hash
+except ImportError:
+    from urls import url_hash
+
+
+class NotModified(Exception):
+    """资源自上次抓取以来未变化（304 或正文 md5 相同），无需解析"""
+
+    def __init__(self, url: str, reason: str = "304"):
+        super().__init__(f"{url} 未变化（{reason}）")
+        self.url = url
+        self.reason = reason
+
+
+def body_hash(content: bytes) -> str:
+    return hashlib.md5(content).hexdigest()
+
+
+def load_validator(url: str) -> dict | None:
+    """读取某 URL 上次成功入库时的校验值"""
+    db = SessionLocal()
+    try:
+        v = db.query(HttpValidator).filter(HttpValidator.url_hash == url_hash(url)).first()
+        if v is None:
+            return None
+        return {"etag": v.etag, "last_modified": v.last_modified, "body_hash": v.body_hash}
+    finally:
+        db.close()
+
+
+def conditional_headers(validator: dict | None) -> dict:
+    headers = {}
+    if validator:
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+    return headers
+
+
+def save_validators(records: dict[str, dict]):
+    """批量写入 {url: {etag, last_modified, body_hash}}，已存在则更新"""
+    if not records:
+        return
+    db = SessionLocal()
+    try:
+        keys = {url_hash(url): url for url in records}
+        rows = {
+            v.url_hash: v
+            for v in db.query(HttpValidator).filter(HttpValidator.url_hash.in_(list(keys)))
+        }
+        now = datetime.now()
+        for h, url in keys.items():
+            rec = records[url]
+            v = rows.get(h)
+            if v is None:
+                v = HttpValidator(url_hash=h, url=url[:1000])
+                db.add(v)
+            v.etag = rec.get("etag")
+            v.last_modified = rec.get("last_modified")
+            # 流式读取提前结束时没有完整正文 md5，沿用旧值
+            if rec.get("body_hash"):
+                v.body_hash = rec["body_hash"]
+            v.updated_at = now
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
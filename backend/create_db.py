@@ -1,10 +1,174 @@
-from sqlalchemy import create_engine
-from database import Base, engine
+"""
+初始化 / 升级数据库表
+create_all 只会建新表，不会给已有表加列，这里补一个轻量迁移：
+- 为已有表补齐模型中新增的列与索引
+- 回填 raw_news.url_hash，并合并规范化 URL 相同的重复行
+- 去掉 raw_news.url 上旧的（超长 VARCHAR）唯一索引，去重改由 url_hash 负责
+- 旧数据的 story_id 默认取 url_hash 前 16 位（各自成一个故事）
+- 建 titan_insights (news_id, persona) 唯一索引前，删掉重复的洞察（保留 id 最小的一条）
+"""
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import Index, func, inspect, text, update, bindparam
+
+from database import Base, engine, SessionLocal
 from models import RawNews, DailyReport, TitanInsight
 
+logger = logging.getLogger("create_db")
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def _add_missing_columns():
+    """ALTER TABLE ADD COLUMN：补齐模型里有、库里没有的列"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            have = {c["name"] for c in inspector.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in have:
+                    continue
+                col_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}"))
+                logger.info(f"[Migrate] {table.name} 新增列 {col.name} {col_type}")
+
+
+def _create_missing_indexes():
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _drop_legacy_url_index():
+    """旧版本在 raw_news.url(VARCHAR 1000) 上建了唯一索引，url_hash 就位后删除"""
+    inspector = inspect(engine)
+    if "raw_news" not in inspector.get_table_names():
+        return
+    table = RawNews.__table__
+    for idx in inspector.get_indexes("raw_news"):
+        if idx["column_names"] == ["url"] and idx["name"]:
+            Index(idx["name"], table.c.url).drop(bind=engine)
+            logger.info(f"[Migrate] 删除旧索引 raw_news.{idx['name']}")
+
+
+def _backfill_url_hash():
+    """
+    为旧数据计算 url_hash。规范化后撞键的行视为重复：
+    保留 id 最小的一条，把 titan_insights 指向它，再删除其余行。
+    """
+    from crawlers.urls import url_hash
+
+    db = SessionLocal()
+    try:
+        seen = {h: i for i, h in db.query(RawNews.id, RawNews.url_hash).filter(RawNews.url_hash.isnot(None))}
+        filled, removed = 0, 0
+        last_id = 0
+        while True:
+            rows = (
+                db.query(RawNews.id, RawNews.url)
+                .filter(RawNews.url_hash.is_(None), RawNews.id > last_id)
+                .order_by(RawNews.id)
+                .limit(BACKFILL_CHUNK_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            updates, duplicates = [], {}
+            for nid, url in rows:
+                h = url_hash(url or f"raw_news:{nid}")
+                if h in seen:
+                    duplicates[nid] = seen[h]
+                else:
+                    seen[h] = nid
+                    updates.append({"_id": nid, "_hash": h})
+
+            if updates:
+                db.execute(
+                    update(RawNews.__table__)
+                    .where(RawNews.__table__.c.id == bindparam("_id"))
+                    .values(url_hash=bindparam("_hash")),
+                    updates,
+                )
+            for dup_id, keep_id in duplicates.items():
+                db.query(TitanInsight).filter(TitanInsight.news_id == dup_id).update(
+                    {TitanInsight.news_id: keep_id}, synchronize_session=False
+                )
+            if duplicates:
+                db.query(RawNews).filter(RawNews.id.in_(list(duplicates))).delete(synchronize_session=False)
+            db.commit()
+            filled += len(updates)
+            removed += len(duplicates)
+
+        if filled or removed:
+            logger.info(f"[Migrate] url_hash 回填 {filled} 条，合并重复 {removed} 条")
+    finally:
+        db.close()
+
+
+def _backfill_story_id():
+    with engine.begin() as conn:
+        table = RawNews.__table__
+        res = conn.execute(
+            update(table)
+            .where(table.c.story_id.is_(None), table.c.url_hash.isnot(None))
+            .values(story_id=func.substr(table.c.url_hash, 1, 16))
+        )
+        if res.rowcount:
+            logger.info(f"[Migrate] story_id 回填 {res.rowcount} 条")
+
+
+def _dedupe_insights():
+    """
+    旧版流水线可能为同一 (news_id, persona) 写入多条洞察，_backfill_url_hash 合并新闻时也会产生重复；
+    唯一索引建好之前先去重，保留 id 最小的一条。索引已存在时不再检查。
+    """
+    inspector = inspect(engine)
+    if "titan_insights" not in inspector.get_table_names():
+        return
+    if any(idx["name"] == "ix_titan_insights_news_persona" for idx in inspector.get_indexes("titan_insights")):
+        return
+
+    db = SessionLocal()
+    try:
+        groups = (
+            db.query(TitanInsight.news_id, TitanInsight.persona, func.min(TitanInsight.id))
+            .filter(TitanInsight.news_id.isnot(None), TitanInsight.persona.isnot(None))
+            .group_by(TitanInsight.news_id, TitanInsight.persona)
+            .having(func.count(TitanInsight.id) > 1)
+            .all()
+        )
+        removed = 0
+        for news_id, persona, keep_id in groups:
+            removed += (
+                db.query(TitanInsight)
+                .filter(TitanInsight.news_id == news_id, TitanInsight.persona == persona, TitanInsight.id != keep_id)
+                .delete(synchronize_session=False)
+            )
+        db.commit()
+        if removed:
+            logger.info(f"[Migrate] titan_insights 删除重复洞察 {removed} 条（{len(groups)} 组）")
+    finally:
+        db.close()
+
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _backfill_url_hash()
+    _backfill_story_id()
+    _dedupe_insights()
+    _create_missing_indexes()
+    _drop_legacy_url_index()
+
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     create_tables()
     print("Tables created successfully.")
@@ -5,11 +5,12 @@ from contextlib import asynccontextmanager
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from database import Base, engine
-from routers import chat, crawler, news, pipeline, reports
+from create_db import create_tables
+from routers import chat, crawler, insights, llm, news, pipeline, reports
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,16 +18,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger("main")
 
-Base.metadata.create_all(bind=engine)
+create_tables()
 
 # ── 定时调度器 ────────────────────────────────────────────
 _scheduler = BackgroundScheduler(timezone="Asia/Shanghai")
 
 
-def _crawl_job():
-    """定时爬虫任务"""
-    from routers.crawler import _run_in_background
-    _run_in_background()
+def _poll_job():
+    """自适应轮询：每分钟检查一次，只抓到期的数据源（手动全量爬取进行中时跳过，见 CRAWL_LOCK）"""
+    try:
+        from crawlers.polling import run_due_sources
+        run_due_sources()
+    except Exception as e:
+        logger.error(f"自适应轮询失败: {e}")
 
 
 def _pipeline_job():
@@ -38,19 +42,20 @@ def _pipeline_job():
         logger.error(f"定时简报生成失败: {e}")
 
 
-# 04:00 全量爬取
-_scheduler.add_job(_crawl_job, CronTrigger(hour=4,  minute=0), id="crawl_04", replace_existing=True)
-# 06:00 AI 简报（爬取完成后）
+# 每分钟 tick：各数据源按自己的间隔轮询（热搜几分钟一次，政府网站几小时一次）
+_scheduler.add_job(
+    _poll_job, IntervalTrigger(minutes=1), id="adaptive_poll",
+    replace_existing=True, max_instances=1, coalesce=True,
+)
+# 06:00 AI 简报
 _scheduler.add_job(_pipeline_job, CronTrigger(hour=6, minute=0), id="pipeline_06", replace_existing=True)
-# 12:00 午间补充爬取
-_scheduler.add_job(_crawl_job, CronTrigger(hour=12, minute=0), id="crawl_12", replace_existing=True)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 启动时开始调度
     _scheduler.start()
-    logger.info("✅ 定时调度器已启动：04:00 爬取 / 06:00 AI简报 / 12:00 补充爬取")
+    logger.info("✅ 定时调度器已启动：自适应轮询爬取 / 06:00 AI简报")
     yield
     # 关闭时停止调度
     _scheduler.shutdown(wait=False)
@@ -73,6 +78,8 @@ app.include_router(reports.router)
 app.include_router(chat.router)
 app.include_router(pipeline.router)
 app.include_router(crawler.router)
+app.include_router(llm.router)
+app.include_router(insights.router)
 
 
 @app.get("/")
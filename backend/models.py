@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Float, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -10,12 +10,18 @@ class RawNews(Base):
     source_platform = Column(String(50), nullable=False)
     title = Column(String(500), nullable=False)
     content = Column(Text)
-    url = Column(String(1000), unique=True, index=True)
+    url = Column(String(1000))
+    url_hash = Column(String(32), unique=True, index=True) # md5(规范化 url)，去重键
+    story_id = Column(String(16), index=True) # 近似重复归并后的故事 ID，见 crawlers/dedup.py
     publish_time = Column(DateTime)
     crawl_time = Column(DateTime, server_default=func.now())
     author = Column(String(100))
     tags = Column(JSON)
-    status = Column(Integer, default=0) # 0: Unprocessed, 1: Processed
+    status = Column(Integer, default=0, index=True) # 0: Unprocessed, 1: Processed
+    section = Column(String(20), index=True) # 分类维度 policy/global/market/...，见 ai/pipeline.py
+    section_confidence = Column(Float)
+    section_source = Column(String(10)) # llm / local（本地模型）/ story（同故事继承）/ rule（规则兜底，status 仍为 0，AI 多次未覆盖后定稿为 1）
+    classify_attempts = Column(Integer, default=0) # AI 有回复但未覆盖该条的运行次数，见 ai/pipeline.py CLASSIFY_MAX_ATTEMPTS
 
     insights = relationship("TitanInsight", back_populates="news")
 
@@ -27,16 +33,166 @@ class DailyReport(Base):
     summary_markdown = Column(Text) # MEDIUMTEXT in MySQL, Text in SQLite
     macro_score = Column(Integer)
     tech_score = Column(Integer)
+    status = Column(String(16)) # generating（流式生成中，summary_markdown 为已生成部分）/ done / failed；旧数据为 NULL 视同 done
     created_at = Column(DateTime, server_default=func.now())
 
 class TitanInsight(Base):
     __tablename__ = "titan_insights"
+    __table_args__ = (
+        Index("ix_titan_insights_news_persona", "news_id", "persona", unique=True), # 每条新闻每位大佬一条，见 ai/insights.py
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     news_id = Column(Integer, ForeignKey("raw_news.id"))
     persona = Column(String(50)) # 'li_ka_shing', 'elon_musk'
     insight_text = Column(Text)
-    sentiment_score = Column(Float)
-    relevance_score = Column(Float)
+    sentiment_score = Column(Float) # -1（利空）~ 1（利好）
+    relevance_score = Column(Float) # 0 ~ 1，该新闻与这位大佬关注领域的相关度
+    created_at = Column(DateTime, index=True)
 
     news = relationship("RawNews", back_populates="insights")
+
+class HttpValidator(Base):
+    __tablename__ = "http_validators"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url_hash = Column(String(32), unique=True, index=True, nullable=False) # md5(规范化 url)
+    url = Column(String(1000))
+    etag = Column(String(255))
+    last_modified = Column(String(64))
+    body_hash = Column(String(32)) # 上次正文 md5
+    updated_at = Column(DateTime)
+
+class FeedWatermark(Base):
+    __tablename__ = "feed_watermarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url_hash = Column(String(32), unique=True, index=True, nullable=False) # md5(规范化 feed url)
+    url = Column(String(1000))
+    last_pub_time = Column(DateTime) # 已入库条目中最新的发布时间（UTC）
+    last_guid = Column(String(500)) # 上次 feed 头部条目的 guid / 链接
+    updated_at = Column(DateTime)
+
+class SourceHealth(Base):
+    __tablename__ = "source_health"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_id = Column(String(100), unique=True, index=True, nullable=False) # 'weibo', 'rss:reuters'
+    state = Column(String(10), default="closed") # closed / open / half_open
+    consecutive_failures = Column(Integer, default=0)
+    total_runs = Column(Integer, default=0)
+    total_failures = Column(Integer, default=0)
+    last_success = Column(DateTime)
+    last_failure = Column(DateTime)
+    last_error = Column(String(500))
+    avg_latency_ms = Column(Float) # 成功抓取耗时的指数滑动平均
+    open_until = Column(DateTime) # 熔断冷却截止时间
+    poll_interval = Column(Float) # 当前轮询间隔（秒），见 crawlers/polling.py
+    last_poll_at = Column(DateTime)
+    next_poll_at = Column(DateTime, index=True)
+    new_item_rate = Column(Float) # 新条目产出速率（条/小时）的指数滑动平均
+    unchanged_polls = Column(Integer, default=0) # 连续无新增的轮询次数
+    updated_at = Column(DateTime)
+
+
+class CrawlRun(Base):
+    __tablename__ = "crawl_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trigger = Column(String(20)) # poll / manual / schedule / cli
+    started_at = Column(DateTime, index=True)
+    finished_at = Column(DateTime)
+    elapsed_ms = Column(Float)
+    sources_total = Column(Integer, default=0)
+    sources_failed = Column(Integer, default=0)
+    items_inserted = Column(Integer, default=0)
+
+    sources = relationship("CrawlSourceRun", back_populates="run", cascade="all, delete-orphan")
+
+
+class CrawlSourceRun(Base):
+    __tablename__ = "crawl_source_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("crawl_runs.id"), index=True, nullable=False)
+    source_id = Column(String(100), index=True, nullable=False)
+    started_at = Column(DateTime, index=True) # 冗余自 crawl_runs，便于按时间查单个源
+    requests = Column(Integer, default=0)
+    dns_ms = Column(Float)
+    connect_ms = Column(Float) # TCP 建连 + TLS 握手
+    ttfb_ms = Column(Float)
+    total_ms = Column(Float) # 抓取 + 解析总耗时（不含入库）
+    parse_ms = Column(Float)
+    bytes = Column(Integer, default=0)
+    items_parsed = Column(Integer, default=0)
+    items_inserted = Column(Integer, default=0)
+    not_modified = Column(Integer, default=0) # 0/1
+    circuit_open = Column(Integer, default=0) # 0/1
+    error_class = Column(String(100))
+    error = Column(String(500))
+
+    run = relationship("CrawlRun", back_populates="sources")
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, index=True, nullable=False) # sha256(模型, 系统提示词, 用户消息, temperature)
+    model = Column(String(100))
+    call_site = Column(String(50), index=True) # classify / brief / ask_titan ...
+    response = Column(Text) # MEDIUMTEXT in MySQL, Text in SQLite
+    created_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
+    last_hit_at = Column(DateTime, index=True) # 超出容量时按最近命中时间淘汰
+    hits = Column(Integer, default=0)
+
+
+class LLMCall(Base):
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, index=True)
+    call_site = Column(String(50), index=True) # classify / brief / ask_titan ...
+    model = Column(String(100))
+    source = Column(String(10), index=True) # api（实际请求上游）/ cache（命中缓存）/ coalesced（合并到相同的在途请求）
+    stream = Column(Integer, default=0) # 0/1
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    tokens_estimated = Column(Integer, default=0) # 1: 上游未返回 usage（或未请求上游），token 数为估算值
+    latency_ms = Column(Float)
+    first_token_ms = Column(Float) # 流式调用收到第一段内容的耗时
+    error_class = Column(String(100))
+    error = Column(String(500))
+
+
+class PipelineRun(Base):
+    __tablename__ = "pipeline_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_date = Column(Date, index=True, nullable=False) # 简报日期
+    status = Column(String(16), index=True) # running / done / failed
+    force = Column(Integer, default=0) # 1: 忽略检查点，所有阶段重跑
+    resumed_from = Column(String(20)) # 实际执行的第一个阶段；全部命中检查点时为 NULL
+    stages = Column(JSON) # {阶段: run / skipped / failed}
+    error = Column(String(500))
+    started_at = Column(DateTime, index=True)
+    finished_at = Column(DateTime)
+    elapsed_ms = Column(Float)
+
+
+class PipelineArtifact(Base):
+    __tablename__ = "pipeline_artifacts"
+    __table_args__ = (
+        Index("ix_pipeline_artifacts_date_stage", "run_date", "stage", unique=True), # 每天每个阶段只留最新一份，见 ai/checkpoints.py
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_date = Column(Date, nullable=False)
+    stage = Column(String(20), nullable=False) # select / classify / rank / brief / persist / insights
+    input_hash = Column(String(64)) # sha256(上游产物摘要 + 本阶段配置)，相同则跳过本阶段
+    output = Column(JSON) # 阶段产物，含供下游计算 input_hash 的 digest
+    complete = Column(Integer, default=1) # 0: 产物不完整（如 AI 不可用走了兜底），下次运行不复用
+    run_id = Column(Integer, ForeignKey("pipeline_runs.id"), index=True)
+    elapsed_ms = Column(Float)
+    created_at = Column(DateTime)
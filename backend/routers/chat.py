@@ -1,19 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from ai.personas import get_persona, PERSONAS
-from ai.volcengine import chat
+from ai.volcengine import LLMNotConfigured, achat
 
 router = APIRouter(
     prefix="/chat",
     tags=["chat"],
 )
+logger = logging.getLogger(__name__)
+
+# 单个大佬回答的超时（秒），超时的只在该条回复里标注错误，不影响其他人的回答
+PERSONA_TIMEOUT = float(os.getenv("ASK_TITAN_TIMEOUT", "45"))
 
 
 class AskTitanRequest(BaseModel):
     question: str
     persona_ids: list[str]  # 支持同时问多个大佬，最多4个
+    fresh: bool = False     # True 时不使用缓存的回答，重新生成
 
 
 class TitanResponse(BaseModel):
@@ -22,6 +31,7 @@ class TitanResponse(BaseModel):
     title: str
     avatar_hint: str
     answer: str
+    error: str | None = None  # 该大佬的回答失败 / 超时时的原因，answer 为空
 
 
 class AskTitanResponse(BaseModel):
@@ -50,27 +60,50 @@ async def ask_titan(req: AskTitanRequest):
     if len(req.persona_ids) > 4:
         raise HTTPException(status_code=400, detail="最多同时询问4位大佬")
 
-    responses = []
+    personas = []
     for pid in req.persona_ids:
         try:
-            persona = get_persona(pid)
+            personas.append((pid, get_persona(pid)))
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
-        answer = chat(
-            system_prompt=persona["system_prompt"],
-            user_message=req.question,
-            temperature=0.7,
+    # 各大佬并发提问，总耗时约等于最慢的一位
+    results = await asyncio.gather(
+        *(_ask_persona(pid, persona, req.question, req.fresh) for pid, persona in personas)
+    )
+    if all(r.error for r in results):
+        raise HTTPException(status_code=502, detail=f"AI 回答失败: {results[0].error}")
+    return AskTitanResponse(question=req.question, responses=list(results))
+
+
+async def _ask_persona(pid: str, persona: dict, question: str, fresh: bool) -> TitanResponse:
+    response = TitanResponse(
+        persona_id=pid,
+        name=persona["name"],
+        title=persona["title"],
+        avatar_hint=AVATAR_MAP.get(pid, "👤"),
+        answer="",
+    )
+    try:
+        response.answer = await asyncio.wait_for(
+            achat(
+                system_prompt=persona["system_prompt"],
+                user_message=question,
+                temperature=0.7,
+                call_site="ask_titan",
+                use_cache=not fresh,
+            ),
+            timeout=PERSONA_TIMEOUT,
         )
-        responses.append(TitanResponse(
-            persona_id=pid,
-            name=persona["name"],
-            title=persona["title"],
-            avatar_hint=AVATAR_MAP.get(pid, "👤"),
-            answer=answer,
-        ))
-
-    return AskTitanResponse(question=req.question, responses=responses)
+    except asyncio.TimeoutError:
+        logger.warning(f"[AskTitan] {pid} 回答超时（{PERSONA_TIMEOUT:g}s）")
+        response.error = f"回答超时（{PERSONA_TIMEOUT:g}s）"
+    except LLMNotConfigured as e:
+        response.error = str(e)
+    except Exception as e:
+        logger.warning(f"[AskTitan] {pid} 回答失败: {e}")
+        response.error = "回答失败，请稍后重试"
+    return response
 
 
 @router.get("/personas")
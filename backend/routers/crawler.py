@@ -1,6 +1,10 @@
 """
-POST /crawler/run    — 手动触发全量爬虫
-GET  /crawler/status — 查询爬虫运行状态
+POST /crawler/run     — 手动触发全量爬虫
+GET  /crawler/status  — 查询爬虫运行状态
+GET  /crawler/sources — 各数据源健康状态、熔断情况与轮询计划
+GET  /crawler/runs    — 最近的爬取记录；/crawler/runs/{id} 含各源耗时明细
+GET  /crawler/latency — 各数据源按天（或小时）的耗时 p50 / p95
+GET  /crawler/latency/slowest — 按 p95 排序的最慢数据源
 """
 from __future__ import annotations
 
@@ -8,7 +12,7 @@ import logging
 import threading
 from datetime import datetime
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 
 router = APIRouter(prefix="/crawler", tags=["crawler"])
 logger = logging.getLogger(__name__)
@@ -19,28 +23,28 @@ _state: dict = {
     "last_run": None,
     "last_count": 0,
     "last_error": None,
+    "last_report": None,
 }
 
 
 def _do_crawl():
-    from crawlers.rss import RssCrawler
-    from crawlers.hot_search import WeiboCrawler, BaiduHotCrawler
-    from crawlers.gov import ChinaGovCrawler, NdrcCrawler, StatsCrawler
+    from crawlers.engine import run_crawlers
+    from crawlers.polling import record_full_crawl
 
-    ALL = [RssCrawler, WeiboCrawler, BaiduHotCrawler, ChinaGovCrawler, NdrcCrawler, StatsCrawler]
-    total = 0
-    for Cls in ALL:
-        try:
-            total += Cls().run()
-        except Exception as e:
-            logger.error(f"{Cls.__name__} 异常: {e}")
-    return total
+    report = run_crawlers(trigger="manual")
+    _state["last_report"] = report.to_dict()
+    try:
+        record_full_crawl(report)
+    except Exception as e:
+        logger.warning(f"[Crawler] 更新轮询计划失败: {e}")
+    return report.total_inserted
 
 
 def _run_in_background():
+    """调用方已持有 CRAWL_LOCK，结束时释放"""
+    from crawlers.polling import CRAWL_LOCK
+
     global _state
-    _state["running"] = True
-    _state["last_error"] = None
     try:
         count = _do_crawl()
         _state["last_count"] = count
@@ -51,12 +55,18 @@ def _run_in_background():
         logger.error(f"[Crawler] 手动触发失败: {e}")
     finally:
         _state["running"] = False
+        CRAWL_LOCK.release()
 
 
 @router.post("/run")
 async def run_crawler():
-    if _state["running"]:
-        return {"status": "already_running", "message": "爬虫正在运行中，请稍候（通常 30-60 秒）"}
+    from crawlers.polling import CRAWL_LOCK
+
+    # 与每分钟的轮询 tick 共用一把锁，两轮爬取不会同时入库
+    if not CRAWL_LOCK.acquire(blocking=False):
+        return {"status": "already_running", "message": "爬虫正在运行中（手动或定时轮询），请稍候（通常 30-60 秒）"}
+    _state["running"] = True
+    _state["last_error"] = None
     threading.Thread(target=_run_in_background, daemon=True).start()
     return {"status": "started", "message": "爬虫已启动，正在后台运行..."}
 
@@ -68,4 +78,59 @@ async def crawler_status():
         "last_run":   _state["last_run"],
         "last_count": _state["last_count"],
         "last_error": _state["last_error"],
+        "last_report": _state["last_report"],
     }
+
+
+@router.get("/sources")
+def crawler_sources():
+    from crawlers.engine import list_source_ids
+    from crawlers.health import list_health
+
+    return list_health(list_source_ids())
+
+
+@router.get("/runs")
+def crawler_runs(limit: int = Query(50, ge=1, le=500), trigger: str | None = None):
+    from crawlers.telemetry import list_runs
+
+    return list_runs(limit=limit, trigger=trigger)
+
+
+@router.get("/runs/{run_id}")
+def crawler_run_detail(run_id: int):
+    from crawlers.telemetry import get_run
+
+    run = get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"未找到爬取记录 {run_id}")
+    return run
+
+
+@router.get("/latency")
+def crawler_latency(
+    days: int = Query(7, ge=1, le=90),
+    metric: str = "total_ms",
+    source: str | None = None,
+    bucket: str = Query("day", pattern="^(day|hour)$"),
+):
+    from crawlers.telemetry import latency_stats
+
+    try:
+        return latency_stats(days=days, metric=metric, source_id=source, bucket=bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/latency/slowest")
+def crawler_slowest(
+    days: int = Query(1, ge=1, le=90),
+    metric: str = "total_ms",
+    limit: int = Query(10, ge=1, le=100),
+):
+    from crawlers.telemetry import slowest_sources
+
+    try:
+        return slowest_sources(days=days, metric=metric, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
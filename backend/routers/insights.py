@@ -0,0 +1,118 @@
+"""
+GET  /insights               — 大佬视角洞察列表（按新闻 / 大佬 / 维度 / 相关度筛选）
+GET  /insights/news/{id}     — 某条新闻的全部大佬洞察
+POST /insights/generate      — 为当天排名靠前的新闻批量生成洞察（后台执行，已有的不重复生成）
+GET  /insights/status        — 最近一次手动生成的状态与统计
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import RawNews, TitanInsight
+
+router = APIRouter(prefix="/insights", tags=["insights"])
+logger = logging.getLogger(__name__)
+
+_state: dict = {
+    "running": False,
+    "last_run": None,
+    "last_stats": None,
+    "last_error": None,
+}
+_lock = threading.Lock()
+
+
+def _run_in_background(target_date: date, personas: list[str] | None, fresh: bool):
+    try:
+        from ai.insights import run_insights
+
+        stats = run_insights(target_date, personas=personas, fresh=fresh)
+        _state["last_stats"] = stats
+        _state["last_run"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        logger.info(f"[Insight] 手动触发完成: {stats}")
+    except Exception as e:
+        _state["last_error"] = str(e)
+        logger.error(f"[Insight] 手动触发失败: {e}")
+    finally:
+        _state["running"] = False
+
+
+@router.get("/")
+def list_insights(
+    news_id:       int | None   = None,
+    persona:       str | None   = None,
+    section:       str | None   = Query(None, description="维度筛选：policy/global/market/tech/consumer/industry/vc/economy"),
+    days:          int          = Query(1, ge=1, le=30),
+    min_relevance: float        = Query(0.0, ge=0, le=1),
+    limit:         int          = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    from ai.insights import insight_to_dict
+
+    q = db.query(TitanInsight, RawNews).join(RawNews, TitanInsight.news_id == RawNews.id)
+    if news_id is not None:
+        q = q.filter(TitanInsight.news_id == news_id)
+    else:
+        q = q.filter(TitanInsight.created_at >= datetime.now() - timedelta(days=days))
+    if persona:
+        q = q.filter(TitanInsight.persona == persona)
+    if section:
+        q = q.filter(RawNews.section == section)
+    if min_relevance > 0:
+        q = q.filter(TitanInsight.relevance_score >= min_relevance)
+    rows = q.order_by(TitanInsight.relevance_score.desc(), TitanInsight.id.desc()).limit(limit).all()
+    return [insight_to_dict(insight, news) for insight, news in rows]
+
+
+@router.get("/news/{news_id}")
+def news_insights(news_id: int, db: Session = Depends(get_db)):
+    from ai.insights import insight_to_dict
+
+    news = db.query(RawNews).filter(RawNews.id == news_id).first()
+    if news is None:
+        raise HTTPException(status_code=404, detail="新闻不存在")
+    rows = db.query(TitanInsight).filter(TitanInsight.news_id == news_id).order_by(TitanInsight.persona).all()
+    return {
+        "news_id":  news.id,
+        "title":    news.title,
+        "url":      news.url,
+        "section":  news.section,
+        "insights": [insight_to_dict(r) for r in rows],
+    }
+
+
+@router.post("/generate")
+async def generate(
+    target_date: date | None = None,
+    personas: list[str] | None = Query(None, description="只生成这些大佬的洞察，默认全部"),
+    fresh: bool = False,
+):
+    """为 target_date（默认今天）排名靠前的新闻生成洞察；fresh=true 时删掉已有的重新生成"""
+    from ai.personas import PERSONAS
+
+    unknown = [p for p in personas or [] if p not in PERSONAS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知大佬 ID: {unknown}，可选：{list(PERSONAS)}")
+    with _lock:
+        if _state["running"]:
+            return {"status": "already_running", "message": "洞察生成已在运行中，请稍候"}
+        _state["running"] = True
+        _state["last_error"] = None
+    threading.Thread(
+        target=_run_in_background,
+        args=(target_date or date.today(), personas, fresh),
+        name="insights",
+        daemon=True,
+    ).start()
+    return {"status": "started", "message": "洞察生成已启动，可通过 /insights/status 查看结果"}
+
+
+@router.get("/status")
+def insight_status():
+    return _state
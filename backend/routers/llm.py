@@ -0,0 +1,55 @@
+"""
+GET /llm/usage         — 按天、按调用点的调用次数、token 与费用（含缓存 / 合并省下的量）
+GET /llm/usage/totals  — 整段时间合计与按调用点拆分
+GET /llm/latency       — 按调用点的耗时 p50 / p95 / p99（流式调用含首段耗时）
+GET /llm/calls         — 最近的调用记录
+GET /llm/gateway       — LLM 网关当前状态（在途请求、限流、重试计数）
+"""
+from __future__ import annotations
+
+from fastapi import APIRouter, Query
+
+router = APIRouter(prefix="/llm", tags=["llm"])
+
+
+@router.get("/usage")
+def llm_usage(days: int = Query(7, ge=1, le=90), call_site: str | None = None):
+    from ai.ledger import usage_summary
+
+    return usage_summary(days=days, call_site=call_site)
+
+
+@router.get("/usage/totals")
+def llm_usage_totals(days: int = Query(7, ge=1, le=90)):
+    from ai.ledger import usage_totals
+
+    return usage_totals(days=days)
+
+
+@router.get("/latency")
+def llm_latency(
+    days: int = Query(7, ge=1, le=90),
+    call_site: str | None = None,
+    stream: bool | None = None,
+):
+    from ai.ledger import latency_stats
+
+    return latency_stats(days=days, call_site=call_site, stream=stream)
+
+
+@router.get("/calls")
+def llm_calls(
+    limit: int = Query(50, ge=1, le=500),
+    call_site: str | None = None,
+    errors_only: bool = False,
+):
+    from ai.ledger import list_calls
+
+    return list_calls(limit=limit, call_site=call_site, errors_only=errors_only)
+
+
+@router.get("/gateway")
+def llm_gateway():
+    from ai.gateway import get_gateway
+
+    return get_gateway().snapshot()
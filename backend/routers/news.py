@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from typing import Optional
 from database import get_db
@@ -34,8 +35,12 @@ def list_news(
     if platform:
         query = query.filter(RawNews.source_platform == platform)
     elif section and section in SECTION_MAP:
+        # 已分类的按流水线存下的维度筛选，尚未分类的按来源平台
         platforms = SECTION_MAP[section]
-        query = query.filter(RawNews.source_platform.in_(platforms))
+        query = query.filter(or_(
+            RawNews.section == section,
+            and_(RawNews.section.is_(None), RawNews.source_platform.in_(platforms)),
+        ))
 
     total = query.count()
     news  = query.offset(skip).limit(limit).all()
@@ -51,6 +56,7 @@ def list_news(
                 "content":         n.content,
                 "publish_time":    n.publish_time.isoformat() if n.publish_time else None,
                 "tags":            n.tags or [],
+                "section":         n.section,
             }
             for n in news
         ],
@@ -1,13 +1,20 @@
 """
-POST /pipeline/run   — 手动触发完整 AI 流水线
-GET  /pipeline/status — 查看今日简报状态
+POST   /pipeline/run    — 手动触发完整 AI 流水线（force=true 忽略检查点全部重跑）
+GET    /pipeline/stream — 以 SSE 推送运行中（或最近一次）流水线的进度与简报内容，不会启动新运行
+GET    /pipeline/status — 查看今日简报状态
+GET    /pipeline/runs   — 最近的运行记录：各阶段执行 / 跳过、从哪个阶段恢复
+GET    /pipeline/checkpoints/{date} — 某天各阶段的检查点；DELETE 清除，下次运行从头执行
 """
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import threading
 from datetime import date
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from database import get_db
@@ -16,29 +23,136 @@ from models import DailyReport
 router = APIRouter(prefix="/pipeline", tags=["pipeline"])
 logger = logging.getLogger(__name__)
 
+HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 10000   # 断线后 EventSource 的重连间隔
+
+
+class _PipelineRun:
+    """
+    单次流水线运行的事件广播：流水线在后台线程里执行，事件按顺序记下并分发给订阅者。
+    晚到或断线重连的订阅者先收到已发生的事件（简报内容合并为一条 delta），再接着收实时事件。
+    """
+
+    def __init__(self):
+        self.events: list[tuple[str, dict]] = []   # 除 delta 以外的事件
+        self.text: list[str] = []                  # 已生成的简报内容
+        self.finished = False
+        self._subscribers: list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self._lock = threading.Lock()
+
+    def publish(self, event: str, data: dict):
+        with self._lock:
+            if event == "delta":
+                self.text.append(data["text"])
+            else:
+                self.events.append((event, data))
+            if event in ("done", "error"):
+                self.finished = True
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def subscribe(self) -> tuple[list[tuple[str, dict]], asyncio.Queue | None]:
+        """返回 (补发的历史事件, 实时事件队列)；已结束的运行不再返回队列"""
+        with self._lock:
+            backlog = [e for e in self.events if e[0] not in ("done", "error")]
+            if self.text:
+                backlog.append(("delta", {"text": "".join(self.text)}))
+            backlog += [e for e in self.events if e[0] in ("done", "error")]
+            if self.finished:
+                return backlog, None
+            queue: asyncio.Queue = asyncio.Queue()
+            self._subscribers.append((asyncio.get_running_loop(), queue))
+            return backlog, queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = [(l, q) for l, q in self._subscribers if q is not queue]
+
+
+_lock = threading.Lock()
+_current: _PipelineRun | None = None
 _running = False
 
 
-def _run_in_background():
+def _execute(run: _PipelineRun, force: bool):
     global _running
-    _running = True
     try:
         from ai.pipeline import run_pipeline
-        run_pipeline()
+        run_pipeline(on_event=run.publish, force=force)
         logger.info("[Pipeline] 后台任务完成")
     except Exception as e:
         logger.error(f"[Pipeline] 后台任务失败: {e}")
+        run.publish("error", {"message": str(e)})
     finally:
-        _running = False
+        with _lock:
+            _running = False
+
+
+def _start_run(force: bool = False) -> tuple[_PipelineRun, bool]:
+    """启动一次流水线；已有运行中的任务时返回它。返回 (运行, 是否新启动)"""
+    global _current, _running
+    with _lock:
+        if _running and _current is not None:
+            return _current, False
+        _current = _PipelineRun()
+        _running = True
+        run = _current
+    threading.Thread(target=_execute, args=(run, force), name="pipeline", daemon=True).start()
+    return run, True
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 @router.post("/run")
-async def trigger_pipeline(background_tasks: BackgroundTasks):
-    """手动触发 AI 流水线，在后台异步执行"""
-    if _running:
+async def trigger_pipeline(force: bool = False):
+    """手动触发 AI 流水线，在后台异步执行；默认输入未变的阶段复用检查点"""
+    _, started = _start_run(force)
+    if not started:
         return {"status": "already_running", "message": "流水线已在运行中，请稍候"}
-    background_tasks.add_task(_run_in_background)
-    return {"status": "started", "message": "AI 流水线已启动，通常需要 30-60 秒，请稍后刷新"}
+    return {"status": "started", "message": "AI 流水线已启动，可通过 /pipeline/stream 查看实时进度"}
+
+
+@router.get("/stream")
+async def stream_pipeline():
+    """
+    SSE 推送流水线进度：step / classified / delta（简报内容片段）/ done / error，最后一条固定是 end。
+    只接入运行中的任务，或回放最近一次运行；不会启动新运行（启动用 POST /pipeline/run），
+    因此 EventSource 自动重连不会重复触发流水线。客户端收到 end 后应主动关闭连接。
+    断线重连会先补发已发生的事件与已生成的内容；生成中的简报同时持续写入 DailyReport。
+    """
+    with _lock:
+        run = _current
+    if run is None:
+        raise HTTPException(status_code=404, detail="还没有运行过流水线，请先 POST /pipeline/run")
+
+    async def events():
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        backlog, queue = run.subscribe()
+        try:
+            for event, data in backlog:
+                yield _sse(event, data)
+            while queue is not None:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event, data)
+                if event in ("done", "error"):
+                    break
+            yield _sse("end", {})
+        finally:
+            if queue is not None:
+                run.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/status")
@@ -49,8 +163,33 @@ async def pipeline_status(db: Session = Depends(get_db)):
         "running": _running,
         "today_report": {
             "exists": report is not None,
+            "status": (report.status or "done") if report else None,
+            "generated_chars": len(report.summary_markdown or "") if report else 0,
             "macro_score": report.macro_score if report else None,
             "tech_score":  report.tech_score  if report else None,
             "created_at":  str(report.created_at) if report else None,
         },
     }
+
+
+@router.get("/runs")
+def pipeline_runs(limit: int = Query(20, ge=1, le=200), run_date: date | None = None):
+    from ai.checkpoints import list_runs
+
+    return list_runs(limit=limit, run_date=run_date)
+
+
+@router.get("/checkpoints/{run_date}")
+def pipeline_checkpoints(run_date: date):
+    from ai.checkpoints import list_artifacts
+
+    return list_artifacts(run_date)
+
+
+@router.delete("/checkpoints/{run_date}")
+def clear_checkpoints(run_date: date):
+    from ai.checkpoints import clear
+
+    if _running:
+        raise HTTPException(status_code=409, detail="流水线运行中，稍后再清除检查点")
+    return {"deleted": clear(run_date)}
@@ -1,17 +1,16 @@
 """
 定时任务调度器
-每日凌晨 4:00 自动执行全量爬取
+各数据源按自适应间隔轮询（见 crawlers/polling.py），每日 6:00 生成 AI 简报
 手动运行：python scheduler.py
 """
 import logging
-import time
 from datetime import datetime
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
-from crawlers.rss import RssCrawler
-from crawlers.hot_search import WeiboCrawler, BaiduHotCrawler
-from crawlers.gov import ChinaGovCrawler, NdrcCrawler, StatsCrawler
+from crawlers.engine import ALL_CRAWLERS, run_crawlers
+from crawlers.polling import record_full_crawl, run_due_sources
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,32 +18,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger("scheduler")
 
-ALL_CRAWLERS = [
-    RssCrawler,
-    WeiboCrawler,
-    BaiduHotCrawler,
-    ChinaGovCrawler,
-    NdrcCrawler,
-    StatsCrawler,
-]
-
 
 def run_all_crawlers():
-    """执行所有爬虫，统计总入库数量"""
+    """并发执行所有爬虫，统计总入库数量"""
     start = datetime.now()
     logger.info(f"===== 爬虫任务开始 {start.strftime('%Y-%m-%d %H:%M:%S')} =====")
 
-    total = 0
-    for CrawlerClass in ALL_CRAWLERS:
-        try:
-            crawler = CrawlerClass()
-            count = crawler.run()
-            total += count
-        except Exception as e:
-            logger.error(f"{CrawlerClass.__name__} 异常: {e}")
-
-    elapsed = (datetime.now() - start).seconds
-    logger.info(f"===== 爬虫任务完成，共入库 {total} 条，耗时 {elapsed}s =====")
+    report = run_crawlers(ALL_CRAWLERS, trigger="schedule")
+    total = report.total_inserted
+    record_full_crawl(report, ALL_CRAWLERS)
+
+    logger.info(f"===== 爬虫任务完成，共入库 {total} 条，耗时 {report.elapsed:.0f}s =====")
     return total
 
 
@@ -59,6 +43,18 @@ def run_pipeline():
         logger.error(f"AI 流水线异常: {e}")
 
 
+def retrain_classifier():
+    """用最近的 AI 分类结果重训本地分类模型"""
+    try:
+        from ai.classifier import train
+        report = train()
+        logger.info(f"===== 本地分类模型重训完成，留出集准确率 {report['accuracy']:.2%}，覆盖 {report['coverage']:.2%} =====")
+    except ValueError as e:
+        logger.info(f"本地分类模型未重训：{e}")
+    except Exception as e:
+        logger.error(f"本地分类模型重训异常: {e}")
+
+
 def run_full_daily_job():
     """完整每日任务：先爬虫，再 AI 流水线"""
     run_all_crawlers()
@@ -75,6 +71,9 @@ if __name__ == "__main__":
         elif sys.argv[1] == "--pipeline":
             # 单独触发 AI 流水线
             run_pipeline()
+        elif sys.argv[1] == "--retrain":
+            # 重训本地分类模型
+            retrain_classifier()
         elif sys.argv[1] == "--full":
             # 爬虫 + AI 流水线（完整流程）
             run_full_daily_job()
@@ -82,22 +81,15 @@ if __name__ == "__main__":
         # 启动定时调度
         scheduler = BlockingScheduler(timezone="Asia/Shanghai")
 
-        # 每日凌晨 4:00 执行全量爬取
+        # 每分钟 tick，只抓到期的数据源
         scheduler.add_job(
-            run_all_crawlers,
-            trigger=CronTrigger(hour=4, minute=0),
-            id="daily_crawl",
-            name="每日全量爬取",
-            replace_existing=True,
-        )
-
-        # 每日中午 12:00 补充爬取
-        scheduler.add_job(
-            run_all_crawlers,
-            trigger=CronTrigger(hour=12, minute=0),
-            id="noon_crawl",
-            name="午间补充爬取",
+            run_due_sources,
+            trigger=IntervalTrigger(minutes=1),
+            id="adaptive_poll",
+            name="自适应轮询爬取",
             replace_existing=True,
+            max_instances=1,
+            coalesce=True,
         )
 
         # 每日早晨 6:00 生成 AI 简报（爬虫完成后）
@@ -109,11 +101,20 @@ if __name__ == "__main__":
             replace_existing=True,
         )
 
+        # 每周一 5:30 重训本地分类模型（简报生成前）
+        scheduler.add_job(
+            retrain_classifier,
+            trigger=CronTrigger(day_of_week="mon", hour=5, minute=30),
+            id="retrain_classifier",
+            name="本地分类模型重训",
+            replace_existing=True,
+        )
+
         logger.info("调度器启动，执行时间：")
-        logger.info("  04:00 — 全量爬取")
+        logger.info("  每分钟 — 自适应轮询到期数据源")
         logger.info("  06:00 — AI 简报生成")
-        logger.info("  12:00 — 午间补充爬取")
-        logger.info("立即测试：python scheduler.py --once | --pipeline | --full")
+        logger.info("  周一 05:30 — 本地分类模型重训")
+        logger.info("立即测试：python scheduler.py --once | --pipeline | --full | --retrain")
 
         try:
             scheduler.start()
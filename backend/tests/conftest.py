@@ -0,0 +1,31 @@
+"""
+测试公共设置：backend 目录加入 sys.path，数据库指向临时 SQLite 文件（不碰 titan_view.db）
+在 backend 目录下运行：python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="titan_test_"), "test.db")
+os.environ.setdefault("VOLCENGINE_MODEL_ID", "test-model")
+os.environ["LLM_CACHE_ENABLED"] = "0"
+os.environ["LOCAL_CLASSIFIER_ENABLED"] = "0"   # 分类全部走（假的）LLM，结果可预期
+
+
+@pytest.fixture
+def db():
+    """每个测试一套空表"""
+    import models  # noqa: F401  注册全部表
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,211 @@
+import json
+import re
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import ai.pipeline as pipeline
+import ai.volcengine as volcengine
+from ai.checkpoints import Checkpoints, list_runs
+from models import DailyReport, PipelineArtifact, RawNews
+
+
+# ─────────────────────────────────────
+# Checkpoints.stage
+# ─────────────────────────────────────
+class _Counter:
+    def __init__(self, output: dict):
+        self.output = output
+        self.calls = 0
+
+    def __call__(self) -> dict:
+        self.calls += 1
+        return self.output
+
+
+def test_stage_reuses_complete_artifact_with_same_hash(db):
+    day = date(2026, 1, 2)
+    fn = _Counter({"n": 1})
+    assert Checkpoints(db, day).stage("rank", "h1", fn) == ({"n": 1}, False)
+    ckpt = Checkpoints(db, day)
+    assert ckpt.stage("rank", "h1", fn) == ({"n": 1}, True)
+    assert fn.calls == 1
+    assert ckpt.run.stages == {"rank": "skipped"}
+    assert ckpt.run.resumed_from is None
+
+
+def test_stage_reruns_when_input_changes(db):
+    day = date(2026, 1, 2)
+    Checkpoints(db, day).stage("rank", "h1", _Counter({"n": 1}))
+    ckpt = Checkpoints(db, day)
+    output, skipped = ckpt.stage("rank", "h2", _Counter({"n": 2}))
+    assert (output, skipped) == ({"n": 2}, False)
+    assert ckpt.run.resumed_from == "rank"
+    artifact = db.query(PipelineArtifact).one()
+    assert (artifact.input_hash, artifact.output) == ("h2", {"n": 2})
+
+
+def test_stage_retries_incomplete_artifact(db):
+    day = date(2026, 1, 2)
+    fn = _Counter({"ai": False})
+    Checkpoints(db, day).stage("brief", "h", fn, complete=lambda out: out["ai"])
+    fn.output = {"ai": True}
+    assert Checkpoints(db, day).stage("brief", "h", fn, complete=lambda out: out["ai"]) == ({"ai": True}, False)
+    assert Checkpoints(db, day).stage("brief", "h", fn, complete=lambda out: out["ai"]) == ({"ai": True}, True)
+    assert fn.calls == 2
+
+
+def test_stage_force_and_always_ignore_artifact(db):
+    day = date(2026, 1, 2)
+    fn = _Counter({"n": 1})
+    Checkpoints(db, day).stage("select", "h", fn)
+    Checkpoints(db, day).stage("select", "h", fn, always=True)
+    Checkpoints(db, day, force=True).stage("select", "h", fn)
+    assert fn.calls == 3
+
+
+def test_stage_failure_keeps_previous_artifact(db):
+    day = date(2026, 1, 2)
+    Checkpoints(db, day).stage("rank", "h1", _Counter({"n": 1}))
+
+    def boom():
+        raise RuntimeError("boom")
+
+    ckpt = Checkpoints(db, day)
+    with pytest.raises(RuntimeError):
+        ckpt.stage("rank", "h2", boom)
+    ckpt.finish(RuntimeError("boom"))
+    assert ckpt.run.stages == {"rank": "failed"}
+    assert ckpt.run.status == "failed"
+    assert db.query(PipelineArtifact).one().input_hash == "h1"
+
+
+# ─────────────────────────────────────
+# run_pipeline：假 LLM 下的跳过 / 恢复
+# ─────────────────────────────────────
+class _FakeLLM:
+    """分类全部归入 tech；brief_ok=False 时流式生成失败（走兜底简报）"""
+
+    def __init__(self):
+        self.brief_ok = True
+        self.calls = {"classify": 0, "brief": 0}
+
+    def chat(self, system_prompt, user_message, **kwargs):
+        self.calls["classify"] += 1
+        ids = [int(m) for m in re.findall(r"^(\d+) \| ", user_message, re.M)]
+        return json.dumps({"tech": ids})
+
+    def chat_stream(self, system_prompt, user_message, **kwargs):
+        self.calls["brief"] += 1
+        if not self.brief_ok:
+            raise ConnectionError("LLM 不可用")
+        yield "## 今日市场概述\n科技板块活跃。\n"
+        yield "SCORES: macro=60 tech=80\n"
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = _FakeLLM()
+    monkeypatch.setattr(volcengine, "chat", fake.chat)
+    monkeypatch.setattr(volcengine, "chat_stream", fake.chat_stream)
+    monkeypatch.setattr(pipeline, "INSIGHT_ENABLED", False)
+    return fake
+
+
+def _add_news(db, day: date, n: int, start: int = 0, hours: float = 2):
+    since = datetime.combine(day, datetime.min.time()) - timedelta(hours=6)
+    for i in range(start, start + n):
+        db.add(RawNews(title=f"芯片公司{i}号发布新品", url=f"http://x/{i}", url_hash=f"h{i}",
+                       source_platform="36kr", story_id=f"s{i}", crawl_time=since + timedelta(hours=hours),
+                       status=0))
+    db.commit()
+
+
+def test_pipeline_rerun_skips_unchanged_stages(db, llm):
+    day = date(2026, 1, 2)
+    _add_news(db, day, 3)
+
+    first = pipeline.run_pipeline(day)
+    assert first.status == "done" and first.tech_score == 80
+    assert llm.calls == {"classify": 1, "brief": 1}
+
+    pipeline.run_pipeline(day)
+    assert llm.calls == {"classify": 1, "brief": 1}
+
+    runs = list_runs(run_date=day)
+    assert runs[0]["stages"] == {"select": "run", "classify": "skipped", "rank": "skipped",
+                                 "brief": "skipped", "persist": "skipped"}
+    assert runs[0]["resumed_from"] is None
+
+
+def test_pipeline_resumes_from_incomplete_brief(db, llm):
+    day = date(2026, 1, 2)
+    _add_news(db, day, 3)
+    llm.brief_ok = False
+    report = pipeline.run_pipeline(day)
+    assert "AI 简报生成失败" in report.summary_markdown
+
+    llm.brief_ok = True
+    report = pipeline.run_pipeline(day)
+    assert report.tech_score == 80
+    assert llm.calls == {"classify": 1, "brief": 2}
+    latest = list_runs(run_date=day)[0]
+    assert latest["resumed_from"] == "brief"
+    assert latest["stages"]["rank"] == "skipped"
+    assert db.query(DailyReport).count() == 1
+
+
+def test_pipeline_new_news_reruns_from_classify(db, llm):
+    day = date(2026, 1, 2)
+    _add_news(db, day, 3)
+    pipeline.run_pipeline(day)
+    _add_news(db, day, 1, start=3)
+    # 时间窗之后抓到的新闻不影响这一天的检查点
+    _add_news(db, day, 1, start=4, hours=40)
+
+    pipeline.run_pipeline(day)
+    latest = list_runs(run_date=day)[0]
+    assert latest["resumed_from"] == "classify"
+    assert llm.calls["classify"] == 2
+    pipeline.run_pipeline(day)
+    assert list_runs(run_date=day)[0]["resumed_from"] is None
+
+
+def test_pipeline_leaves_pending_news_after_window_alone(db, llm):
+    day = date(2026, 1, 2)
+    _add_news(db, day, 2)
+    _add_news(db, day, 1, start=2, hours=40)     # 补跑历史日期时，之后抓到的新闻不属于这一天
+
+    pipeline.run_pipeline(day)
+    later = db.query(RawNews).filter(RawNews.url_hash == "h2").one()
+    db.refresh(later)
+    assert (later.status, later.section, later.classify_attempts) == (0, None, 0)
+    assert llm.calls["classify"] == 1
+
+
+def test_pipeline_emits_one_step_event_per_stage(db, llm):
+    day = date(2026, 1, 2)
+    _add_news(db, day, 2)
+    pipeline.run_pipeline(day)
+
+    events = []
+    pipeline.run_pipeline(day, on_event=lambda event, data: events.append((event, data)))
+    steps = [(d["step"], d["skipped"]) for e, d in events if e == "step"]
+    assert steps == [(1, True), (2, True), (3, True)]
+
+
+def test_failed_regeneration_keeps_finished_brief(db, llm):
+    day = date(2026, 1, 2)
+    _add_news(db, day, 2)
+    pipeline.run_pipeline(day)
+    finished = db.query(DailyReport).one().summary_markdown
+
+    _add_news(db, day, 1, start=2)               # 输入变了，简报阶段重新生成
+    llm.brief_ok = False
+    report = pipeline.run_pipeline(day)
+    assert (report.summary_markdown, report.status, report.tech_score) == (finished, "done", 80)
+
+    # 兜底产物不完整，AI 恢复后重新生成
+    llm.brief_ok = True
+    pipeline.run_pipeline(day)
+    assert list_runs(run_date=day)[0]["resumed_from"] == "brief"
@@ -0,0 +1,70 @@
+import pytest
+
+import crawlers.base as base
+from crawlers.base import BaseCrawler, NewsItem, ingest_items
+from crawlers.dedup import StoryIndex
+from database import SessionLocal
+from models import RawNews
+
+TITLE = "国务院常务会议部署推动消费品以旧换新"
+SIMILAR = "【快讯】国务院常务会议部署推动消费品以旧换新工作"
+
+
+@pytest.fixture
+def index(monkeypatch):
+    idx = StoryIndex()
+    idx.warmed = True
+    monkeypatch.setattr(base, "get_story_index", lambda: idx)
+    return idx
+
+
+def _item(title: str, url: str) -> NewsItem:
+    return NewsItem(source_platform="xinhua", title=title, url=url)
+
+
+def test_similar_titles_in_one_batch_share_story(db, index):
+    result = ingest_items([_item(TITLE, "http://a.com/1"), _item(SIMILAR, "http://b.com/1")], db)
+    db.commit()
+    assert result.story_duplicates == 1
+    assert len({s for (s,) in db.query(RawNews.story_id)}) == 1
+
+
+def test_signatures_registered_only_after_commit(db, index):
+    ingest_items([_item(TITLE, "http://a.com/1")], db)
+    db.rollback()
+    assert len(index) == 0
+
+    # 回滚的条目不在库里，后来的近似条目不能挂到它的 story_id 上
+    result = ingest_items([_item(SIMILAR, "http://b.com/1")], db)
+    db.commit()
+    result.stories.register()
+    assert result.story_duplicates == 0
+    assert len(index) == 1
+
+
+def test_save_registers_inserted_rows(db, index):
+    crawler = BaseCrawler()
+    crawler.save([_item(TITLE, "http://a.com/1")])
+    result = crawler.save([_item(SIMILAR, "http://b.com/1")])
+    assert result.story_duplicates == 1
+    assert len(index) == 2
+
+
+def test_ignored_row_not_registered(db, index, monkeypatch):
+    real = base._insert_ignore
+
+    def racing_insert(session):
+        # 查重之后、写入之前另一个进程抢先写入了同一 url_hash
+        other = SessionLocal()
+        other.add(RawNews(source_platform="sina", title=TITLE, url="http://a.com/1",
+                          url_hash=base.url_hash("http://a.com/1"), story_id="other-story"))
+        other.commit()
+        other.close()
+        return real(session)
+
+    monkeypatch.setattr(base, "_insert_ignore", racing_insert)
+    result = ingest_items([_item(TITLE, "http://a.com/1")], db)
+    db.commit()
+    result.stories.register()
+    assert (result.inserted, result.existing) == (0, 1)
+    assert len(index) == 0
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+import openai
+import pytest
+
+from ai.gateway import LLMGateway, _Bucket, _retry_delay
+
+try:
+    import httpx
+except ImportError:  # 部分 openai 发行版依赖改名的 httpx2
+    import httpx2 as httpx
+
+
+def _status_error(status: int, headers: dict | None = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+# ─────────────────────────────────────
+# 令牌桶
+# ─────────────────────────────────────
+def test_bucket_waits_until_refilled():
+    bucket = _Bucket(60)                       # 每秒补 1 个
+    now = bucket.updated
+    assert bucket.wait_time(60, now) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1.0) == pytest.approx(0.0)
+
+
+def test_bucket_oversized_request_capped_at_capacity():
+    bucket = _Bucket(10)
+    now = bucket.updated
+    assert bucket.wait_time(1000, now) == 0   # 超过整桶容量按满桶放行
+    bucket.take(1000)
+    assert bucket.tokens == pytest.approx(0.0)
+
+
+def test_bucket_unlimited():
+    bucket = _Bucket(0)
+    assert bucket.wait_time(10 ** 9, time.monotonic()) == 0
+
+
+# ─────────────────────────────────────
+# 重试判定
+# ─────────────────────────────────────
+def test_retry_delay_prefers_retry_after():
+    assert _retry_delay(_status_error(429, {"retry-after": "3"}), 0) == 3.0
+
+
+def test_retry_delay_backoff_for_server_errors():
+    delay = _retry_delay(_status_error(503), 2)
+    assert delay is not None and 0 < delay <= 30
+
+
+def test_retry_delay_client_errors_not_retried():
+    assert _retry_delay(_status_error(400), 0) is None
+    assert _retry_delay(ValueError("bad"), 0) is None
+
+
+# ─────────────────────────────────────
+# 单飞合并
+# ─────────────────────────────────────
+def test_sync_single_flight_shares_one_upstream_call():
+    gw = LLMGateway(max_concurrency=4, rpm=0, tpm=0)
+    calls = []
+    release = threading.Event()
+
+    def upstream():
+        calls.append(1)
+        release.wait(2)
+        return "answer"
+
+    results = []
+
+    def caller():
+        results.append(gw.call(upstream, tokens=10, key="same"))
+
+    threads = [threading.Thread(target=caller) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(2)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda r: r[1]) == [("answer", False), ("answer", True), ("answer", True)]
+    assert gw.snapshot()["inflight_keys"] == 0
+
+
+def test_cancelled_async_follower_does_not_break_leader():
+    gw = LLMGateway(max_concurrency=4, rpm=0, tpm=0)
+
+    async def upstream():
+        await asyncio.sleep(0.3)
+        return "answer"
+
+    async def main():
+        leader = asyncio.create_task(gw.acall(upstream, tokens=10, key="k"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(gw.acall(upstream, tokens=10, key="k"), 0.05)
+        late = asyncio.create_task(gw.acall(upstream, tokens=10, key="k"))
+        return await leader, await late
+
+    leader, late = asyncio.run(main())
+    assert leader == ("answer", False)
+    assert late == ("answer", True)
+
+
+def test_cancelled_async_leader_fails_followers_without_cancelling_them():
+    gw = LLMGateway(max_concurrency=4, rpm=0, tpm=0)
+
+    async def upstream():
+        await asyncio.sleep(0.3)
+        return "answer"
+
+    async def main():
+        leader = asyncio.create_task(gw.acall(upstream, tokens=10, key="k"))
+        await asyncio.sleep(0.05)
+        follower = asyncio.create_task(gw.acall(upstream, tokens=10, key="k"))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        return await asyncio.gather(follower, return_exceptions=True)
+
+    (result,) = asyncio.run(main())
+    assert type(result).__name__ == "LLMUnavailable"
@@ -0,0 +1,44 @@
+import pytest
+
+from crawlers import htmlparse
+from crawlers.htmlparse import LayoutChanged, ListRule, available_backends, parse_list
+
+PAGE = """
+<html><head><title>通知公告</title></head><body>
+<div class="nav"><ul><li><a href="/index.html">首页导航链接文字</a></li></ul></div>
+<div class="list main">
+  <ul>
+    <li><a href="/a.html" title="关于推动大规模设备更新的通知全文">关于推动大规模设备更新…</a><span>2026-01-02</span></li>
+    <li><a href="javascript:void(0)">无效链接的条目标题</a></li>
+    <li><a href="http://other.gov.cn/b.html">国家统计局发布十二月数据</a><span>2026年1月3日</span></li>
+    <li><a href="#">锚点</a></li>
+  </ul>
+</div>
+</body></html>
+"""
+RULES = [ListRule("ul", "u-list", title_attr="title"), ListRule("div", "list", title_attr="title")]
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_fallback_rule_on_one_parse(backend, monkeypatch):
+    parser = htmlparse.BACKENDS[backend]
+    parses = []
+
+    def counting_parse(html, rules, encoding):
+        parses.append(1)
+        return parser.parse(html, rules, encoding)
+
+    monkeypatch.setitem(htmlparse.BACKENDS, backend, htmlparse.Backend(counting_parse, parser.items))
+    entries = parse_list(PAGE, RULES, base_url="http://www.gov.cn/zhengce/", backend=backend)
+
+    assert len(parses) == 1
+    assert [(e.title, e.url, e.publish_time.day) for e in entries] == [
+        ("关于推动大规模设备更新的通知全文", "http://www.gov.cn/a.html", 2),
+        ("国家统计局发布十二月数据", "http://other.gov.cn/b.html", 3),
+    ]
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_layout_changed(backend):
+    with pytest.raises(LayoutChanged):
+        parse_list(PAGE, [ListRule("ul", "news-list")], base_url="http://www.gov.cn/", backend=backend)
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+import ai.volcengine as volcengine
+from ai.gateway import LLMGateway
+from ai.ledger import cost_of, record_call, usage_summary
+from models import LLMCall
+
+
+def test_usage_summary_skips_failed_calls_without_output(db):
+    record_call("brief", "m", "api", 10, 100, 50)
+    record_call("brief", "m", "api", 10, 400, None, estimated=True, error=ValueError("400"))
+    record_call("brief", "m", "coalesced", 10, 400, None, estimated=True, error=ValueError("400"))
+    record_call("brief", "m", "coalesced", 10, 100, 50)
+    record_call("brief", "m", "cache", 1, 100, 50, estimated=True)
+    # 流式中途断开前已经有产出，上游照样计费
+    record_call("brief", "m", "api", 10, 100, 20, estimated=True, stream=True, error=ConnectionError("reset"))
+
+    (row,) = usage_summary(days=1)
+    assert (row["calls"], row["api_calls"], row["coalesced"], row["cache_hits"], row["errors"]) == (6, 3, 2, 1, 3)
+    assert (row["prompt_tokens"], row["completion_tokens"]) == (200, 70)
+    assert row["cost"] == round(cost_of(200, 70), 4)
+    assert row["saved_tokens"] == 300
+
+
+def test_failed_follower_recorded_as_coalesced(db, monkeypatch):
+    monkeypatch.setattr(volcengine, "get_gateway", lambda gw=LLMGateway(rpm=0, tpm=0): gw)
+    started = threading.Event()
+
+    def upstream(*args):
+        started.set()
+        time.sleep(0.2)
+        raise ValueError("400 bad request")      # 不可重试的错误
+
+    monkeypatch.setattr(volcengine, "_complete", upstream)
+
+    errors = []
+
+    def caller():
+        with pytest.raises(ValueError) as e:
+            volcengine.chat("sys", "same prompt", call_site="t", use_cache=False)
+        errors.append(e.value)
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait(2)
+    follower = threading.Thread(target=caller)
+    follower.start()
+    leader.join(2)
+    follower.join(2)
+
+    assert len(errors) == 2
+    sources = sorted(s for (s,) in db.query(LLMCall.source).filter(LLMCall.error_class == "ValueError"))
+    assert sources == ["api", "coalesced"]
@@ -0,0 +1,31 @@
+from sqlalchemy import inspect, text
+
+from create_db import create_tables
+from database import engine
+from models import RawNews, TitanInsight
+
+
+def test_duplicate_insights_removed_before_unique_index(db):
+    # 模拟旧库：没有唯一索引，url_hash 尚未回填
+    db.execute(text("DROP INDEX ix_titan_insights_news_persona"))
+    a = RawNews(source_platform="sina", title="a", url="http://x.com/a?utm_source=1")
+    b = RawNews(source_platform="sina", title="a", url="http://x.com/a")                # 规范化后与 a 相同，回填时合并到 a
+    c = RawNews(source_platform="sina", title="c", url="http://x.com/c")
+    db.add_all([a, b, c])
+    db.flush()
+    db.add_all([
+        TitanInsight(news_id=a.id, persona="elon_musk", insight_text="a1"),
+        TitanInsight(news_id=b.id, persona="elon_musk", insight_text="b1"),
+        TitanInsight(news_id=c.id, persona="elon_musk", insight_text="c1"),
+        TitanInsight(news_id=c.id, persona="elon_musk", insight_text="c2"),
+        TitanInsight(news_id=c.id, persona="warren_buffett", insight_text="c3"),
+    ])
+    db.commit()
+
+    create_tables()
+
+    db.expire_all()
+    rows = {(r.news_id, r.persona): r.insight_text for r in db.query(TitanInsight)}
+    assert rows == {(a.id, "elon_musk"): "a1", (c.id, "elon_musk"): "c1", (c.id, "warren_buffett"): "c3"}
+    names = {idx["name"] for idx in inspect(engine).get_indexes("titan_insights")}
+    assert "ix_titan_insights_news_persona" in names
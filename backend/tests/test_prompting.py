@@ -0,0 +1,47 @@
+from ai.prompting import clean_title, pack_sections, title_key
+from ai.tokens import estimate_tokens
+
+
+def _header(sec: str) -> str:
+    return f"\n### {sec}\n"
+
+
+def _item(it: dict) -> str:
+    return f"- {it['title']}\n"
+
+
+def _news(*titles: str, start: int = 1) -> list[dict]:
+    return [{"id": start + i, "title": t} for i, t in enumerate(titles)]
+
+
+def test_clean_title_and_key():
+    assert clean_title("【微博热搜】【独家】 央行  降准") == "央行 降准"
+    assert title_key("【快讯】ＡＩ芯片，出口！") == title_key("AI 芯片出口")
+    assert title_key("？？？") == ""
+
+
+def test_pack_round_robin_by_rank():
+    section_news = {"a": _news("甲一", "甲二", "甲三"), "b": _news("乙一", "乙二", start=10)}
+    # 预算只够两个标题加三条新闻：先装各维度第 1 名，再装 a 的第 2 名
+    budget = 2 * estimate_tokens(_header("a")) + 3 * estimate_tokens(_item({"title": "甲一"}))
+    result = pack_sections(section_news, _header, _item, budget=budget)
+    assert [it["title"] for it in result.sections["a"]] == ["甲一", "甲二"]
+    assert [it["title"] for it in result.sections["b"]] == ["乙一"]
+    assert result.dropped == {"a": 1, "b": 1}
+    assert result.tokens <= budget
+
+
+def test_pack_drops_cross_section_duplicates():
+    section_news = {"a": _news("【快讯】央行降准"), "b": _news("央行 降准！", "财政部发债", start=10)}
+    result = pack_sections(section_news, _header, _item)
+    assert [it["title"] for it in result.sections["a"]] == ["央行降准"]
+    assert [it["title"] for it in result.sections["b"]] == ["财政部发债"]
+    assert result.duplicates == 1
+
+
+def test_pack_keeps_titles_with_empty_key():
+    # 纯标点标题归一化后为空，不能互相当作重复
+    section_news = {"a": _news("？？？", "!!!", "……")}
+    result = pack_sections(section_news, _header, _item)
+    assert len(result.sections["a"]) == 3
+    assert result.duplicates == 0
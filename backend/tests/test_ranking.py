@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from ai.ranking import WINDOW_HOURS, Candidates, load_candidates, select
+from models import RawNews
+
+
+def _candidates(rows: list[tuple[str, str, str]]) -> Candidates:
+    """rows: [(section, platform, story_id), ...]"""
+    n = len(rows)
+    return Candidates(
+        ids=np.arange(1, n + 1, dtype=np.int64),
+        titles=[f"新闻{i}" for i in range(n)],
+        urls=[""] * n,
+        platforms=np.array([r[1] for r in rows], dtype=object),
+        sections=np.array([r[0] for r in rows], dtype=object),
+        stories=np.array([r[2] for r in rows], dtype=object),
+        timestamps=np.zeros(n, dtype=np.float64),
+        heat=np.zeros(n, dtype=np.float64),
+        confidence=np.ones(n, dtype=np.float64),
+    )
+
+
+def test_select_keeps_best_per_story_and_sorts_by_score():
+    c = _candidates([("tech", "a", "s1"), ("tech", "b", "s1"), ("tech", "c", "s2"), ("policy", "gov", "s3")])
+    scores = np.array([0.2, 0.9, 0.5, 0.1])
+    picked = select(c, scores, per_section=5)
+    assert picked == {"tech": [1, 2], "policy": [3]}
+
+
+def test_select_caps_sources_then_backfills():
+    rows = [("tech", "a", f"s{i}") for i in range(4)] + [("tech", "b", "s9")]
+    c = _candidates(rows)
+    scores = np.array([0.9, 0.8, 0.7, 0.6, 0.1])
+    # 每个来源最多 2 条：a 的第 3、4 名让位给 b，名额仍有剩余时再补回
+    assert select(c, scores, per_section=3, max_per_source=2) == {"tech": [0, 1, 4]}
+    assert select(c, scores, per_section=4, max_per_source=2) == {"tech": [0, 1, 2, 4]}
+
+
+def test_select_empty():
+    assert select(_candidates([]), np.array([]), per_section=3) == {}
+
+
+def test_load_candidates_bounded_by_window(db):
+    since = datetime(2026, 1, 1, 18, 0)
+    times = {
+        "before": since - timedelta(minutes=1),
+        "start": since,
+        "last": since + timedelta(hours=WINDOW_HOURS) - timedelta(minutes=1),
+        "after": since + timedelta(hours=WINDOW_HOURS),
+    }
+    for i, (title, t) in enumerate(times.items()):
+        db.add(RawNews(title=title, url=f"http://x/{i}", url_hash=f"h{i}", source_platform="sina",
+                       section="market", crawl_time=t))
+    db.add(RawNews(title="unclassified", url="http://x/u", url_hash="hu", source_platform="sina",
+                   crawl_time=since + timedelta(hours=1)))
+    db.commit()
+    assert sorted(load_candidates(db, since).titles) == ["last", "start"]
@@ -0,0 +1,49 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from crawlers.transport import build_adapter, start_timing, stop_timing
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive，第二次请求复用连接
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{httpd.server_address[1]}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_new_connection_records_dns_and_connect(server):
+    # 依赖 urllib3 私有的 _new_conn / _dns_host：升级 urllib3 后钩子不再生效时这里会失败
+    session = requests.Session()
+    session.mount("http://", build_adapter())
+    timing = start_timing()
+    try:
+        assert session.get(server, timeout=5).text == "ok"
+        assert timing.dns_ms > 0
+        assert timing.connect_ms > 0
+
+        reused = start_timing()
+        assert session.get(server, timeout=5).status_code == 200
+        assert (reused.dns_ms, reused.connect_ms) == (0.0, 0.0)
+    finally:
+        stop_timing()
+        session.close()